@@ -1,20 +1,15 @@
 from typing import Callable, Dict
 from .ballang import parse
 from .eval_visitor import EvalVisitor, PythonFunction, Scope, Value
+from .evaluate import define_functions
 from .node import CodeFileNode
-
-def wrap_function(fn: Callable) -> PythonFunction:
-    def wrapped(args: list) -> Value:
-        return fn(*args)
-    return wrapped
+from .program import CompiledProgram, compile_file, parse_cached, wrap_function
 
 def parse_file(file: str, global_functions: dict) -> Scope:
     fns: Dict[str, Value] = {}
     for name, curr_fn in global_functions.items():
         fns[name] = PythonFunction(wrap_function(curr_fn), name)
     global_scope = Scope(fns)
-    parsed = parse(file)
-    assert isinstance(parsed, CodeFileNode)
-    for function_def in parsed.functions.values():
-        function_def.accept(EvalVisitor(global_scope))
+    parsed = parse_cached(file)
+    define_functions(parsed, global_scope, host_names=global_functions.keys())
     return global_scope
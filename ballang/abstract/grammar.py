@@ -4,7 +4,7 @@ Defines Classes which can be used to define an abstract grammar and parse a stri
 from __future__ import annotations
 import copy
 from types import UnionType
-from typing import Any, Callable, Dict, List, Optional, TypeVar, Generic
+from typing import Any, Callable, Dict, FrozenSet, List, Optional, Tuple, TypeVar, Generic
 from abc import ABC, abstractmethod
 
 from .lexer import CodeSlice, TokenStream, lex, TokenType
@@ -43,6 +43,75 @@ class Grammar(ABC):
         """
         pass
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        """
+        Get the FIRST set of the grammar: the kinds of tokens, as (TokenType, value) pairs or whole token types (TokenType),
+        the next token must be for check to succeed. Used by OneOfParser and OneOfMatcher to find the possible choices with a
+        dictionary lookup.
+
+        Returns:
+            Optional[FrozenSet[Any]]: the FIRST set, None if the grammar may accept any token (the default)
+        """
+        return None
+
+
+# the choices of a OneOf grammar that are possible for a token, with a flag whether check still has to be called
+Candidates = List[Tuple[Grammar, bool]]
+
+
+def first_of_choices(choices: List[Grammar]) -> Optional[FrozenSet[Any]]:
+    """
+    Get the FIRST set of a choice between grammars
+
+    Args:
+        choices (List[Grammar]): the grammars
+
+    Returns:
+        Optional[FrozenSet[Any]]: the union of the FIRST sets, None if one of the grammars may accept any token
+    """
+    result: FrozenSet[Any] = frozenset()
+    for choice in choices:
+        choice_first = choice.first()
+        if choice_first is None:
+            return None
+        result = result | choice_first
+    return result
+
+
+def select_choice(choices: List[Grammar], dispatch: Dict[Tuple[TokenType, str], Candidates], tokens: TokenStream) -> Optional[Grammar]:
+    """
+    Find the first of the choices that can parse the next tokens.
+    The choices whose FIRST set contains the next token are computed once per kind of token and stored in dispatch,
+    single token choices don't have to be checked at all after that.
+
+    Args:
+        choices (List[Grammar]): the grammars to choose from, in order of priority
+        dispatch (Dict[Tuple[TokenType, str], Candidates]): the table of candidates by (token type, token value)
+        tokens (TokenStream): the tokens to check
+
+    Returns:
+        Optional[Grammar]: the choice, None if no choice can parse the next tokens
+    """
+    next = tokens.peek()
+    if next is None:
+        return None
+    key = (next.type, next.value)
+    candidates = dispatch.get(key)
+    if candidates is None:
+        candidates = []
+        for choice in choices:
+            choice_first = choice.first()
+            if choice_first is None:
+                candidates.append((choice, True))
+            elif key in choice_first or next.type in choice_first:
+                # for a single token grammar the FIRST set is all check looks at
+                candidates.append((choice, not choice.is_single_token()))
+        dispatch[key] = candidates
+    for choice, needs_check in candidates:
+        if not needs_check or choice.check(tokens):
+            return choice
+    return None
+
 
 class Matcher(Grammar, Generic[NodeT]):
     """
@@ -121,6 +190,8 @@ class Capture(Parser, Generic[NodeT]):
     Attributes:
         item (Optional[Matcher]): the matcher
         func (Optional[Callable[[Dict[str, NodeT]], NodeT]]): the function to convert the matched dictionary into a syntax tree
+        computing_first (bool): True while the FIRST set is computed, used to detect recursive rules
+        single_token (Optional[bool]): cached result of is_single_token
 
     Args:
         item (Optional[Matcher], optional): the matcher. Defaults to None.
@@ -128,6 +199,8 @@ class Capture(Parser, Generic[NodeT]):
     """
     item: Optional[Matcher]
     func: Optional[Callable[[Dict[str, NodeT]], NodeT]]
+    computing_first: bool
+    single_token: Optional[bool]
 
     def __init__(self, item: Optional[Matcher] = None, func: Optional[Callable[[Dict[str, NodeT]], NodeT]] = None):
         """
@@ -139,6 +212,8 @@ class Capture(Parser, Generic[NodeT]):
         """
         self.item = item
         self.func = func
+        self.computing_first = False
+        self.single_token = None
 
     def set(self, item: Matcher):
         """
@@ -149,6 +224,7 @@ class Capture(Parser, Generic[NodeT]):
             item (Matcher): the matcher
         """
         self.item = item
+        self.single_token = None
 
     def check(self, tokens: TokenStream) -> bool:
         """
@@ -161,7 +237,13 @@ class Capture(Parser, Generic[NodeT]):
             bool: True if the grammar can parse the next tokens
         """
         assert self.item is not None
-        return self.item.check(tokens)
+        # the result only depends on the position, so it is memoized in the stream (packrat parsing)
+        key = (id(self), tokens.index)
+        result = tokens.memo.get(key)
+        if result is None:
+            result = self.item.check(tokens)
+            tokens.memo[key] = result
+        return result
 
     def parse(self, tokens: TokenStream) -> NodeT:
         """
@@ -187,8 +269,28 @@ class Capture(Parser, Generic[NodeT]):
         Returns:
             bool: True if the grammar only consumes a single token
         """
+        # the answer never changes once the matcher is set, so it is only computed once
+        if self.single_token is None:
+            assert self.item is not None
+            self.single_token = self.item.is_single_token()
+        return self.single_token
+
+    def first(self) -> Optional[FrozenSet[Any]]:
+        """
+        Get the FIRST set of the matcher
+
+        Returns:
+            Optional[FrozenSet[Any]]: the FIRST set, None if it may accept any token
+        """
         assert self.item is not None
-        return self.item.is_single_token()
+        if self.computing_first:
+            # the rule refers to itself, be conservative
+            return None
+        self.computing_first = True
+        try:
+            return self.item.first()
+        finally:
+            self.computing_first = False
 
     def __str__(self) -> str:
         return f"Capture({self.item})"
@@ -201,11 +303,15 @@ class OneOfParser(Parser, Generic[NodeT]):
     
     Attributes:
         choices (List[Parser]): the parsers to choose from
+        dispatch (Dict[Tuple[TokenType, str], Candidates]): the possible choices by kind of token (see select_choice)
+        single_token (Optional[bool]): cached result of is_single_token
 
     Args:
         choices (List[Parser], optional): the parsers to choose from. Defaults to [].
     """
     choices: List[Parser]
+    dispatch: Dict[Tuple[TokenType, str], Candidates]
+    single_token: Optional[bool]
 
     def __init__(self, choices: List[Parser] = []):
         """
@@ -215,6 +321,8 @@ class OneOfParser(Parser, Generic[NodeT]):
             choices (List[Parser], optional): the parsers to choose from. Defaults to [].
         """
         self.choices = choices
+        self.dispatch = {}
+        self.single_token = None
 
     def set(self, choices: List[Parser]):
         """
@@ -225,6 +333,8 @@ class OneOfParser(Parser, Generic[NodeT]):
             choices (List[Parser]): the parsers to choose from
         """
         self.choices = choices
+        self.dispatch = {}
+        self.single_token = None
 
     def check(self, tokens: TokenStream) -> bool:
         """
@@ -236,12 +346,12 @@ class OneOfParser(Parser, Generic[NodeT]):
         Returns:
             bool: True if the grammar can parse the next tokens
         """
-        if tokens.is_eof():
-            return False
-        for choice in self.choices:
-            if choice.check(tokens):
-                return True
-        return False
+        key = (id(self), tokens.index)
+        result = tokens.memo.get(key)
+        if result is None:
+            result = select_choice(self.choices, self.dispatch, tokens) is not None  # type: ignore
+            tokens.memo[key] = result
+        return result
 
     def parse(self, tokens: TokenStream) -> NodeT:
         """
@@ -256,9 +366,10 @@ class OneOfParser(Parser, Generic[NodeT]):
         Raises:
             ParserError: if the grammar cannot parse the next tokens
         """
-        for choice in self.choices:
-            if choice.check(tokens):
-                return choice.parse(tokens)
+        choice = select_choice(self.choices, self.dispatch, tokens)  # type: ignore
+        if choice is not None:
+            assert isinstance(choice, Parser)
+            return choice.parse(tokens)
         next_token = tokens.peek()
         if tokens.is_eof():
             raise ParserError("unexpected end of file")
@@ -272,10 +383,18 @@ class OneOfParser(Parser, Generic[NodeT]):
         Returns:
             bool: True if the grammar only consumes a single token
         """
-        for choice in self.choices:
-            if not choice.is_single_token():
-                return False
-        return True
+        if self.single_token is None:
+            self.single_token = all(choice.is_single_token() for choice in self.choices)
+        return self.single_token
+
+    def first(self) -> Optional[FrozenSet[Any]]:
+        """
+        Get the FIRST set, the union of the FIRST sets of the choices
+
+        Returns:
+            Optional[FrozenSet[Any]]: the FIRST set, None if it may accept any token
+        """
+        return first_of_choices(self.choices)  # type: ignore
 
 
 class OneOfMatcher(Matcher, Generic[NodeT]):
@@ -284,8 +403,12 @@ class OneOfMatcher(Matcher, Generic[NodeT]):
 
     Attributes:
         choices (List[Matcher]): the matchers to choose from
+        dispatch (Dict[Tuple[TokenType, str], Candidates]): the possible choices by kind of token (see select_choice)
+        single_token (Optional[bool]): cached result of is_single_token
     """
     choices: List[Matcher]
+    dispatch: Dict[Tuple[TokenType, str], Candidates]
+    single_token: Optional[bool]
 
     def __init__(self, choices: List[Matcher] = []):
         """
@@ -295,6 +418,8 @@ class OneOfMatcher(Matcher, Generic[NodeT]):
             choices (List[Matcher], optional): the matchers to choose from. Defaults to [].
         """
         self.choices = choices
+        self.dispatch = {}
+        self.single_token = None
 
     def set(self, choices: List[Matcher]):
         """
@@ -304,6 +429,8 @@ class OneOfMatcher(Matcher, Generic[NodeT]):
             choices (List[Matcher]): the matchers to choose from
         """
         self.choices = choices
+        self.dispatch = {}
+        self.single_token = None
 
     def check(self, tokens: TokenStream) -> bool:
         """
@@ -315,12 +442,12 @@ class OneOfMatcher(Matcher, Generic[NodeT]):
         Returns:
             bool: True if the grammar can parse the next tokens
         """
-        if tokens.is_eof():
-            return False
-        for choice in self.choices:
-            if choice.check(tokens):
-                return True
-        return False
+        key = (id(self), tokens.index)
+        result = tokens.memo.get(key)
+        if result is None:
+            result = select_choice(self.choices, self.dispatch, tokens) is not None  # type: ignore
+            tokens.memo[key] = result
+        return result
 
     def match(self, tokens: TokenStream, dict: Dict) -> Dict:
         """
@@ -338,9 +465,10 @@ class OneOfMatcher(Matcher, Generic[NodeT]):
         """
         assert isinstance(dict, Dict)
 
-        for choice in self.choices:
-            if choice.check(tokens):
-                return choice.match(tokens, dict)
+        choice = select_choice(self.choices, self.dispatch, tokens)  # type: ignore
+        if choice is not None:
+            assert isinstance(choice, Matcher)
+            return choice.match(tokens, dict)
         next_token = tokens.peek()
         if tokens.is_eof():
             raise ParserError("unexpected end of file")
@@ -354,10 +482,18 @@ class OneOfMatcher(Matcher, Generic[NodeT]):
         Returns:
             bool: True if the grammar only consumes a single token
         """
-        for choice in self.choices:
-            if not choice.is_single_token():
-                return False
-        return True
+        if self.single_token is None:
+            self.single_token = all(choice.is_single_token() for choice in self.choices)
+        return self.single_token
+
+    def first(self) -> Optional[FrozenSet[Any]]:
+        """
+        Get the FIRST set, the union of the FIRST sets of the choices
+
+        Returns:
+            Optional[FrozenSet[Any]]: the FIRST set, None if it may accept any token
+        """
+        return first_of_choices(self.choices)  # type: ignore
 
 
 class Sequence(Matcher):
@@ -404,6 +540,9 @@ class Sequence(Matcher):
         # checking in later items in advance is only possible for fixed sized grammars, because
         # otherwise it is unknown how many tokens will be consumed by the first items
 
+        if len(self.items) == 0 or not self.items[0].is_single_token():
+            # only the first item has to be checked, no copy needed
+            return len(self.items) == 0 or self.items[0].check(tokens)
         tokens_copy = copy.copy(tokens)
         i = 0
         for item in self.items:
@@ -444,6 +583,17 @@ class Sequence(Matcher):
     def is_single_token(self) -> bool:
         return False
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        """
+        Get the FIRST set, the FIRST set of the first item (check only looks at the first token of it)
+
+        Returns:
+            Optional[FrozenSet[Any]]: the FIRST set, None if it may accept any token
+        """
+        if len(self.items) == 0:
+            return None
+        return self.items[0].first()
+
 
 class Maybe(Matcher):
     """
@@ -499,9 +649,12 @@ class Multiple(Matcher):
 
     Attributes:
         item (Matcher): the matcher that may be repeated
+        pattern (str): the part of the labels that is replaced by the index of the repetition
+        templates (Dict[str, Optional[List[str]]]): the labels split at the pattern, None for labels without the pattern
     """
     item: Matcher
     pattern: str
+    templates: Dict[str, Optional[List[str]]]
 
     def __init__(self, item, pattern: str = "{#id}") -> None:
         """
@@ -509,9 +662,11 @@ class Multiple(Matcher):
 
         Args:
             item (Matcher): the matcher that may be repeated
+            pattern (str, optional): the part of the labels that is replaced by the index. Defaults to "{#id}".
         """
         self.item = item
         self.pattern = pattern
+        self.templates = {}
 
     def __str__(self):
         return f"OneOrMore({self.item})"
@@ -537,9 +692,11 @@ class Multiple(Matcher):
         while self.item.check(tokens):
             new_dict = self.item.match(tokens, {})
             for key in new_dict:
-                if self.pattern in key:
-                    new_key = key.replace(self.pattern, str(i))
-                    dict[new_key] = new_dict[key]
+                if key not in self.templates:
+                    self.templates[key] = key.split(self.pattern) if self.pattern in key else None
+                template = self.templates[key]
+                if template is not None:
+                    dict[str(i).join(template)] = new_dict[key]
             i += 1
         return dict
 
@@ -603,6 +760,9 @@ class Labeled(Matcher):
     def is_single_token(self) -> bool:
         return self.item.is_single_token()
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        return self.item.first()
+
 
 class AnyWord(Parser, Generic[NodeT]):
     """
@@ -659,6 +819,9 @@ class AnyWord(Parser, Generic[NodeT]):
     def is_single_token(self) -> bool:
         return True
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        return frozenset([TokenType.WORD])
+
 
 class AnyNumber(Parser, Generic[NodeT]):
     """
@@ -715,6 +878,9 @@ class AnyNumber(Parser, Generic[NodeT]):
         """
         return True
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        return frozenset([TokenType.NUMBER])
+
 
 class AnyString(Parser, Generic[NodeT]):
     """
@@ -775,6 +941,9 @@ class AnyString(Parser, Generic[NodeT]):
         """
         return True
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        return frozenset([TokenType.STRING])
+
 
 class SymbolParser(Parser, Generic[NodeT]):
     """
@@ -818,7 +987,7 @@ class SymbolParser(Parser, Generic[NodeT]):
         next = tokens.peek()
         if next is None:
             return False
-        return next.value == self.symbol
+        return next.type == TokenType.SYMBOL and next.value == self.symbol
 
     def parse(self, tokens: TokenStream) -> NodeT:
         """
@@ -836,7 +1005,7 @@ class SymbolParser(Parser, Generic[NodeT]):
         next = tokens.next()
         
         assert next is not None
-        if next.value != self.symbol:
+        if next.type != TokenType.SYMBOL or next.value != self.symbol:
             raise ParserError(f"expected symbol {self.symbol}, got {next.value}", next.slice)
         return self.nodeConstructor(next.value)
 
@@ -849,6 +1018,9 @@ class SymbolParser(Parser, Generic[NodeT]):
         """
         return True
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        return frozenset([(TokenType.SYMBOL, self.symbol)])
+
 
 class Symbol(Matcher):
     """
@@ -894,7 +1066,7 @@ class Symbol(Matcher):
         next = tokens.peek()
         if next is None:
             return False
-        return next.value == self.symbol
+        return next.type == TokenType.SYMBOL and next.value == self.symbol
 
     def match(self, tokens: TokenStream, dict: Dict) -> Dict:
         """
@@ -915,7 +1087,7 @@ class Symbol(Matcher):
 
         next = tokens.next()
         assert next is not None
-        if next.value != self.symbol:
+        if next.type != TokenType.SYMBOL or next.value != self.symbol:
             raise ParserError(f"expected symbol {self.symbol}, got {next.value}", next.slice)
         return dict
 
@@ -929,6 +1101,9 @@ class Symbol(Matcher):
         """
         return True
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        return frozenset([(TokenType.SYMBOL, self.symbol)])
+
 
 class WordParser(Parser, Generic[NodeT]):
     """
@@ -962,7 +1137,7 @@ class WordParser(Parser, Generic[NodeT]):
         next = tokens.peek()
         if next is None:
             return False
-        return next.value == self.word
+        return next.type == TokenType.WORD and next.value == self.word
 
     def parse(self, tokens: TokenStream) -> NodeT:
         """
@@ -979,7 +1154,7 @@ class WordParser(Parser, Generic[NodeT]):
         """
         next = tokens.next()
         assert next is not None
-        if next.value != self.word:
+        if next.type != TokenType.WORD or next.value != self.word:
             raise ParserError(f"expected word {self.word}, got {next.value}", next.slice)
         assert self.nodeConstructor is not None
         return self.nodeConstructor(next.value)
@@ -993,6 +1168,9 @@ class WordParser(Parser, Generic[NodeT]):
         """
         return True
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        return frozenset([(TokenType.WORD, self.word)])
+
 
 class Word(Matcher):
     """
@@ -1023,7 +1201,7 @@ class Word(Matcher):
         next = tokens.peek()
         if next is None:
             return False
-        return next.value == self.word
+        return next.type == TokenType.WORD and next.value == self.word
 
     def match(self, tokens: TokenStream, dict: Dict) -> Dict:
         """
@@ -1043,7 +1221,7 @@ class Word(Matcher):
 
         next = tokens.next()
         assert next is not None
-        if next.value != self.word:
+        if next.type != TokenType.WORD or next.value != self.word:
             raise ParserError(f"expected word {self.word}, got {next.value}", next.slice)
         return dict
 
@@ -1056,6 +1234,8 @@ class Word(Matcher):
         """
         return True
 
+    def first(self) -> Optional[FrozenSet[Any]]:
+        return frozenset([(TokenType.WORD, self.word)])
 
 
 if __name__ == "__main__":
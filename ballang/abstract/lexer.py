@@ -1,5 +1,6 @@
+import re
 from enum import Enum, auto
-from typing import List, Optional
+from typing import Dict, List, Optional, Pattern, Tuple
 
 # there are different types of tokens
 class TokenType(Enum):
@@ -66,8 +67,10 @@ class CodePos:
         lines = self.text.split("\n")
         line = lines[self.line - 1]
         before = line[:self.column - 1]
-        after = line[self.column - 1:]
-        return before + bcolors.FAIL + line[self.column] + bcolors.ENDC + after
+        # the position can be right after the end of the line (e.g. an unexpected EOF)
+        char = line[self.column - 1:self.column] or " "
+        after = line[self.column:]
+        return before + bcolors.FAIL + char + bcolors.ENDC + after
     def __repr__(self):
         return f"CodePos({self.line}, {self.column})"
     
@@ -132,6 +135,58 @@ class CodeSlice:
     
     def __str__(self):
         return f"start: {self.start}, end: {self.end}"
+
+
+def pos_from_offset(text: str, offset: int) -> CodePos:
+    """
+    Compute the line and column of an offset in a text
+
+    Args:
+        text (str): the text
+        offset (int): the index of the character
+
+    Returns:
+        CodePos: the position
+    """
+    line = text.count("\n", 0, offset) + 1
+    line_start = text.rfind("\n", 0, offset) + 1
+    return CodePos(line, offset - line_start + 1, text)
+
+
+class OffsetSlice(CodeSlice):
+    """
+    A slice of code stored as offsets into the text. The start and end positions (line and column) are only computed
+    when they are accessed, which usually only happens when an error is reported.
+
+    Attributes:
+        text (str): the text
+        start_offset (int): the index of the first character
+        end_offset (int): the index after the last character
+    """
+    text: str
+    start_offset: int
+    end_offset: int
+
+    def __init__(self, text: str, start_offset: int, end_offset: int):
+        """
+        Create a new OffsetSlice
+
+        Args:
+            text (str): the text
+            start_offset (int): the index of the first character
+            end_offset (int): the index after the last character
+        """
+        self.text = text
+        self.start_offset = start_offset
+        self.end_offset = end_offset
+
+    @property
+    def start(self) -> CodePos:  # type: ignore[override]
+        return pos_from_offset(self.text, self.start_offset)
+
+    @property
+    def end(self) -> CodePos:  # type: ignore[override]
+        return pos_from_offset(self.text, self.end_offset)
 class Token:
     """
     A token
@@ -246,14 +301,18 @@ class TokenStream:
     Attributes:
         tokens (List[Token]): The list of tokens in the stream.
         index (int): The current index in the stream.
+        memo (Dict[Tuple[int, int], bool]): Results of grammar checks by (grammar id, index), shared with copies of the
+            stream, so every rule is only checked once at every position (see grammar.py).
     """
 
     tokens: List[Token]
     index: int
+    memo: Dict[Tuple[int, int], bool]
 
     def __init__(self, tokens: List[Token]):
         self.tokens = tokens
         self.index = 0
+        self.memo = {}
 
     def peek(self) -> Optional[Token]:
         """
@@ -488,9 +547,10 @@ class __Lexer:
             else:
                 raise LexerError(f"Unknown character '{char}'", self.stream.get_pos())
         return self.tokens
-def lex(string: str, symbol_chars: str, multi_symbols: List[str] = [], num_sep: str = "." , alphabet: str = "abcdefghijklmnopqrstuvwxyz_ABCDEFGHIJKLMNOPQRSTUVWXYZ", str_chars = "\"'") -> List[Token]:
+def lex_chars(string: str, symbol_chars: str, multi_symbols: List[str] = [], num_sep: str = "." , alphabet: str = "abcdefghijklmnopqrstuvwxyz_ABCDEFGHIJKLMNOPQRSTUVWXYZ", str_chars = "\"'") -> List[Token]:
     """
-    Tokenizes a given string based on parameters.
+    Tokenizes a given string based on parameters, character by character.
+    This is the reference implementation, lex produces the same tokens a lot faster.
 
     Args:
         string (str): The string to be tokenized.
@@ -506,5 +566,119 @@ def lex(string: str, symbol_chars: str, multi_symbols: List[str] = [], num_sep:
     lexer = __Lexer(string, alphabet, num_sep, symbol_chars, multi_symbols, str_chars)
     return lexer.lex()
 
+
+# the compiled token patterns by the arguments of lex
+_token_patterns: Dict[Tuple[str, Tuple[str, ...], str, str, str], Pattern[str]] = {}
+
+
+def get_token_pattern(symbol_chars: str, multi_symbols: List[str], num_sep: str, alphabet: str, str_chars: str) -> Pattern[str]:
+    """
+    Get the regular expression matching a single token (or a run of whitespace) for the given lexer arguments.
+    The alternatives are in the same order as the checks in __Lexer.lex, the group names tell which one matched.
+
+    Args:
+        symbol_chars (str): The allowed characters for symbol tokens.
+        multi_symbols (List[str]): The list of multi-character symbols.
+        num_sep (str): The separator character for numbers.
+        alphabet (str): The allowed characters for word tokens.
+        str_chars (str): The allowed characters for string tokens.
+
+    Returns:
+        Pattern[str]: the compiled pattern
+    """
+    key = (symbol_chars, tuple(multi_symbols), num_sep, alphabet, str_chars)
+    pattern = _token_patterns.get(key)
+    if pattern is not None:
+        return pattern
+    # __Lexer only extends a symbol while the longer symbol is in multi_symbols, so every prefix has to be in there too
+    valid_multi = [symbol for symbol in multi_symbols
+                   if all(char in symbol_chars for char in symbol)
+                   and all(symbol[:i] in multi_symbols for i in range(2, len(symbol)))]
+    valid_multi.sort(key=len, reverse=True)
+    symbol_alternatives = [re.escape(symbol) for symbol in valid_multi] + [f"[{re.escape(symbol_chars)}]"]
+    alternatives = [
+        f"(?P<word>[{re.escape(alphabet)}][{re.escape(alphabet)}\\d]*)",
+        f"(?P<number>\\d[\\d{re.escape(num_sep)}]*)",
+        f"(?P<symbol>{'|'.join(symbol_alternatives)})",
+        "(?P<whitespace>[ \\t\\n]+)",
+    ]
+    for i, quote in enumerate(str_chars):
+        q = re.escape(quote)
+        alternatives.append(f"{q}(?P<string{i}>(?:\\\\.|[^{q}\\\\])*){q}")
+    pattern = re.compile("|".join(alternatives), re.DOTALL)
+    _token_patterns[key] = pattern
+    return pattern
+
+
+def lex(string: str, symbol_chars: str, multi_symbols: List[str] = [], num_sep: str = "." , alphabet: str = "abcdefghijklmnopqrstuvwxyz_ABCDEFGHIJKLMNOPQRSTUVWXYZ", str_chars = "\"'") -> List[Token]:
+    """
+    Tokenizes a given string based on parameters. Produces the same tokens (and errors) as lex_chars, but matches each
+    token with a single compiled regular expression and only stores offsets for the positions (see OffsetSlice).
+
+    Args:
+        string (str): The string to be tokenized.
+        symbol_chars (str): The allowed characters for symbol tokens.
+        multi_symbols (List[str]): The list of multi-character symbols.
+        num_sep (str): The separator character for numbers.
+        alphabet (str): The allowed characters for word tokens.
+        str_chars (str): The allowed characters for string tokens.
+    
+    Returns:
+        List[Token]: The list of tokens generated by the lexer.
+
+    Raises:
+        LexerError: if the string contains an unknown character, an invalid number or an unterminated string
+    """
+    match_token = get_token_pattern(symbol_chars, multi_symbols, num_sep, alphabet, str_chars).match
+    tokens: List[Token] = []
+    pos = 0
+    length = len(string)
+    while pos < length:
+        match = match_token(string, pos)
+        if match is None:
+            if string[pos] in str_chars:
+                # the closing quote is missing
+                raise LexerError("Unexpected EOF", pos_from_offset(string, length))
+            raise LexerError(f"Unknown character '{string[pos]}'", pos_from_offset(string, pos))
+        end = match.end()
+        kind = match.lastgroup
+        assert kind is not None
+        if kind == "word":
+            tokens.append(Token(TokenType.WORD, match.group(), OffsetSlice(string, pos, end)))
+        elif kind == "symbol":
+            tokens.append(Token(TokenType.SYMBOL, match.group(), OffsetSlice(string, pos, end)))
+        elif kind == "number":
+            if end < length and string[end] not in symbol_chars and not is_whitespace(string[end]):
+                raise LexerError(f"Invalid number character '{string[end]}', maybe add a space", pos_from_offset(string, end))
+            tokens.append(Token(TokenType.NUMBER, match.group(), OffsetSlice(string, pos, end)))
+        elif kind != "whitespace":
+            quote = string[pos]
+            # an escaped quote is replaced by the quote, other escapes are kept as they are
+            value = match.group(kind).replace("\\" + quote, quote) if "\\" in match.group(kind) else match.group(kind)
+            tokens.append(Token(TokenType.STRING, value, OffsetSlice(string, pos, end)))
+        pos = end
+    return tokens
+
+
 if __name__ == "__main__":
-    print(lex("hello wOrld_2_a + 3 - 4 a", symbol_chars="+-*/"))
\ No newline at end of file
+    import glob
+    import sys
+    import time
+    print(lex("hello wOrld_2_a + 3 - 4 a", symbol_chars="+-*/"))
+
+    # benchmark against the character by character lexer, run from the root of the repository
+    args = {"symbol_chars": "+-*/(){};=<>!&|,", "multi_symbols": ["==", "<=", ">=", "!=", "&&", "||"]}
+    texts = []
+    for path in sorted(glob.glob("src/*.balls")):
+        with open(path, "r") as f:
+            texts.append(f.read())
+    n = int(sys.argv[1]) if len(sys.argv) > 1 else 50
+    for text in texts:
+        expected = [(token.type, token.value, repr(token.slice)) for token in lex_chars(text, **args)]
+        assert [(token.type, token.value, repr(token.slice)) for token in lex(text, **args)] == expected
+    for name, lex_fn in [("lex_chars", lex_chars), ("lex", lex)]:
+        start = time.time()
+        for _ in range(n):
+            for text in texts:
+                lex_fn(text, **args)
+        print(f"{name}: lexing {len(texts)} files {n} times took {time.time() - start} seconds")
\ No newline at end of file
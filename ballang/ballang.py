@@ -4,8 +4,11 @@ Defines the grammar for the Ballang language and provides a function to parse a
 The grammar is defined using the `grammar` module, which provides a way to define a context-free grammars.
 """
 
+import glob
+import json
+import time
 from abc import ABC
-from typing import Dict, List, Optional, TypeVar, cast
+from typing import Any, Dict, List, Optional, TypeVar, cast
 
 from .abstract.grammar import AnyNumber, AnyString, AnyWord, Capture, Labeled, Maybe, Multiple, Sequence, Symbol, SymbolParser, Word
 from .abstract.lexer import TokenStream, lex
@@ -13,6 +16,9 @@ from .node import CodeFileNode, FuncArgNode, FunctionDefNode, Node, NumberNode,
 from .tostring_visitor import ToStringVisitor
 from .capture import *
 
+# arguments for the lexer
+SYMBOL_CHARS = "+-*/(){};=<>!&|,"
+MULTI_SYMBOLS = ["==", "<=", ">=", "!=", "&&", "||"]
 
 
 def get_grammar():
@@ -36,10 +42,14 @@ def get_grammar():
 
     while_loop -> "while" expression block
 
-    statement -> return | var_def | func_call | assignment
+    statement -> return | break | continue | var_def | func_call | assignment
 
     return -> "return" expression?
 
+    break -> "break"
+
+    continue -> "continue"
+
     var_def -> "let" ANY_WORD ("=" expression)?
 
     var -> ANY_WORD
@@ -129,7 +139,10 @@ def get_grammar():
         Maybe(Labeled(expression, "value"))
     ]), func=return_capture)
 
-    statement = return_ | var_def | func_call | assignment
+    break_ = Capture(Word("break"), func=break_capture)
+    continue_ = Capture(Word("continue"), func=continue_capture)
+
+    statement = return_ | break_ | continue_ | var_def | func_call | assignment
 
     block = Capture(func=block_capture)
     if_statement = Capture(func=if_capture)
@@ -238,6 +251,12 @@ def get_grammar():
     return file
 
 
+# The grammar is built once when the module is imported and shared by all calls to parse, it must not be changed afterwards.
+# Parsing keeps its state in the TokenStream, the grammar objects only cache answers that don't depend on the input
+# (is_single_token, FIRST set dispatch, label templates), so sharing it between threads is safe. Every process builds its own.
+GRAMMAR = get_grammar()
+
+
 def parse(code: str) -> Node:
     """
     Parse a string of Ballang code into a syntax tree
@@ -248,11 +267,83 @@ def parse(code: str) -> Node:
     Returns:
         Node: the syntax tree
     """
-    tokens = lex(code, symbol_chars="+-*/(){};=<>!&|,",
-                 multi_symbols=["==", "<=", ">=", "!=", "&&", "||"])
+    tokens = lex(code, symbol_chars=SYMBOL_CHARS, multi_symbols=MULTI_SYMBOLS)
     stream = TokenStream(tokens)
-    grammar = get_grammar()
-    return grammar.parse(stream)
+    return GRAMMAR.parse(stream)
+
+
+def collect_level_scripts(data: Any) -> List[str]:
+    """
+    Find the ballang code embedded in a level (BallangString and BallangInline effects), inline code is wrapped into a
+    function like World.parse_ballang_inline does
+
+    Args:
+        data (Any): the parsed json of the level
+
+    Returns:
+        List[str]: the code of the scripts
+    """
+    scripts: List[str] = []
+    if isinstance(data, dict):
+        if data.get("type") == "BallangString":
+            scripts.append(data["params"]["code"])
+        elif data.get("type") == "BallangInline":
+            scripts.append(f"def inline_{len(scripts)}(t,ball_id){{\n{data['params']['code']};\n}}")
+        for value in data.values():
+            scripts.extend(collect_level_scripts(value))
+    elif isinstance(data, list):
+        for value in data:
+            scripts.extend(collect_level_scripts(value))
+    return scripts
+
+
+def check_string_literals():
+    """
+    Check that strings which spell a keyword or a symbol are parsed as strings, the dispatch of OneOf grammars (see
+    select_choice) must not mistake them for the keyword or symbol.
+    """
+    for text in ["break", "continue", "return", "let", "if", "else", "while", "def", ";", "{", "}", "(", "=", "&&"]:
+        parsed = parse(f'def f(){{ "{text}"; return "{text}"; }}')
+        assert isinstance(parsed, CodeFileNode)
+        statements = parsed.functions["f"].body.statements
+        assert isinstance(statements[0], StringNode) and statements[0].string == text, f"{text} was not parsed as a string"
+        value = statements[1].value
+        assert isinstance(value, StringNode) and value.string == text, f"{text} was not parsed as a string"
+    print("strings spelling keywords and symbols are parsed as strings")
+
+
+def benchmark_parsing(n: int = 20):
+    """
+    Parse every src/*.balls file and every script in level/*.json n times, once building the grammar for every parse
+    (like parse used to) and once with the shared GRAMMAR. Has to be run from the root of the repository.
+
+    Args:
+        n (int, optional): how often every script is parsed. Defaults to 20.
+    """
+    scripts: List[str] = []
+    for path in sorted(glob.glob("src/*.balls")):
+        with open(path, "r") as f:
+            scripts.append(f.read())
+    for path in sorted(glob.glob("level/*.json")):
+        with open(path, "r") as f:
+            scripts.extend(collect_level_scripts(json.load(f)))
+    print(f"parsing {len(scripts)} scripts {n} times")
+
+    start = time.time()
+    for _ in range(n):
+        for code in scripts:
+            tokens = lex(code, symbol_chars=SYMBOL_CHARS, multi_symbols=MULTI_SYMBOLS)
+            get_grammar().parse(TokenStream(tokens))
+    rebuild_duration = time.time() - start
+    print(f"building the grammar for every parse took {rebuild_duration} seconds")
+
+    start = time.time()
+    for _ in range(n):
+        for code in scripts:
+            parse(code)
+    shared_duration = time.time() - start
+    print(f"using the shared grammar took {shared_duration} seconds")
+    print(f"the shared grammar is {rebuild_duration / shared_duration} times faster")
 
 
 if __name__ == "__main__":
@@ -293,3 +384,5 @@ if __name__ == "__main__":
         from .evaluate import evaluate
         evaluate(text, "test")
         # parsed.accept(EvalVisitor(entry_function="test"))
+    check_string_literals()
+    benchmark_parsing()
@@ -0,0 +1,476 @@
+"""
+Bytecode backend for Ballang.
+
+A function definition is compiled into a flat list of (opcode, argument) instructions with a constant pool.
+Local variables and arguments are resolved to slots in a list at compile time, only names which are not defined locally
+(functions of the file and host functions) are looked up in the global scope at runtime.
+The resulting CodeObject is run by the loop in execute, which is a lot faster than walking the tree with the EvalVisitor.
+"""
+from __future__ import annotations
+from typing import Any, Dict, List, Tuple
+
+from .eval_visitor import Function, Scope, Value
+from .node import AssignNode, BreakNode, CodeBlockNode, ContinueNode, CodeFileNode, FuncArgNode, FuncCallNode, FunctionDefNode, IfNode, Node, NodeVisitor, NumberNode, ReturnNode, StringNode, SymbolNode, TwoSideOpNode, UnaryOpNode, VarDefNode, VarNode, WordNode, whileNode
+
+# opcodes, every instruction is a tuple of an opcode and exactly one argument (0 if unused)
+LOAD_CONST = 0
+LOAD_LOCAL = 1
+STORE_LOCAL = 2
+LOAD_GLOBAL = 3
+STORE_GLOBAL = 4
+CALL = 5
+POP_TOP = 6
+JUMP = 7
+JUMP_IF_FALSE = 8
+RETURN_VALUE = 9
+ADD = 10
+SUB = 11
+MUL = 12
+DIV = 13
+EQ = 14
+NEQ = 15
+LT = 16
+GT = 17
+LEQ = 18
+GEQ = 19
+AND = 20
+OR = 21
+NEG = 22
+NOT = 23
+
+OPNAMES = ["LOAD_CONST", "LOAD_LOCAL", "STORE_LOCAL", "LOAD_GLOBAL", "STORE_GLOBAL", "CALL", "POP_TOP", "JUMP",
+           "JUMP_IF_FALSE", "RETURN_VALUE", "ADD", "SUB", "MUL", "DIV", "EQ", "NEQ", "LT", "GT", "LEQ", "GEQ", "AND", "OR",
+           "NEG", "NOT"]
+
+TWO_SIDE_OPS: Dict[str, int] = {
+    "+": ADD, "-": SUB, "*": MUL, "/": DIV,
+    "==": EQ, "!=": NEQ, "<": LT, ">": GT, "<=": LEQ, ">=": GEQ,
+    "&&": AND, "||": OR,
+}
+UNARY_OPS: Dict[str, int] = {"-": NEG, "!": NOT}
+
+
+class CodeObject:
+    """
+    The compiled form of a Ballang function
+
+    Member Variables:
+        name (str): the name of the function
+        n_args (int): the number of arguments, they are stored in the first local slots
+        n_locals (int): the number of local slots (including the arguments)
+        code (List[Tuple[int, int]]): the instructions as (opcode, argument) pairs
+        consts (List[Value]): the constant pool, also holds the names of global variables
+    """
+    name: str
+    n_args: int
+    n_locals: int
+    code: List[Tuple[int, int]]
+    consts: List[Value]
+
+    def __init__(self, name: str, n_args: int, n_locals: int, code: List[Tuple[int, int]], consts: List[Value]):
+        self.name = name
+        self.n_args = n_args
+        self.n_locals = n_locals
+        self.code = code
+        self.consts = consts
+
+    def disassemble(self) -> str:
+        """
+        Get a human readable listing of the instructions, useful for debugging the compiler
+
+        Returns:
+            str: one line per instruction
+        """
+        lines = [f"{self.name}({self.n_args} args, {self.n_locals} locals)"]
+        for pc, (op, arg) in enumerate(self.code):
+            line = f"{pc:4} {OPNAMES[op]:<14} {arg}"
+            if op in (LOAD_CONST, LOAD_GLOBAL, STORE_GLOBAL):
+                line += f" ({self.consts[arg]!r})"
+            lines.append(line)
+        return "\n".join(lines)
+
+
+class BytecodeFunction(Function):
+    """
+    Ballang function compiled to bytecode, implementing the Function interface
+
+    Member Variables:
+        code (CodeObject): the compiled function
+        global_scope (Scope): the global scope the function was defined in
+    """
+    code: CodeObject
+    global_scope: Scope
+
+    def __init__(self, code: CodeObject, global_scope: Scope):
+        self.code = code
+        self.global_scope = global_scope
+
+    def call(self, args: List[Value]) -> Value:
+        """
+        Call the function with the given arguments as a list
+
+        Args:
+            args (List[Value]): the arguments
+
+        Returns:
+            Value: the return value of the function (if any)
+        """
+        return execute(self.code, args, self.global_scope)
+
+    def __str__(self) -> str:
+        return f"BytecodeFunction({self.code.name})"
+
+
+def execute(code: CodeObject, args: List[Value], global_scope: Scope) -> Value:
+    """
+    Run a compiled function
+
+    Args:
+        code (CodeObject): the compiled function
+        args (List[Value]): the arguments
+        global_scope (Scope): the scope used to look up names which are not local
+
+    Returns:
+        Value: the return value of the function (None if it doesn't return anything)
+
+    Raises:
+        Exception: if the function is called with the wrong number of arguments or None as an argument
+    """
+    if len(args) != code.n_args:
+        raise Exception("wrong number of arguments")
+    for arg in args:
+        if arg is None:
+            raise Exception("cannot pass None as argument")
+    slots: List[Any] = list(args)
+    if code.n_locals > code.n_args:
+        slots.extend([None] * (code.n_locals - code.n_args))
+    instructions = code.code
+    consts = code.consts
+    stack: List[Any] = []
+    push = stack.append
+    pop = stack.pop
+    pc = 0
+    # the branches are roughly ordered by how often they are executed
+    while True:
+        op, arg = instructions[pc]
+        pc += 1
+        if op == LOAD_LOCAL:
+            push(slots[arg])
+        elif op == LOAD_CONST:
+            push(consts[arg])
+        elif op == STORE_LOCAL:
+            slots[arg] = pop()
+        elif op == LOAD_GLOBAL:
+            push(global_scope.get(consts[arg]))
+        elif op == JUMP_IF_FALSE:
+            if not pop():
+                pc = arg
+        elif op == JUMP:
+            pc = arg
+        elif op == CALL:
+            if arg:
+                call_args = stack[-arg:]
+                del stack[-arg:]
+            else:
+                call_args = []
+            func = pop()
+            if isinstance(func, BytecodeFunction):
+                push(execute(func.code, call_args, func.global_scope))
+            elif isinstance(func, Function):
+                push(func.call(call_args))
+            else:
+                raise Exception("not a function")
+        elif op == RETURN_VALUE:
+            return pop()
+        elif op == POP_TOP:
+            pop()
+        elif op >= ADD:
+            if op >= NEG:
+                value = pop()
+                push(-value if op == NEG else not value)
+                continue
+            right = pop()
+            left = pop()
+            if op == ADD:
+                if isinstance(left, str) or isinstance(right, str):
+                    push(str(left) + str(right))
+                else:
+                    push(left + right)
+            elif op == SUB:
+                push(left - right)
+            elif op == EQ:
+                push(left == right)
+            elif op == LT:
+                push(left < right)
+            elif op == MUL:
+                push(left * right)
+            elif op == DIV:
+                push(left / right)
+            elif op == NEQ:
+                push(left != right)
+            elif op == GT:
+                push(left > right)
+            elif op == LEQ:
+                push(left <= right)
+            elif op == GEQ:
+                push(left >= right)
+            elif op == AND:
+                push(left and right)
+            else:
+                push(left or right)
+        elif op == STORE_GLOBAL:
+            global_scope.set(consts[arg], pop())
+        else:
+            raise Exception(f"unknown opcode {op}")
+
+
+class BytecodeCompiler(NodeVisitor[None]):
+    """
+    Visitor that compiles the body of a function into a CodeObject. Implements the NodeVisitor interface.
+    Use compile_function instead of using this class directly.
+
+    Member Variables:
+        code (List[Tuple[int, int]]): the instructions emitted so far
+        consts (List[Value]): the constant pool
+        scopes (List[Dict[str, int]]): the local variables visible at the current position, innermost block last
+        n_locals (int): the number of local slots used so far
+        loops (List[Tuple[int, List[int]]]): for every while loop around the current position the index of its condition
+            and the jumps of its break statements, which are patched once the end of the loop is known
+    """
+    code: List[Tuple[int, int]]
+    consts: List[Value]
+    scopes: List[Dict[str, int]]
+    n_locals: int
+    loops: List[Tuple[int, List[int]]]
+
+    def __init__(self, args: List[FuncArgNode]):
+        """
+        Constructor
+
+        Args:
+            args (List[FuncArgNode]): the arguments of the function, they get the first slots
+        """
+        self.code = []
+        self.consts = []
+        self.scopes = [{}]
+        self.n_locals = 0
+        self.loops = []
+        for arg in args:
+            self.define(arg.name)
+
+    def emit(self, op: int, arg: int = 0) -> int:
+        """
+        Append an instruction
+
+        Args:
+            op (int): the opcode
+            arg (int, optional): the argument. Defaults to 0.
+
+        Returns:
+            int: the position of the instruction, used to patch jumps
+        """
+        self.code.append((op, arg))
+        return len(self.code) - 1
+
+    def patch(self, pos: int, target: int) -> None:
+        """
+        Set the target of the jump at the given position
+
+        Args:
+            pos (int): the position of the jump instruction
+            target (int): the position to jump to
+        """
+        self.code[pos] = (self.code[pos][0], target)
+
+    def const(self, value: Value) -> int:
+        """
+        Get the index of a value in the constant pool, adding it if necessary
+
+        Args:
+            value (Value): the constant
+
+        Returns:
+            int: the index in the constant pool
+        """
+        for i, existing in enumerate(self.consts):
+            # type check, so that 1 and True or 1.0 and 1 don't share an entry
+            if type(existing) is type(value) and existing == value:
+                return i
+        self.consts.append(value)
+        return len(self.consts) - 1
+
+    def define(self, name: str) -> int:
+        """
+        Define a local variable in the innermost block
+
+        Args:
+            name (str): the name of the variable
+
+        Returns:
+            int: the slot of the variable
+
+        Raises:
+            Exception: if the variable is already defined in the same block
+        """
+        if name in self.scopes[-1]:
+            raise Exception(f"variable {name} already defined")
+        slot = self.n_locals
+        self.n_locals += 1
+        self.scopes[-1][name] = slot
+        return slot
+
+    def lookup(self, name: str) -> int | None:
+        """
+        Find the slot of a local variable
+
+        Args:
+            name (str): the name of the variable
+
+        Returns:
+            int | None: the slot or None if the variable is not local
+        """
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def statement(self, node: Node) -> None:
+        """
+        Compile a node used as a statement, discarding the value of expressions
+
+        Args:
+            node (Node): the statement
+        """
+        node.accept(self)
+        if not isinstance(node, (VarDefNode, AssignNode, ReturnNode, BreakNode, ContinueNode, IfNode, whileNode, CodeBlockNode)):
+            self.emit(POP_TOP)
+
+    def visit_two_side_op(self, node: TwoSideOpNode) -> None:
+        if node.sign not in TWO_SIDE_OPS:
+            raise Exception("unknown operator")
+        node.left.accept(self)
+        node.right.accept(self)
+        self.emit(TWO_SIDE_OPS[node.sign])
+
+    def visit_unary_op(self, node: UnaryOpNode) -> None:
+        if node.sign not in UNARY_OPS:
+            raise Exception("unknown operator")
+        node.node.accept(self)
+        self.emit(UNARY_OPS[node.sign])
+
+    def visit_code_block(self, node: CodeBlockNode) -> None:
+        self.scopes.append({})
+        for statement in node.statements:
+            self.statement(statement)
+        self.scopes.pop()
+
+    def visit_if(self, node: IfNode) -> None:
+        conds = [node.condition] + node.elif_conds
+        blocks = [node.then_block] + node.elif_blocks
+        end_jumps = []
+        for cond, block in zip(conds, blocks):
+            cond.accept(self)
+            skip = self.emit(JUMP_IF_FALSE)
+            block.accept(self)
+            end_jumps.append(self.emit(JUMP))
+            self.patch(skip, len(self.code))
+        if node.else_block is not None:
+            node.else_block.accept(self)
+        for jump in end_jumps:
+            self.patch(jump, len(self.code))
+
+    def visit_word(self, node: WordNode) -> None:
+        raise Exception("cannot compile word")
+
+    def visit_string(self, node: StringNode) -> None:
+        self.emit(LOAD_CONST, self.const(node.string))
+
+    def visit_symbol(self, node: SymbolNode) -> None:
+        raise Exception("cannot compile symbol")
+
+    def visit_number(self, node: NumberNode) -> None:
+        self.emit(LOAD_CONST, self.const(node.value))
+
+    def visit_var(self, node: VarNode) -> None:
+        slot = self.lookup(node.name)
+        if slot is None:
+            self.emit(LOAD_GLOBAL, self.const(node.name))
+        else:
+            self.emit(LOAD_LOCAL, slot)
+
+    def visit_var_def(self, node: VarDefNode) -> None:
+        if node.value is None:
+            self.emit(LOAD_CONST, self.const(None))
+        else:
+            # the value is compiled before the variable is defined, so `let a = a` reads the outer a
+            node.value.accept(self)
+        self.emit(STORE_LOCAL, self.define(node.name))
+
+    def visit_assign(self, node: AssignNode) -> None:
+        node.value.accept(self)
+        slot = self.lookup(node.var.name)
+        if slot is None:
+            self.emit(STORE_GLOBAL, self.const(node.var.name))
+        else:
+            self.emit(STORE_LOCAL, slot)
+
+    def visit_func_call(self, node: FuncCallNode) -> None:
+        node.func.accept(self)
+        for arg in node.args:
+            arg.accept(self)
+        self.emit(CALL, len(node.args))
+
+    def visit_while(self, node: whileNode) -> None:
+        start = len(self.code)
+        node.condition.accept(self)
+        exit_jump = self.emit(JUMP_IF_FALSE)
+        self.loops.append((start, []))
+        node.then_block.accept(self)
+        _, break_jumps = self.loops.pop()
+        self.emit(JUMP, start)
+        self.patch(exit_jump, len(self.code))
+        for jump in break_jumps:
+            self.patch(jump, len(self.code))
+
+    def visit_func_arg(self, node: FuncArgNode) -> None:
+        return None
+
+    def visit_function_def(self, node: FunctionDefNode) -> None:
+        raise Exception("cannot compile nested function definitions")
+
+    def visit_code_file(self, node: CodeFileNode) -> None:
+        raise Exception("cannot compile code file, use compile_function for each function")
+
+    def visit_return(self, node: ReturnNode) -> None:
+        if node.value is None:
+            self.emit(LOAD_CONST, self.const(None))
+        else:
+            node.value.accept(self)
+        self.emit(RETURN_VALUE)
+
+    def visit_break(self, node: BreakNode) -> None:
+        if len(self.loops) == 0:
+            raise Exception("break outside of a loop")
+        self.loops[-1][1].append(self.emit(JUMP))
+
+    def visit_continue(self, node: ContinueNode) -> None:
+        if len(self.loops) == 0:
+            raise Exception("continue outside of a loop")
+        self.emit(JUMP, self.loops[-1][0])
+
+
+def compile_function(node: FunctionDefNode) -> CodeObject:
+    """
+    Compile a function definition to bytecode
+
+    Args:
+        node (FunctionDefNode): the function definition
+
+    Returns:
+        CodeObject: the compiled function
+    """
+    compiler = BytecodeCompiler(node.args)
+    node.body.accept(compiler)
+    compiler.emit(LOAD_CONST, compiler.const(None))
+    compiler.emit(RETURN_VALUE)
+    return CodeObject(node.name, len(node.args), compiler.n_locals, compiler.code, compiler.consts)
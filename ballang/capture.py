@@ -2,7 +2,7 @@
 This module contains the functions given as parameters to the Capure objects in the ballang module. They construct the AST from the parsed grammar.
 """
 from typing import Dict, List, TypeVar, cast
-from .node import CodeBlockNode, IfNode, Node, SymbolNode, TwoSideOpNode, UnaryOpNode, VarNode, VarDefNode, AssignNode, FuncCallNode, FunctionDefNode, FuncArgNode, CodeFileNode, ReturnNode, whileNode, WordNode
+from .node import BreakNode, CodeBlockNode, ContinueNode, IfNode, Node, SymbolNode, TwoSideOpNode, UnaryOpNode, VarNode, VarDefNode, AssignNode, FuncCallNode, FunctionDefNode, FuncArgNode, CodeFileNode, ReturnNode, whileNode, WordNode
 
 
 def parse_op(symbol: str, left: Node, right: Node):
@@ -266,3 +266,29 @@ def return_capture(x: Dict[str, Node]) -> Node:
     if "value" in x:
         return ReturnNode(x["value"])
     return ReturnNode()
+
+
+def break_capture(x: Dict[str, Node]) -> Node:
+    """
+    Parse a break statement
+
+    Args:
+        x (Dict[str, Node]): the parsed break statement, empty
+
+    Returns:
+        Node: the parsed break statement
+    """
+    return BreakNode()
+
+
+def continue_capture(x: Dict[str, Node]) -> Node:
+    """
+    Parse a continue statement
+
+    Args:
+        x (Dict[str, Node]): the parsed continue statement, empty
+
+    Returns:
+        Node: the parsed continue statement
+    """
+    return ContinueNode()
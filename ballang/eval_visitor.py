@@ -3,7 +3,7 @@ from __future__ import annotations
 from abc import ABC, abstractmethod
 from typing import Any, Callable, Dict, List, Optional, Union
 
-from .node import CodeBlockNode, CodeFileNode, FuncArgNode, FuncCallNode, FunctionDefNode, IfNode, NodeVisitor, ReturnNode, SymbolNode, TwoSideOpNode, UnaryOpNode, WordNode, NumberNode, VarNode, VarDefNode, AssignNode, StringNode, whileNode
+from .node import BreakNode, CodeBlockNode, ContinueNode, CodeFileNode, FuncArgNode, FuncCallNode, FunctionDefNode, IfNode, NodeVisitor, ReturnNode, SymbolNode, TwoSideOpNode, UnaryOpNode, WordNode, NumberNode, VarNode, VarDefNode, AssignNode, StringNode, whileNode
 
 
 class Function(ABC):
@@ -70,14 +70,17 @@ class BallangFunction(Function):
         args (List[FuncArgNode]): the arguments
         body (CodeBlockNode): the body of the function
         global_scope (Scope): the global scope the function was defined in
+        n_slots (Optional[int]): the frame size if the function was resolved (see resolver.py), None to use Scope dicts
     """
     args: List[FuncArgNode]
     body: CodeBlockNode
     global_scope: Scope
-    def __init__(self, args: List[FuncArgNode], body: CodeBlockNode, global_scope: Scope):
+    n_slots: Optional[int]
+    def __init__(self, args: List[FuncArgNode], body: CodeBlockNode, global_scope: Scope, n_slots: Optional[int] = None):
         self.args = args
         self.body = body
         self.global_scope = global_scope
+        self.n_slots = n_slots
     
     def call(self, args: List[Value]) -> Value:
         """
@@ -91,6 +94,18 @@ class BallangFunction(Function):
         """
         if len(args) != len(self.args):
             raise Exception("wrong number of arguments")
+
+        if self.n_slots is not None:
+            for arg in args:
+                if arg is None:
+                    raise Exception("cannot pass None as argument")
+            # the arguments are in the first slots of the frame
+            frame = list(args)
+            frame.extend([None] * (self.n_slots - len(args)))
+            completion = self.body.accept(EvalVisitor(self.global_scope, frame))
+            if isinstance(completion, Completion):
+                return completion.value
+            return None
         
         # create a new scope for the function for local variables
         local_scope = self.global_scope.create_child({})
@@ -101,27 +116,44 @@ class BallangFunction(Function):
                 raise Exception("cannot pass None as argument")
             local_scope.define(arg.name, args[i])
         
-        # using try-except to catch the return statement
-        try:
-            # run the body of the function using the visitor pattern
-            self.body.accept(EvalVisitor(local_scope))
-        except ReturnException as e:
-            return e.value
+        # run the body of the function using the visitor pattern, a return statement ends it with a Completion
+        completion = self.body.accept(EvalVisitor(local_scope))
+        if isinstance(completion, Completion):
+            return completion.value
         return None
     def __str__(self) -> str:
         return f"BallangFunction({self.args}, {self.body})"
 
-class ReturnException(Exception):
+class Completion:
     """
-    Exception to be thrown when a return statement is encountered. Used to break out of the visitor pattern
+    Signal returned by the statements that end a block early (return, break and continue). Blocks stop at a Completion
+    and pass it on to the enclosing statement, until it reaches the while loop or function that handles it.
+    This is a lot cheaper than raising an exception. Statements that complete normally return None instead.
 
     Member Variables:
-        value (Value): the value to return
+        kind (str): "return", "break" or "continue"
+        value (Value): the value to return, None for break and continue
     """
+    kind: str
     value: Value
-    def __init__(self, value: Value):
+    def __init__(self, kind: str, value: Value = None):
+        """
+        Constructor
+
+        Args:
+            kind (str): "return", "break" or "continue"
+            value (Value, optional): the value to return. Defaults to None.
+        """
+        self.kind = kind
         self.value = value
 
+    def __repr__(self) -> str:
+        return f"Completion({self.kind}, {self.value})"
+
+# break and continue carry no value, so the same object can be used every time
+BREAK = Completion("break")
+CONTINUE = Completion("continue")
+
 # Value represents the types that the visitor expects. Others might work but are not guaranteed. 
 # I also use Vec as a type in the pinball code
 Value = Union[int, float, str, bool, Function, None]
@@ -150,6 +182,18 @@ class Scope:
         self.variables = variables
         self.parent = parent
     
+    def names(self) -> List[str]:
+        """
+        Get the names of all variables defined in this scope or any parent scope
+
+        Returns:
+            List[str]: the names
+        """
+        names = list(self.variables.keys())
+        if self.parent is not None:
+            names.extend(self.parent.names())
+        return names
+
     def contains(self, name: str) -> bool:
         """
         Check if a variable with the given name is defined in this scope or any parent scope
@@ -233,34 +277,42 @@ class Scope:
     def __str__(self) -> str:
         return f"Scope({self.variables}, parent={self.parent})"
 
-class EvalVisitor(NodeVisitor[Value]):
+class EvalVisitor(NodeVisitor[Union[Value, Completion]]):
     """
-    Visitor that walks the tree and evaluates it. Implements the NodeVisitor interface
+    Visitor that walks the tree and evaluates it. Implements the NodeVisitor interface.
+    Expressions return their value, statements return None or a Completion if they end the enclosing block early.
 
     Member Variables:
         scope (Scope): the current scope
+        frame (Optional[List[Value]]): the local variables of a resolved function by slot, None if the tree wasn't resolved
     """
     scope: Scope
+    frame: Optional[List[Value]]
     
-    def __init__(self, scope: Optional[Scope] = None):
+    def __init__(self, scope: Optional[Scope] = None, frame: Optional[List[Value]] = None):
         """
         Constructor
 
         Args:
             scope (Optional[Scope], optional): the initial scope. Defaults to None.
+            frame (Optional[List[Value]], optional): the frame of a resolved function. Defaults to None.
         """
 
         if scope is None:
             scope = Scope({})
         self.scope = scope
+        self.frame = frame
     
     def increase_scope(self) -> EvalVisitor:
         """
         Create a new EvalVisitor with a child scope of the current scope. Used to create a new scope for a code block (if, while, function body)
+        In a resolved function every variable already has its own slot, so the same visitor is reused.
 
         Returns:
             EvalVisitor: the new EvalVisitor
         """
+        if self.frame is not None:
+            return self
         return EvalVisitor(self.scope.create_child({}))
 
     def visit_two_side_op(self, node: TwoSideOpNode) -> Value:
@@ -336,7 +388,7 @@ class EvalVisitor(NodeVisitor[Value]):
             return not value
         raise Exception("unknown operator")
     
-    def visit_code_block(self, node: CodeBlockNode) -> Value:
+    def visit_code_block(self, node: CodeBlockNode) -> Optional[Completion]:
         """
         Visit a code block node ({ ... })
 
@@ -344,15 +396,18 @@ class EvalVisitor(NodeVisitor[Value]):
             node (CodeBlockNode): the node to visit
 
         Returns:
-            Value: None
+            Optional[Completion]: the Completion of the statement that ended the block early, None otherwise
         """
 
         inner_scope = self.increase_scope()
         for statement in node.statements:
-            statement.accept(inner_scope)
+            # expression statements return their value, which is discarded
+            completion = statement.accept(inner_scope)
+            if isinstance(completion, Completion):
+                return completion
         return None
     
-    def visit_if(self, node: IfNode) -> Value:
+    def visit_if(self, node: IfNode) -> Optional[Completion]:
         """
         Evaluate an if statement
 
@@ -360,17 +415,15 @@ class EvalVisitor(NodeVisitor[Value]):
             node (IfNode): the node to visit
 
         Returns:
-            Value: None
+            Optional[Completion]: the Completion of the executed block
         """
         if node.condition.accept(self):
-            node.then_block.accept(self)
-            return None
+            return node.then_block.accept(self)
         for cond, block in zip(node.elif_conds, node.elif_blocks):
             if cond.accept(self):
-                block.accept(self)
-                return None
+                return block.accept(self)
         if node.else_block is not None:
-            node.else_block.accept(self)
+            return node.else_block.accept(self)
         return None
     
     def visit_word(self, node: WordNode) -> Value:
@@ -425,6 +478,8 @@ class EvalVisitor(NodeVisitor[Value]):
         Raises:
             Exception: if the variable is not defined
         """
+        if node.slot is not None and self.frame is not None:
+            return self.frame[node.slot]
         return self.scope.get(node.name)
     
     def visit_var_def(self, node: VarDefNode) -> Value:
@@ -437,10 +492,11 @@ class EvalVisitor(NodeVisitor[Value]):
         Returns:
             Value: None
         """
-        if node.value is None:
-            self.scope.define(node.name, None)
+        value = None if node.value is None else node.value.accept(self)
+        if node.slot is not None and self.frame is not None:
+            self.frame[node.slot] = value
             return None
-        self.scope.define(node.name, node.value.accept(self))
+        self.scope.define(node.name, value)
         #print(f"defined {node.name}, scope: {self.scope}")
         return None
     
@@ -454,7 +510,11 @@ class EvalVisitor(NodeVisitor[Value]):
         Returns:
             Value: None
         """
-        self.scope.set(node.var.name, node.value.accept(self))
+        value = node.value.accept(self)
+        if node.var.slot is not None and self.frame is not None:
+            self.frame[node.var.slot] = value
+            return None
+        self.scope.set(node.var.name, value)
         return None
     
     def visit_func_call(self, node: FuncCallNode) -> Value:
@@ -467,7 +527,7 @@ class EvalVisitor(NodeVisitor[Value]):
         Returns:
             Value: the return value of the function
         """
-        func = self.scope.get(node.func.name)
+        func = self.visit_var(node.func)
         if not isinstance(func, Function):
             raise Exception("not a function")
         # evaluate the arguments
@@ -487,18 +547,24 @@ class EvalVisitor(NodeVisitor[Value]):
         """
         return node.string
     
-    def visit_while(self, node: whileNode) -> Value:
+    def visit_while(self, node: whileNode) -> Optional[Completion]:
         """
         Evaluate a while loop. Executes the condition and then the body as long as the condition is true
+        or until the body is ended by a break
 
         Args:
             node (whileNode): the node to visit
 
         Returns:
-            Value: None
+            Optional[Completion]: the Completion of a return statement in the body, None otherwise
         """
         while node.condition.accept(self):
-            node.then_block.accept(self)
+            completion = node.then_block.accept(self)
+            if completion is not None:
+                if completion is BREAK:
+                    break
+                if completion is not CONTINUE:
+                    return completion
         return None
     
     def visit_func_arg(self, node: FuncArgNode) -> Value:
@@ -514,7 +580,7 @@ class EvalVisitor(NodeVisitor[Value]):
         Returns:
             Value: None
         """
-        self.scope.define(node.name, BallangFunction(node.args, node.body, self.scope))
+        self.scope.define(node.name, BallangFunction(node.args, node.body, self.scope, node.n_slots))
         return None
 
     def visit_code_file(self, node: CodeFileNode) -> Value:
@@ -534,16 +600,40 @@ class EvalVisitor(NodeVisitor[Value]):
         #if not isinstance(func, Function):
         #    raise Exception("not a function")
         #return func.call([])
-    def visit_return(self, node: ReturnNode) -> Value:
+    def visit_return(self, node: ReturnNode) -> Completion:
         """
-        Return a value from a function by throwing a ReturnException
+        Return a value from a function
 
         Args:
             node (ReturnNode): the node to visit
 
-        Raises:
-            ReturnException: always, with the value of the return statement
+        Returns:
+            Completion: the return Completion with the value of the return statement
         """
         if node.value is None:
-            raise ReturnException(None)
-        raise ReturnException(node.value.accept(self))
+            return Completion("return")
+        return Completion("return", node.value.accept(self))
+
+    def visit_break(self, node: BreakNode) -> Completion:
+        """
+        Leave the innermost while loop
+
+        Args:
+            node (BreakNode): the node to visit
+
+        Returns:
+            Completion: BREAK
+        """
+        return BREAK
+
+    def visit_continue(self, node: ContinueNode) -> Completion:
+        """
+        Jump to the condition of the innermost while loop
+
+        Args:
+            node (ContinueNode): the node to visit
+
+        Returns:
+            Completion: CONTINUE
+        """
+        return CONTINUE
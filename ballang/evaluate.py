@@ -1,10 +1,52 @@
-from typing import Dict
+from typing import Dict, Iterable, Optional
 from .ballang import parse
+from .bytecode import BytecodeFunction, compile_function
 from .eval_visitor import EvalVisitor, Function, PythonFunction, Scope, Value
 from .node import CodeFileNode
+from .optimizer import optimize_file
+from .resolver import resolve_file
+from .transpile import transpile_function
 
+# the available execution backends:
+# - "eval": walk the syntax tree using the EvalVisitor
+# - "bytecode": compile each function to bytecode and run it in the stack vm (see bytecode.py)
+# - "python": translate each function to python source and compile it (see transpile.py)
+BACKENDS = ["eval", "bytecode", "python"]
 
-def get_ballang_function(file: str, entry_function: str) -> Function:
+
+def define_functions(parsed: CodeFileNode, global_scope: Scope, backend: str = "eval", host_names: Optional[Iterable[str]] = None, optimize: bool = True) -> None:
+    """
+    Define all functions of a parsed file in the given scope. The file is optimized (see optimizer.py) and the variables of
+    the functions are resolved (see resolver.py) first
+
+    Args:
+        parsed (CodeFileNode): the parsed file
+        global_scope (Scope): the scope to define the functions in
+        backend (str, optional): the backend used to run the functions, one of BACKENDS. Defaults to "eval".
+        host_names (Optional[Iterable[str]], optional): the names of the host functions, if given using any other undefined
+            name is an error. Defaults to None.
+        optimize (bool, optional): run the optimizer. Defaults to True.
+
+    Raises:
+        Exception: if the backend is not known or a variable is not defined
+    """
+    if optimize:
+        parsed = optimize_file(parsed)
+    resolve_file(parsed, host_names)
+    if backend == "eval":
+        for function_def in parsed.functions.values():
+            function_def.accept(EvalVisitor(global_scope))
+    elif backend == "bytecode":
+        for function_def in parsed.functions.values():
+            global_scope.define(function_def.name, BytecodeFunction(compile_function(function_def), global_scope))
+    elif backend == "python":
+        for function_def in parsed.functions.values():
+            global_scope.define(function_def.name, transpile_function(function_def, global_scope))
+    else:
+        raise Exception(f"unknown backend {backend}, expected one of {BACKENDS}")
+
+
+def get_ballang_function(file: str, entry_function: str, backend: str = "eval") -> Function:
     """
     Parse the given file and return the function with the given name
     """
@@ -13,8 +55,7 @@ def get_ballang_function(file: str, entry_function: str) -> Function:
     print_fn = PythonFunction(lambda args: print(*args))
     global_scope = Scope({"print": print_fn})
     
-    for function_def in parsed.functions.values():
-        function_def.accept(EvalVisitor(global_scope))
+    define_functions(parsed, global_scope, backend, global_scope.names())
     
     if entry_function is None:
         return None
@@ -23,7 +64,7 @@ def get_ballang_function(file: str, entry_function: str) -> Function:
         raise Exception("entry function not found")
     assert isinstance(func, Function)
     return func
-def parse_file(file: str, global_functions: dict) -> Scope:
+def parse_file(file: str, global_functions: dict, backend: str = "eval") -> Scope:
     """
     Parse the given file and return the global scope (with the global functions added to it)
     """
@@ -33,8 +74,7 @@ def parse_file(file: str, global_functions: dict) -> Scope:
     global_scope = Scope(fns)
     parsed = parse(file)
     assert isinstance(parsed, CodeFileNode)
-    for function_def in parsed.functions.values():
-        function_def.accept(EvalVisitor(global_scope))
+    define_functions(parsed, global_scope, backend, global_functions.keys())
     return global_scope
 
 def evaluate(file: str, entry_function: str):
@@ -68,24 +108,24 @@ if __name__ == "__main__":
         return fib(n-1) + fib(n-2);
     }
     """
-    ball_fib = get_ballang_function(file, "fib")
     n = 30
     # measure time
     import time
-    if True:
-        start = time.time()
-        result = ball_fib(n)
-        print(result)
-        end = time.time()
-        ball_duration = end - start
-        print(f"ballang fib({n}) took {ball_duration} seconds")
-    # measure time
     start = time.time()
     result = fib(n)
     print(result)
     end = time.time()
     python_duration = end - start
     print(f"python fib({n}) took {python_duration} seconds")
-    print(f"python is {ball_duration / python_duration} times faster")
-    print(f"fib({n}) used {i} function calls, that is {i / ball_duration} calls per second")
-
+    n_calls = i
+    print(f"fib({n}) uses {n_calls} function calls")
+    for backend in BACKENDS:
+        ball_fib = get_ballang_function(file, "fib", backend)
+        start = time.time()
+        result = ball_fib(n)
+        print(result)
+        end = time.time()
+        ball_duration = end - start
+        print(f"ballang ({backend}) fib({n}) took {ball_duration} seconds")
+        print(f"python is {ball_duration / python_duration} times faster than the {backend} backend")
+        print(f"that is {n_calls / ball_duration} calls per second")
@@ -110,12 +110,12 @@ class UnaryOpNode(Node):
 
 class NumberNode(Node):
     """
-    Represents a node that holds a numeric value.
+    Represents a node that holds a numeric value. The optimizer also stores folded comparisons (bools) in it.
     """
 
-    value: float
+    value: float | bool
 
-    def __init__(self, value: float):
+    def __init__(self, value: float | bool):
         self.value = value
     
     def accept(self, visitor: NodeVisitor[T]) -> T:
@@ -168,11 +168,15 @@ class VarNode(Node):
 
     Attributes:
         name (str): the name of the variable
+        slot (Optional[int]): the slot of the variable in the frame of the function, set by the resolver.
+            None if the variable is global or the tree hasn't been resolved
     """
     name: str
+    slot: Optional[int]
 
     def __init__(self, name: str):
         self.name = name
+        self.slot = None
 
     def accept(self, visitor: NodeVisitor[T]) -> T:
         return visitor.visit_var(self)
@@ -239,13 +243,16 @@ class VarDefNode(Node):
     Attributes:
         name (str): the name of the variable
         value (Optional[Node]): the value to assign to the variable
+        slot (Optional[int]): the slot of the variable in the frame of the function, set by the resolver
     """
     name: str
     value: Optional[Node]
+    slot: Optional[int]
 
     def __init__(self, name: str, value: Optional[Node] = None):
         self.name = name
         self.value = value
+        self.slot = None
     
     def accept(self, visitor: NodeVisitor[T]) -> T:
         return visitor.visit_var_def(self)
@@ -319,6 +326,19 @@ class ReturnNode(Node):
     
     def accept(self, visitor: NodeVisitor[T]) -> T:
         return visitor.visit_return(self)
+class BreakNode(Node):
+    """
+    Represents a node in the abstract syntax tree that holds a break statement, which leaves the innermost while loop.
+    """
+    def accept(self, visitor: NodeVisitor[T]) -> T:
+        return visitor.visit_break(self)
+class ContinueNode(Node):
+    """
+    Represents a node in the abstract syntax tree that holds a continue statement, which jumps to the condition of the
+    innermost while loop.
+    """
+    def accept(self, visitor: NodeVisitor[T]) -> T:
+        return visitor.visit_continue(self)
 class FunctionDefNode(Node):
     """
     Represents a node in the abstract syntax tree that holds a function definition.
@@ -327,15 +347,18 @@ class FunctionDefNode(Node):
         name (str): the name of the function
         body (CodeBlockNode): the body of the function
         args (List[FuncArgNode]): the arguments of the function
+        n_slots (Optional[int]): the size of the frame (arguments and local variables), set by the resolver
     """
     name: str
     body: CodeBlockNode
     args: List[FuncArgNode]
+    n_slots: Optional[int]
 
     def __init__(self, name: str, body: CodeBlockNode, args: List[FuncArgNode]):
         self.name = name
         self.body = body
         self.args = args
+        self.n_slots = None
     
     def accept(self, visitor: NodeVisitor[T]) -> T:
         return visitor.visit_function_def(self)
@@ -428,4 +451,12 @@ class NodeVisitor(Generic[T], ABC):
 
     @abstractmethod
     def visit_return(self, node: ReturnNode) -> T:
+        pass
+
+    @abstractmethod
+    def visit_break(self, node: BreakNode) -> T:
+        pass
+
+    @abstractmethod
+    def visit_continue(self, node: ContinueNode) -> T:
         pass
\ No newline at end of file
@@ -0,0 +1,365 @@
+"""
+Optimization pass for Ballang syntax trees.
+
+Ballang has no boolean literals, so scripts use idioms like `1==0` and `1==1`, and constant arithmetic is common too.
+The Optimizer folds operators whose operands are constants, removes if/elif/else branches and while loops whose condition
+is constant and removes let variables which are never read. The result is a new tree, the input tree is not changed.
+
+Folding only happens where the result is exactly what the EvalVisitor would compute, operations which would fail at runtime
+(division by zero, comparing strings, ...) are left in the tree, so they still fail at the same point.
+Folded comparisons produce a NumberNode holding a bool.
+"""
+from __future__ import annotations
+from typing import Dict, List, Optional, Set
+
+from .node import AssignNode, BreakNode, CodeBlockNode, ContinueNode, CodeFileNode, FuncArgNode, FuncCallNode, FunctionDefNode, IfNode, Node, NodeVisitor, NumberNode, ReturnNode, StringNode, SymbolNode, TwoSideOpNode, UnaryOpNode, VarDefNode, VarNode, WordNode, whileNode
+from .tostring_visitor import ToStringVisitor
+
+# if True, the optimized tree of every file is printed (using the ToStringVisitor) before it is run
+dump_optimized = False
+
+
+def is_constant(node: Node) -> bool:
+    """
+    Check if a node is a constant the optimizer can compute with
+
+    Args:
+        node (Node): the node
+
+    Returns:
+        bool: True if the node is a NumberNode or a StringNode
+    """
+    return isinstance(node, (NumberNode, StringNode))
+
+
+def constant_value(node: Node) -> float | bool | str:
+    """
+    Get the value of a constant node
+
+    Args:
+        node (Node): a node for which is_constant returns True
+
+    Returns:
+        float | bool | str: the value
+    """
+    if isinstance(node, StringNode):
+        return node.string
+    assert isinstance(node, NumberNode)
+    return node.value
+
+
+def fold_two_side_op(sign: str, left: float | bool | str, right: float | bool | str) -> Optional[Node]:
+    """
+    Compute an operator on two constants the same way the EvalVisitor does
+
+    Args:
+        sign (str): the operator
+        left (float | bool | str): the left operand
+        right (float | bool | str): the right operand
+
+    Returns:
+        Optional[Node]: the result as a constant node, None if the operation has to be left to runtime
+    """
+    if sign == "+" and (isinstance(left, str) or isinstance(right, str)):
+        return StringNode(str(left) + str(right))
+    if isinstance(left, str) or isinstance(right, str):
+        return None
+    if sign == "+":
+        return NumberNode(left + right)
+    if sign == "-":
+        return NumberNode(left - right)
+    if sign == "*":
+        return NumberNode(left * right)
+    if sign == "/":
+        if right == 0:
+            return None
+        return NumberNode(left / right)
+    if sign == "==":
+        return NumberNode(left == right)
+    if sign == "!=":
+        return NumberNode(left != right)
+    if sign == "<=":
+        return NumberNode(left <= right)
+    if sign == ">=":
+        return NumberNode(left >= right)
+    if sign == "<":
+        return NumberNode(left < right)
+    if sign == ">":
+        return NumberNode(left > right)
+    if sign == "&&":
+        return NumberNode(left and right)
+    if sign == "||":
+        return NumberNode(left or right)
+    return None
+
+
+class Optimizer(NodeVisitor[Node]):
+    """
+    Visitor that returns an optimized copy of a function. Implements the NodeVisitor interface.
+    Use optimize_function instead of using this class directly.
+
+    Member Variables:
+        unused (Set[int]): ids of VarDefNodes and AssignNodes that should be removed, found by the previous pass
+        scopes (List[Dict[str, Optional[VarDefNode]]]): the let variables visible at the current position, innermost block last.
+            Arguments map to None, they are never removed
+        reads (Dict[int, int]): how often the variable of a VarDefNode (by id) is read
+        assigns (Dict[int, List[AssignNode]]): the assignments to the variable of a VarDefNode (by id)
+        defs (List[VarDefNode]): all let statements of the function
+    """
+    unused: Set[int]
+    scopes: List[Dict[str, Optional[VarDefNode]]]
+    reads: Dict[int, int]
+    assigns: Dict[int, List[AssignNode]]
+    defs: List[VarDefNode]
+
+    def __init__(self, args: List[FuncArgNode], unused: Set[int]):
+        """
+        Constructor
+
+        Args:
+            args (List[FuncArgNode]): the arguments of the function
+            unused (Set[int]): ids of the statements to remove
+        """
+        self.unused = unused
+        self.scopes = [{arg.name: None for arg in args}]
+        self.reads = {}
+        self.assigns = {}
+        self.defs = []
+
+    def lookup(self, name: str) -> Optional[VarDefNode]:
+        """
+        Find the let statement that defined a local variable
+
+        Args:
+            name (str): the name of the variable
+
+        Returns:
+            Optional[VarDefNode]: the definition, None for arguments and globals
+        """
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def is_pure(self, node: Node) -> bool:
+        """
+        Check if evaluating a node can neither have side effects nor raise an error.
+        Such nodes can be removed if their value is not needed. Operators are never pure: the nodes passed here are already
+        optimized, so an operator that is left in the tree either could not be folded or has operands of unknown type.
+
+        Args:
+            node (Node): the expression
+
+        Returns:
+            bool: True if the node can be removed safely
+        """
+        if is_constant(node):
+            return True
+        if isinstance(node, VarNode):
+            return any(node.name in scope for scope in self.scopes)
+        return False
+
+    def discard(self, node: Node) -> List[Node]:
+        """
+        Get the statements needed to evaluate an expression whose value is not used.
+        Pure expressions are dropped without visiting them, so the variables they read can become unused too. Other expressions
+        are kept as a statement, so errors they raise are not lost.
+
+        Args:
+            node (Node): the expression (not optimized yet)
+
+        Returns:
+            List[Node]: the optimized expression as a statement, or nothing if it is pure
+        """
+        if self.is_pure(node):
+            return []
+        return [node.accept(self)]
+
+    def statements(self, statements: List[Node]) -> List[Node]:
+        """
+        Optimize a list of statements, statements that end up as blocks without variables are inlined
+
+        Args:
+            statements (List[Node]): the statements
+
+        Returns:
+            List[Node]: the optimized statements
+        """
+        result: List[Node] = []
+        for statement in statements:
+            if id(statement) in self.unused:
+                value = statement.value
+                if value is not None:
+                    result.extend(self.discard(value))
+                continue
+            optimized = statement.accept(self)
+            if isinstance(optimized, CodeBlockNode) and not any(isinstance(s, VarDefNode) for s in optimized.statements):
+                result.extend(optimized.statements)
+            else:
+                result.append(optimized)
+        return result
+
+    def visit_two_side_op(self, node: TwoSideOpNode) -> Node:
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if is_constant(left) and is_constant(right):
+            folded = fold_two_side_op(node.sign, constant_value(left), constant_value(right))
+            if folded is not None:
+                return folded
+        return TwoSideOpNode(node.sign, left, right)
+
+    def visit_unary_op(self, node: UnaryOpNode) -> Node:
+        value = node.node.accept(self)
+        if isinstance(value, NumberNode):
+            if node.sign == "-":
+                return NumberNode(-value.value)
+            if node.sign == "!":
+                return NumberNode(not value.value)
+        return UnaryOpNode(node.sign, value)
+
+    def visit_code_block(self, node: CodeBlockNode) -> Node:
+        self.scopes.append({})
+        statements = self.statements(node.statements)
+        self.scopes.pop()
+        return CodeBlockNode(statements)
+
+    def visit_if(self, node: IfNode) -> Node:
+        conds: List[Node] = []
+        blocks: List[CodeBlockNode] = []
+        else_block = node.else_block
+        for cond, block in zip([node.condition] + node.elif_conds, [node.then_block] + node.elif_blocks):
+            cond = cond.accept(self)
+            if is_constant(cond):
+                if not constant_value(cond):
+                    # the branch is never taken
+                    continue
+                # the branch is always taken if it is reached, the branches after it are dead
+                else_block = block
+                break
+            conds.append(cond)
+            blocks.append(block)
+        optimized_blocks = [block.accept(self) for block in blocks]
+        optimized_else = None if else_block is None else else_block.accept(self)
+        if len(conds) == 0:
+            return CodeBlockNode([]) if optimized_else is None else optimized_else
+        return IfNode(conds[0], optimized_blocks[0], conds[1:], optimized_blocks[1:], optimized_else)  # type: ignore
+
+    def visit_word(self, node: WordNode) -> Node:
+        return node
+
+    def visit_string(self, node: StringNode) -> Node:
+        return node
+
+    def visit_symbol(self, node: SymbolNode) -> Node:
+        return node
+
+    def visit_number(self, node: NumberNode) -> Node:
+        return node
+
+    def visit_var(self, node: VarNode) -> Node:
+        definition = self.lookup(node.name)
+        if definition is not None:
+            self.reads[id(definition)] += 1
+        return VarNode(node.name)
+
+    def visit_var_def(self, node: VarDefNode) -> Node:
+        # the value is optimized before the variable is defined, so `let a = a` reads the outer a
+        value = None if node.value is None else node.value.accept(self)
+        optimized = VarDefNode(node.name, value)
+        self.scopes[-1][node.name] = optimized
+        self.reads[id(optimized)] = 0
+        self.assigns[id(optimized)] = []
+        self.defs.append(optimized)
+        return optimized
+
+    def visit_assign(self, node: AssignNode) -> Node:
+        value = node.value.accept(self)
+        optimized = AssignNode(VarNode(node.var.name), value)
+        definition = self.lookup(node.var.name)
+        if definition is not None:
+            self.assigns[id(definition)].append(optimized)
+        return optimized
+
+    def visit_func_call(self, node: FuncCallNode) -> Node:
+        func = node.func.accept(self)
+        assert isinstance(func, VarNode)
+        return FuncCallNode(func, [arg.accept(self) for arg in node.args])
+
+    def visit_while(self, node: whileNode) -> Node:
+        condition = node.condition.accept(self)
+        if is_constant(condition) and not constant_value(condition):
+            return CodeBlockNode([])
+        then_block = node.then_block.accept(self)
+        assert isinstance(then_block, CodeBlockNode)
+        return whileNode(condition, then_block)
+
+    def visit_func_arg(self, node: FuncArgNode) -> Node:
+        return node
+
+    def visit_function_def(self, node: FunctionDefNode) -> Node:
+        raise Exception("cannot optimize nested function definitions")
+
+    def visit_code_file(self, node: CodeFileNode) -> Node:
+        raise Exception("cannot optimize code file, use optimize_file")
+
+    def visit_return(self, node: ReturnNode) -> Node:
+        return ReturnNode(None if node.value is None else node.value.accept(self))
+
+    def visit_break(self, node: BreakNode) -> Node:
+        return node
+
+    def visit_continue(self, node: ContinueNode) -> Node:
+        return node
+
+    def unused_statements(self) -> Set[int]:
+        """
+        Get the let statements whose variable is never read, together with all assignments to these variables
+
+        Returns:
+            Set[int]: ids of the statements in the optimized tree
+        """
+        unused: Set[int] = set()
+        for definition in self.defs:
+            if self.reads[id(definition)] == 0:
+                unused.add(id(definition))
+                unused.update(id(assign) for assign in self.assigns[id(definition)])
+        return unused
+
+
+def optimize_function(node: FunctionDefNode) -> FunctionDefNode:
+    """
+    Optimize a function definition. The pass is repeated until no more variables can be removed,
+    because removing a variable can make the variables it was computed from unused.
+
+    Args:
+        node (FunctionDefNode): the function definition
+
+    Returns:
+        FunctionDefNode: the optimized copy
+    """
+    unused: Set[int] = set()
+    while True:
+        optimizer = Optimizer(node.args, unused)
+        body = node.body.accept(optimizer)
+        assert isinstance(body, CodeBlockNode)
+        node = FunctionDefNode(node.name, body, node.args)
+        unused = optimizer.unused_statements()
+        if len(unused) == 0:
+            return node
+
+
+def optimize_file(node: CodeFileNode, dump: bool = False) -> CodeFileNode:
+    """
+    Optimize all functions of a file
+
+    Args:
+        node (CodeFileNode): the file
+        dump (bool, optional): print the optimized tree. Defaults to False, dump_optimized also enables it.
+
+    Returns:
+        CodeFileNode: the optimized copy
+    """
+    optimized = CodeFileNode([optimize_function(function_def) for function_def in node.functions.values()])
+    if dump or dump_optimized:
+        print(optimized.accept(ToStringVisitor()))
+    return optimized
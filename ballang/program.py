@@ -0,0 +1,254 @@
+"""
+Compile-once cache for Ballang files.
+
+Parsing a file (lexing, grammar and the definition pass of the EvalVisitor) is by far the most expensive part of running
+a short hook like on_update. A CompiledProgram does all of that exactly once. Calling it afterwards only exchanges the
+host (python) functions the code can see, so the same program can be run every frame with a different game state.
+
+Parsed files are also stored on disk (see parse_cached), so a new process (a restart or the collision process) can load
+the syntax tree with pickle instead of parsing the file again.
+"""
+from __future__ import annotations
+import glob
+import hashlib
+import os
+import pickle
+import sys
+from typing import Callable, Dict, Optional, Set, Tuple
+
+from .ballang import parse
+from .evaluate import define_functions
+from .eval_visitor import Function, PythonFunction, Scope, Value
+from .node import CodeFileNode
+
+
+def wrap_function(fn: Callable) -> Callable[[list], Value]:
+    """
+    Wrap a python function taking positional arguments so that it can be called with the argument list of a PythonFunction
+
+    Args:
+        fn (Callable): the python function
+
+    Returns:
+        Callable[[list], Value]: the wrapped function
+    """
+    def wrapped(args: list) -> Value:
+        return fn(*args)
+    return wrapped
+
+
+class CompiledProgram:
+    """
+    A parsed Ballang file with all of its functions already defined.
+
+    The functions are defined in a scope whose parent holds the host functions. Binding new host functions only replaces the
+    variables of that parent scope, the syntax tree and the BallangFunction objects are reused.
+
+    Member Variables:
+        parsed (CodeFileNode): the syntax tree of the file
+        backend (str): the backend the functions are run with (see evaluate.BACKENDS)
+        host_scope (Scope): the scope holding the host functions, replaced by bind
+        global_scope (Scope): the scope holding the functions defined in the file
+    """
+    parsed: CodeFileNode
+    backend: str
+    host_scope: Scope
+    global_scope: Scope
+
+    def __init__(self, parsed: CodeFileNode, backend: str = "eval"):
+        """
+        Constructor, runs the definition pass over the file
+
+        Args:
+            parsed (CodeFileNode): the syntax tree of the file
+            backend (str, optional): the backend to run the functions with. Defaults to "eval".
+        """
+        self.parsed = parsed
+        self.backend = backend
+        self.host_scope = Scope({})
+        self.global_scope = self.host_scope.create_child({})
+        define_functions(parsed, self.global_scope, backend)
+
+    def bind(self, global_functions: Dict[str, Callable]) -> Scope:
+        """
+        Make the given python functions visible to the code of the program
+
+        Args:
+            global_functions (Dict[str, Callable]): the host functions by name
+
+        Returns:
+            Scope: the global scope of the program, functions can be looked up using get
+        """
+        fns: Dict[str, Value] = {}
+        for name, curr_fn in global_functions.items():
+            fns[name] = PythonFunction(wrap_function(curr_fn), name)
+        self.host_scope.variables = fns
+        return self.global_scope
+
+    def get_function(self, name: str) -> Function:
+        """
+        Get a function defined in the file
+
+        Args:
+            name (str): the name of the function
+
+        Returns:
+            Function: the function
+
+        Raises:
+            Exception: if the file does not define a function with that name
+        """
+        if name not in self.global_scope.variables:
+            raise Exception(f"function {name} not found")
+        func = self.global_scope.variables[name]
+        assert isinstance(func, Function)
+        return func
+
+
+# directory the parsed files are cached in, None disables the disk cache
+cache_dir: Optional[str] = os.path.join(os.path.dirname(os.path.abspath(__file__)), "__ballcache__")
+
+# hash of the python version and the source of the interpreter, computed by interpreter_version
+_interpreter_version: Optional[str] = None
+
+# the kinds of cache problems ("read", "write") that were reported already, each kind is only printed once per process
+_reported_cache_problems: Set[str] = set()
+# the number of characters of the interpreter version every cache file name starts with
+version_prefix_length = 16
+# whether the cache entries of other interpreter versions were removed already, this is done once per process
+_removed_stale_entries = False
+
+
+def interpreter_version() -> str:
+    """
+    Get a hash identifying the interpreter. It changes whenever a file of the ballang package (lexer, grammar, nodes, ...)
+    or the python version changes, so cached syntax trees of an older interpreter are never loaded.
+
+    Returns:
+        str: the hash
+    """
+    global _interpreter_version
+    if _interpreter_version is None:
+        version = hashlib.sha256(sys.version.encode())
+        package_dir = os.path.dirname(os.path.abspath(__file__))
+        for path in sorted(glob.glob(os.path.join(package_dir, "**", "*.py"), recursive=True)):
+            version.update(os.path.relpath(path, package_dir).encode())
+            with open(path, "rb") as f:
+                version.update(f.read())
+        _interpreter_version = version.hexdigest()
+    return _interpreter_version
+
+
+def report_cache_problem(kind: str, message: str) -> None:
+    """
+    Print a problem with the disk cache, but only the first problem of each kind, so a broken or unwritable cache doesn't
+    print a message on every load. The cache is never needed for correctness, the file is just parsed again.
+
+    Args:
+        kind (str): the kind of the problem, "read" or "write"
+        message (str): the message
+    """
+    if kind in _reported_cache_problems:
+        return
+    _reported_cache_problems.add(kind)
+    print(f"{message} (further problems like this are not reported)")
+
+
+def remove_stale_entries(version_prefix: str) -> None:
+    """
+    Remove the cache entries (and temporary files left by crashed processes) of other interpreter versions, they would
+    never be loaded again. Only runs once per process.
+
+    Args:
+        version_prefix (str): the start of the file names of the current interpreter version
+    """
+    global _removed_stale_entries
+    if _removed_stale_entries or cache_dir is None:
+        return
+    _removed_stale_entries = True
+    try:
+        names = os.listdir(cache_dir)
+    except OSError as e:
+        report_cache_problem("write", f"could not list the ballang cache {cache_dir}: {e}")
+        return
+    for name in names:
+        if name.startswith(version_prefix) or not (name.endswith(".pickle") or name.endswith(".tmp")):
+            continue
+        try:
+            os.remove(os.path.join(cache_dir, name))
+        except OSError as e:
+            report_cache_problem("write", f"could not remove stale ballang cache entry {name}: {e}")
+
+
+def parse_cached(file: str) -> CodeFileNode:
+    """
+    Parse the given source code, using the disk cache if possible.
+    The cache entry is keyed by the hash of the source code and the interpreter version, so changed files and changes
+    to the interpreter invalidate it automatically. Unreadable entries are parsed again and overwritten. The file names
+    start with the interpreter version, so when an entry is written, the entries of older versions are removed.
+
+    Args:
+        file (str): the source code
+
+    Returns:
+        CodeFileNode: the syntax tree of the file
+    """
+    if cache_dir is None:
+        parsed = parse(file)
+        assert isinstance(parsed, CodeFileNode)
+        return parsed
+    version = interpreter_version()
+    version_prefix = version[:version_prefix_length] + "-"
+    key = hashlib.sha256((version + "\0" + file).encode()).hexdigest()
+    path = os.path.join(cache_dir, version_prefix + key + ".pickle")
+    try:
+        with open(path, "rb") as f:
+            cached = pickle.load(f)
+        if isinstance(cached, CodeFileNode):
+            return cached
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        report_cache_problem("read", f"ignoring broken ballang cache entry {path}: {e}")
+    parsed = parse(file)
+    assert isinstance(parsed, CodeFileNode)
+    # write to a temporary file first, so other processes never read a half written entry
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        with open(tmp_path, "wb") as f:
+            pickle.dump(parsed, f, pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+    except Exception as e:
+        report_cache_problem("write", f"could not write ballang cache entry {path}: {e}")
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        return parsed
+    remove_stale_entries(version_prefix)
+    return parsed
+
+
+# maps the backend and the hash of the source code to the compiled program
+_compiled_programs: Dict[Tuple[str, str], CompiledProgram] = {}
+
+
+def compile_file(file: str, backend: str = "eval") -> CompiledProgram:
+    """
+    Get the compiled program for the given source code. Every distinct source is only compiled once per process and backend,
+    files with the same content share the same program. The syntax tree is loaded from the disk cache if possible.
+
+    Args:
+        file (str): the source code
+        backend (str, optional): the backend to run the functions with. Defaults to "eval".
+
+    Returns:
+        CompiledProgram: the compiled program
+    """
+    key = (backend, hashlib.sha256(file.encode()).hexdigest())
+    program = _compiled_programs.get(key)
+    if program is None:
+        program = CompiledProgram(parse_cached(file), backend)
+        _compiled_programs[key] = program
+    return program
@@ -0,0 +1,219 @@
+"""
+Static scope resolution for Ballang.
+
+The resolver walks a function definition once before it is run and gives every local variable (arguments and variables
+defined with let) a slot in the frame of the function. The slot is stored in the VarNode / VarDefNode, so the EvalVisitor
+can read and write variables with a list index instead of walking a chain of Scope dicts, and blocks don't need their own
+scope anymore. Variables of different blocks get different slots, so an inner variable can shadow an outer one.
+
+Ballang has no nested functions, so a name is either local to the function or global (a function of the file or a host
+function). Global names are still looked up in the global scope at runtime, but if the global names are known up front,
+using an undefined variable is reported when the file is loaded instead of when the line is reached.
+"""
+from __future__ import annotations
+from typing import Container, Dict, Iterable, List, Optional, Set
+
+from .node import AssignNode, BreakNode, CodeBlockNode, ContinueNode, CodeFileNode, FuncArgNode, FuncCallNode, FunctionDefNode, IfNode, NodeVisitor, NumberNode, ReturnNode, StringNode, SymbolNode, TwoSideOpNode, UnaryOpNode, VarDefNode, VarNode, WordNode, whileNode
+
+
+class Resolver(NodeVisitor[None]):
+    """
+    Visitor that assigns frame slots to the local variables of a function. Implements the NodeVisitor interface.
+    Use resolve_function instead of using this class directly.
+
+    Member Variables:
+        function_name (str): the name of the resolved function, used in error messages
+        known_globals (Optional[Container[str]]): the names that are defined globally, None if they are not known yet
+        scopes (List[Dict[str, int]]): the local variables visible at the current position, innermost block last
+        n_slots (int): the number of slots used so far
+        free_names (Set[str]): the global names used by the function
+        loop_depth (int): the number of while loops around the current position
+    """
+    function_name: str
+    known_globals: Optional[Container[str]]
+    scopes: List[Dict[str, int]]
+    n_slots: int
+    free_names: Set[str]
+    loop_depth: int
+
+    def __init__(self, function_name: str, args: List[FuncArgNode], known_globals: Optional[Container[str]] = None):
+        """
+        Constructor
+
+        Args:
+            function_name (str): the name of the function
+            args (List[FuncArgNode]): the arguments of the function, they get the first slots
+            known_globals (Optional[Container[str]], optional): the global names, if given undefined names are an error. Defaults to None.
+        """
+        self.function_name = function_name
+        self.known_globals = known_globals
+        self.scopes = [{}]
+        self.n_slots = 0
+        self.free_names = set()
+        self.loop_depth = 0
+        for arg in args:
+            self.define(arg.name)
+
+    def define(self, name: str) -> int:
+        """
+        Define a local variable in the innermost block
+
+        Args:
+            name (str): the name of the variable
+
+        Returns:
+            int: the slot of the variable
+
+        Raises:
+            Exception: if the variable is already defined in the same block
+        """
+        if name in self.scopes[-1]:
+            raise Exception(f"variable {name} already defined in function {self.function_name}")
+        slot = self.n_slots
+        self.n_slots += 1
+        self.scopes[-1][name] = slot
+        return slot
+
+    def resolve(self, node: VarNode) -> None:
+        """
+        Set the slot of a variable use, or check that the name is global
+
+        Args:
+            node (VarNode): the variable
+
+        Raises:
+            Exception: if the variable is neither local nor a known global
+        """
+        for scope in reversed(self.scopes):
+            if node.name in scope:
+                node.slot = scope[node.name]
+                return
+        node.slot = None
+        if self.known_globals is not None and node.name not in self.known_globals:
+            raise Exception(f"unknown variable {node.name} in function {self.function_name}")
+        self.free_names.add(node.name)
+
+    def visit_two_side_op(self, node: TwoSideOpNode) -> None:
+        node.left.accept(self)
+        node.right.accept(self)
+
+    def visit_unary_op(self, node: UnaryOpNode) -> None:
+        node.node.accept(self)
+
+    def visit_code_block(self, node: CodeBlockNode) -> None:
+        self.scopes.append({})
+        for statement in node.statements:
+            statement.accept(self)
+        self.scopes.pop()
+
+    def visit_if(self, node: IfNode) -> None:
+        node.condition.accept(self)
+        node.then_block.accept(self)
+        for cond, block in zip(node.elif_conds, node.elif_blocks):
+            cond.accept(self)
+            block.accept(self)
+        if node.else_block is not None:
+            node.else_block.accept(self)
+
+    def visit_word(self, node: WordNode) -> None:
+        return None
+
+    def visit_string(self, node: StringNode) -> None:
+        return None
+
+    def visit_symbol(self, node: SymbolNode) -> None:
+        return None
+
+    def visit_number(self, node: NumberNode) -> None:
+        return None
+
+    def visit_var(self, node: VarNode) -> None:
+        self.resolve(node)
+
+    def visit_var_def(self, node: VarDefNode) -> None:
+        # the value is resolved before the variable is defined, so `let a = a` reads the outer a
+        if node.value is not None:
+            node.value.accept(self)
+        node.slot = self.define(node.name)
+
+    def visit_assign(self, node: AssignNode) -> None:
+        node.value.accept(self)
+        self.resolve(node.var)
+
+    def visit_func_call(self, node: FuncCallNode) -> None:
+        self.resolve(node.func)
+        for arg in node.args:
+            arg.accept(self)
+
+    def visit_while(self, node: whileNode) -> None:
+        node.condition.accept(self)
+        self.loop_depth += 1
+        node.then_block.accept(self)
+        self.loop_depth -= 1
+
+    def visit_func_arg(self, node: FuncArgNode) -> None:
+        return None
+
+    def visit_function_def(self, node: FunctionDefNode) -> None:
+        raise Exception("cannot resolve nested function definitions")
+
+    def visit_code_file(self, node: CodeFileNode) -> None:
+        raise Exception("cannot resolve code file, use resolve_file")
+
+    def visit_return(self, node: ReturnNode) -> None:
+        if node.value is not None:
+            node.value.accept(self)
+
+    def visit_break(self, node: BreakNode) -> None:
+        if self.loop_depth == 0:
+            raise Exception(f"break outside of a loop in function {self.function_name}")
+
+    def visit_continue(self, node: ContinueNode) -> None:
+        if self.loop_depth == 0:
+            raise Exception(f"continue outside of a loop in function {self.function_name}")
+
+
+def resolve_function(node: FunctionDefNode, known_globals: Optional[Container[str]] = None) -> Set[str]:
+    """
+    Assign frame slots to the variables of a function, sets node.n_slots
+
+    Args:
+        node (FunctionDefNode): the function definition
+        known_globals (Optional[Container[str]], optional): the global names, if given undefined names are an error. Defaults to None.
+
+    Returns:
+        Set[str]: the global names used by the function
+
+    Raises:
+        Exception: if a variable is defined twice in a block, break/continue is used outside of a loop or (if known_globals
+            is given) a name is not defined
+    """
+    resolver = Resolver(node.name, node.args, known_globals)
+    node.body.accept(resolver)
+    node.n_slots = resolver.n_slots
+    return resolver.free_names
+
+
+def resolve_file(node: CodeFileNode, host_names: Optional[Iterable[str]] = None) -> Set[str]:
+    """
+    Resolve all functions of a file
+
+    Args:
+        node (CodeFileNode): the file
+        host_names (Optional[Iterable[str]], optional): the names of the host functions. If given, using a name that is
+            neither a host function nor a function of the file is an error. Defaults to None.
+
+    Returns:
+        Set[str]: the global names used by the functions of the file
+
+    Raises:
+        Exception: if a variable is defined twice in a block, break/continue is used outside of a loop or (if host_names
+            is given) a name is not defined
+    """
+    known_globals: Optional[Set[str]] = None
+    if host_names is not None:
+        known_globals = set(node.functions.keys()) | set(host_names)
+    free_names: Set[str] = set()
+    for function_def in node.functions.values():
+        free_names |= resolve_function(function_def, known_globals)
+    return free_names
@@ -3,7 +3,7 @@ This module contains the ToStringVisitor class, which is a visitor class that co
 """
 from __future__ import annotations
 from typing import Dict, Union
-from .node import CodeFileNode, FuncArgNode, FunctionDefNode, NodeVisitor, ReturnNode, StringNode, TwoSideOpNode, Node, CodeBlockNode, IfNode, UnaryOpNode, WordNode, SymbolNode, NumberNode, VarNode, VarDefNode, AssignNode, FuncCallNode, whileNode
+from .node import BreakNode, CodeFileNode, ContinueNode, FuncArgNode, FunctionDefNode, NodeVisitor, ReturnNode, StringNode, TwoSideOpNode, Node, CodeBlockNode, IfNode, UnaryOpNode, WordNode, SymbolNode, NumberNode, VarNode, VarDefNode, AssignNode, FuncCallNode, whileNode
 
 # walks the tree and makes string representation of it
 
@@ -32,7 +32,6 @@ class ToStringVisitor(NodeVisitor[str]):
         return f"{node.sign}{node.node.accept(self)}"
 
     def visit_code_block(self, node: CodeBlockNode) -> str:
-        print(f"visiting code block, indent: {self.indent}")
         inner = "{\n"
         for statement in node.statements:
             inner += "\t"*(self.indent+1) + statement.accept(self.increase_indent())+"\n"
@@ -57,6 +56,9 @@ class ToStringVisitor(NodeVisitor[str]):
         return node.symbol
 
     def visit_number(self, node: NumberNode) -> str:
+        # the optimizer folds comparisons to bools, Ballang has no literal for them
+        if isinstance(node.value, bool):
+            return "(1 == 1)" if node.value else "(1 == 0)"
         return str(node.value)
 
     def visit_var(self, node: VarNode) -> str:
@@ -86,4 +88,8 @@ class ToStringVisitor(NodeVisitor[str]):
         if node.value is None:
             return "return"
         return f"return {node.value.accept(self)}"
+    def visit_break(self, node: BreakNode) -> str:
+        return "break"
+    def visit_continue(self, node: ContinueNode) -> str:
+        return "continue"
     
\ No newline at end of file
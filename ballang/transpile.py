@@ -0,0 +1,426 @@
+"""
+Python backend for Ballang.
+
+Every function definition is translated into the source code of a python function, which is compiled with compile() and
+run by CPython directly. if, while, break, continue and arithmetic become the corresponding python statements and a
+return statement is a plain python return.
+
+Local variables become python locals (renamed, so that a variable in an inner block can shadow an outer one).
+Functions of the file and host functions which are called by name are looked up once at the start of each call and then
+stored in fast locals.
+"""
+from __future__ import annotations
+import math
+from typing import Callable, Dict, List, Set
+
+from .eval_visitor import Function, Scope, Value
+from .node import AssignNode, BreakNode, CodeBlockNode, ContinueNode, CodeFileNode, FuncArgNode, FuncCallNode, FunctionDefNode, IfNode, Node, NodeVisitor, NumberNode, ReturnNode, StringNode, SymbolNode, TwoSideOpNode, UnaryOpNode, VarDefNode, VarNode, WordNode, whileNode
+
+# operators which are translated to the python operator with the same meaning, + and && are handled separately
+PYTHON_OPS: Dict[str, str] = {
+    "-": "-", "*": "*", "/": "/",
+    "==": "==", "!=": "!=", "<": "<", ">": ">", "<=": "<=", ">=": ">=",
+    "||": "or",
+}
+
+
+def _add(left: Value, right: Value) -> Value:
+    """
+    Ballang +, strings are concatenated with the string representation of the other side
+    """
+    if isinstance(left, str) or isinstance(right, str):
+        return str(left) + str(right)
+    return left + right  # type: ignore
+
+
+def _and(left: Value, right: Value) -> Value:
+    """
+    Ballang &&, used when the right side has to be evaluated even if the left side is false
+    """
+    return left and right
+
+
+def _or(left: Value, right: Value) -> Value:
+    """
+    Ballang ||, used when the right side has to be evaluated even if the left side is true
+    """
+    return left or right
+
+
+def _call(func: Value, *args: Value) -> Value:
+    """
+    Call a function stored in a local variable
+    """
+    if not isinstance(func, Function):
+        raise Exception("not a function")
+    return func.call(list(args))
+
+
+def _resolve(scope: Scope, name: str) -> Callable[..., Value]:
+    """
+    Look up a function by name and return a python callable for it. Functions are returned as their __call__, so functions of
+    the python backend still check the number of arguments but skip building an argument list.
+    If the name is not defined (yet) or not a function, the returned callable raises the same error the EvalVisitor would
+    raise when calling it, so names used in branches that aren't taken don't cause errors.
+
+    Args:
+        scope (Scope): the scope to look the name up in
+        name (str): the name of the function
+
+    Returns:
+        Callable[..., Value]: the callable
+    """
+    if not scope.contains(name):
+        def undefined(*args: Value) -> Value:
+            return scope.get(name)
+        return undefined
+    func = scope.get(name)
+    if isinstance(func, Function):
+        return func.__call__
+
+    def not_a_function(*args: Value) -> Value:
+        raise Exception("not a function")
+    return not_a_function
+
+
+class TranspiledFunction(Function):
+    """
+    Ballang function translated to a python function, implementing the Function interface
+
+    Member Variables:
+        name (str): the name of the function
+        n_args (int): the number of arguments
+        source (str): the generated python source, useful for debugging
+        py_func (Callable[..., Value]): the compiled python function
+    """
+    name: str
+    n_args: int
+    source: str
+    py_func: Callable[..., Value]
+
+    def __init__(self, name: str, n_args: int, source: str, py_func: Callable[..., Value]):
+        self.name = name
+        self.n_args = n_args
+        self.source = source
+        self.py_func = py_func
+
+    def call(self, args: List[Value]) -> Value:
+        """
+        Call the function with the given arguments as a list
+
+        Args:
+            args (List[Value]): the arguments
+
+        Returns:
+            Value: the return value of the function (if any)
+        """
+        if len(args) != self.n_args:
+            raise Exception("wrong number of arguments")
+        return self.py_func(*args)
+
+    def __call__(self, *args: Value) -> Value:
+        if len(args) != self.n_args:
+            raise Exception("wrong number of arguments")
+        return self.py_func(*args)
+
+    def __str__(self) -> str:
+        return f"TranspiledFunction({self.name})"
+
+
+class PythonTranspiler(NodeVisitor[str]):
+    """
+    Visitor that translates the body of a function into python source code. Implements the NodeVisitor interface.
+    Expressions return their python source, statements append lines to the output and return an empty string.
+    Use transpile_function instead of using this class directly.
+
+    Member Variables:
+        lines (List[str]): the lines generated so far
+        indent (int): the current indentation level
+        scopes (List[Dict[str, str]]): maps the ballang names of the visible local variables to python names, innermost block last
+        n_locals (int): the number of local variables defined so far, used to create unique names
+        called_globals (Set[str]): the global names that are called, they are looked up once per call
+        assigned_globals (Set[str]): the global names that are assigned to, these are never cached in locals
+    """
+    lines: List[str]
+    indent: int
+    scopes: List[Dict[str, str]]
+    n_locals: int
+    called_globals: Set[str]
+    assigned_globals: Set[str]
+
+    def __init__(self, args: List[FuncArgNode]):
+        """
+        Constructor
+
+        Args:
+            args (List[FuncArgNode]): the arguments of the function
+        """
+        self.lines = []
+        self.indent = 1
+        self.scopes = [{}]
+        self.n_locals = 0
+        self.called_globals = set()
+        self.assigned_globals = set()
+        for arg in args:
+            self.define(arg.name)
+
+    def emit(self, line: str) -> None:
+        """
+        Append a line at the current indentation
+
+        Args:
+            line (str): the line
+        """
+        self.lines.append("    " * self.indent + line)
+
+    def define(self, name: str) -> str:
+        """
+        Define a local variable in the innermost block
+
+        Args:
+            name (str): the ballang name of the variable
+
+        Returns:
+            str: the python name of the variable
+
+        Raises:
+            Exception: if the variable is already defined in the same block
+        """
+        if name in self.scopes[-1]:
+            raise Exception(f"variable {name} already defined")
+        # the counter makes the name unique, the ballang name is only added for readability
+        py_name = f"v{self.n_locals}"
+        if name.isidentifier():
+            py_name += f"_{name}"
+        self.n_locals += 1
+        self.scopes[-1][name] = py_name
+        return py_name
+
+    def lookup(self, name: str) -> str | None:
+        """
+        Find the python name of a local variable
+
+        Args:
+            name (str): the ballang name of the variable
+
+        Returns:
+            str | None: the python name or None if the variable is not local
+        """
+        for scope in reversed(self.scopes):
+            if name in scope:
+                return scope[name]
+        return None
+
+    def can_skip(self, node: Node) -> bool:
+        """
+        Check if evaluating the right side of && or || can neither have side effects nor raise an error the EvalVisitor would
+        raise. Only then it may be skipped like python does, otherwise both sides are evaluated like the other backends do.
+        Strings and variables (which may hold strings or None) are rejected by the operators, so only numbers are safe.
+
+        Args:
+            node (Node): the expression
+
+        Returns:
+            bool: True if the node can be skipped safely
+        """
+        return isinstance(node, NumberNode)
+
+    def block(self, node: CodeBlockNode) -> None:
+        """
+        Translate a block as the indented body of a python statement
+
+        Args:
+            node (CodeBlockNode): the block
+        """
+        self.indent += 1
+        node.accept(self)
+        self.indent -= 1
+
+    def visit_two_side_op(self, node: TwoSideOpNode) -> str:
+        left = node.left.accept(self)
+        right = node.right.accept(self)
+        if node.sign == "+":
+            if isinstance(node.left, NumberNode) and isinstance(node.right, NumberNode):
+                return f"({left} + {right})"
+            return f"_add({left}, {right})"
+        if node.sign == "&&":
+            if self.can_skip(node.right):
+                return f"({left} and {right})"
+            return f"_and({left}, {right})"
+        if node.sign == "||" and not self.can_skip(node.right):
+            return f"_or({left}, {right})"
+        if node.sign not in PYTHON_OPS:
+            raise Exception("unknown operator")
+        return f"({left} {PYTHON_OPS[node.sign]} {right})"
+
+    def visit_unary_op(self, node: UnaryOpNode) -> str:
+        value = node.node.accept(self)
+        if node.sign == "-":
+            return f"(-{value})"
+        elif node.sign == "!":
+            return f"(not {value})"
+        raise Exception("unknown operator")
+
+    def visit_code_block(self, node: CodeBlockNode) -> str:
+        self.scopes.append({})
+        start = len(self.lines)
+        for statement in node.statements:
+            code = statement.accept(self)
+            if code:
+                # an expression used as a statement
+                self.emit(code)
+        if len(self.lines) == start:
+            self.emit("pass")
+        self.scopes.pop()
+        return ""
+
+    def visit_if(self, node: IfNode) -> str:
+        self.emit(f"if {node.condition.accept(self)}:")
+        self.block(node.then_block)
+        for cond, block in zip(node.elif_conds, node.elif_blocks):
+            self.emit(f"elif {cond.accept(self)}:")
+            self.block(block)
+        if node.else_block is not None:
+            self.emit("else:")
+            self.block(node.else_block)
+        return ""
+
+    def visit_word(self, node: WordNode) -> str:
+        raise Exception("cannot translate word")
+
+    def visit_string(self, node: StringNode) -> str:
+        return repr(node.string)
+
+    def visit_symbol(self, node: SymbolNode) -> str:
+        raise Exception("cannot translate symbol")
+
+    def visit_number(self, node: NumberNode) -> str:
+        if isinstance(node.value, float) and not math.isfinite(node.value):
+            # folding constants can produce inf or nan, their repr is not valid python
+            return f"float({repr(node.value)!r})"
+        return repr(node.value)
+
+    def visit_var(self, node: VarNode) -> str:
+        py_name = self.lookup(node.name)
+        if py_name is None:
+            return f"_scope.get({node.name!r})"
+        return py_name
+
+    def visit_var_def(self, node: VarDefNode) -> str:
+        # the value is translated before the variable is defined, so `let a = a` reads the outer a
+        value = "None" if node.value is None else node.value.accept(self)
+        self.emit(f"{self.define(node.name)} = {value}")
+        return ""
+
+    def visit_assign(self, node: AssignNode) -> str:
+        value = node.value.accept(self)
+        py_name = self.lookup(node.var.name)
+        if py_name is None:
+            self.assigned_globals.add(node.var.name)
+            self.emit(f"_scope.set({node.var.name!r}, {value})")
+        else:
+            self.emit(f"{py_name} = {value}")
+        return ""
+
+    def visit_func_call(self, node: FuncCallNode) -> str:
+        args = [arg.accept(self) for arg in node.args]
+        name = node.func.name
+        py_name = self.lookup(name)
+        if py_name is not None:
+            return f"_call({', '.join([py_name] + args)})"
+        self.called_globals.add(name)
+        return f"{global_name(name)}({', '.join(args)})"
+
+    def visit_while(self, node: whileNode) -> str:
+        self.emit(f"while {node.condition.accept(self)}:")
+        self.block(node.then_block)
+        return ""
+
+    def visit_func_arg(self, node: FuncArgNode) -> str:
+        return ""
+
+    def visit_function_def(self, node: FunctionDefNode) -> str:
+        raise Exception("cannot translate nested function definitions")
+
+    def visit_code_file(self, node: CodeFileNode) -> str:
+        raise Exception("cannot translate code file, use transpile_function for each function")
+
+    def visit_return(self, node: ReturnNode) -> str:
+        if node.value is None:
+            self.emit("return None")
+        else:
+            self.emit(f"return {node.value.accept(self)}")
+        return ""
+
+    def visit_break(self, node: BreakNode) -> str:
+        self.emit("break")
+        return ""
+
+    def visit_continue(self, node: ContinueNode) -> str:
+        self.emit("continue")
+        return ""
+
+
+def global_name(name: str) -> str:
+    """
+    Get the python name of the fast local holding a called global function
+
+    Args:
+        name (str): the ballang name
+
+    Returns:
+        str: the python name
+    """
+    if name.isidentifier():
+        return f"f_{name}"
+    return f"f_{name.encode().hex()}"
+
+
+def transpile_source(node: FunctionDefNode) -> str:
+    """
+    Translate a function definition to python source code
+
+    Args:
+        node (FunctionDefNode): the function definition
+
+    Returns:
+        str: the source of a python function named _ballang_function
+    """
+    transpiler = PythonTranspiler(node.args)
+    node.body.accept(transpiler)
+    params = [transpiler.scopes[0][arg.name] for arg in node.args]
+    lines = [f"def _ballang_function({', '.join(params)}):"]
+    # names that are assigned somewhere are looked up on every call, so the new value is seen
+    for name in sorted(transpiler.called_globals):
+        if name in transpiler.assigned_globals:
+            lines.append(f"    {global_name(name)} = lambda *args: _call(_scope.get({name!r}), *args)")
+        else:
+            lines.append(f"    {global_name(name)} = _resolve(_scope, {name!r})")
+    return "\n".join(lines + transpiler.lines) + "\n"
+
+
+def transpile_function(node: FunctionDefNode, global_scope: Scope) -> TranspiledFunction:
+    """
+    Translate a function definition to python and compile it
+
+    Args:
+        node (FunctionDefNode): the function definition
+        global_scope (Scope): the scope used to look up names which are not local
+
+    Returns:
+        TranspiledFunction: the compiled function
+    """
+    source = transpile_source(node)
+    namespace: Dict[str, object] = {
+        "_add": _add,
+        "_and": _and,
+        "_or": _or,
+        "_call": _call,
+        "_resolve": _resolve,
+        "_scope": global_scope,
+    }
+    exec(compile(source, f"<ballang {node.name}>", "exec"), namespace)
+    py_func = namespace["_ballang_function"]
+    assert callable(py_func)
+    py_func.__name__ = py_func.__qualname__ = node.name
+    return TranspiledFunction(node.name, len(node.args), source, py_func)
@@ -10,7 +10,7 @@ from collision.coll_thread import ChangeInfo
 from game import GameState, PinballGame
 from math_utils.vec import Vec
 from objects.ball import Ball
-from ballang import parse_file
+from ballang import compile_file, parse_file
 from ballang.eval_visitor import Function, Value
 from objects.formhandler import FormHandler
 from objects.forms.timedform import TimedForm
@@ -24,6 +24,10 @@ if hardware_connected:
 else:
     hardware1 = None
 
+# backend used to run the ballang hooks, "eval" walks the syntax tree, "bytecode" uses the stack vm,
+# "python" translates the functions to python code (fastest)
+ballang_backend = "python"
+
 def get_state_functions(state: GameState, change_info: ChangeInfo) -> Dict:
     """
     Returns a dictionary of functions that can be called from ballang code
@@ -204,51 +208,52 @@ def get_update_functions(game: PinballGame) -> Dict:
 
 def prepare_update_function(file: str, function_name: str):
     """
-    Prepare a function that can be called to run a ballang function from python
+    Prepare a function that can be called to run a ballang function from python.
+    The file is only parsed once, each call just binds the current host functions
     """
+    program = compile_file(file, ballang_backend)
+    on_update = program.get_function(function_name)
     def run_update_function(game: PinballGame, screen: pygame.Surface):
         funcs = get_update_functions(game)
         funcs.update(get_screen_functions(screen))
-        ballang_funcs = parse_file(file, funcs)
-        on_update = ballang_funcs.get(function_name)
-        assert on_update is not None, f"function {function_name} not found"
+        program.bind(funcs)
         on_update()
     return run_update_function
 
 def prepare_init_function(file: str, function_name: str):
     """
-    Prepare a function that can be called to run a ballang function from python
+    Prepare a function that can be called to run a ballang function from python.
+    The file is only parsed once, each call just binds the current host functions
     """
+    program = compile_file(file, ballang_backend)
+    on_init = program.get_function(function_name)
     def run_init_function(game: PinballGame):
-        funcs = get_update_functions(game)
-        ballang_funcs = parse_file(file, funcs)
-        on_init = ballang_funcs.get(function_name)
-        assert on_init is not None, f"function {function_name} not found"
+        program.bind(get_update_functions(game))
         on_init()
     return run_init_function
 
 
 def prepare_coll_function(file: str, function_name: str):
     """
-    Prepare a function that can be called to run a ballang function from python
+    Prepare a function that can be called to run a ballang function from python.
+    The file is only parsed once, each call just binds the current host functions
     """
+    program = compile_file(file, ballang_backend)
+    coll_fn = program.get_function(function_name)
     def run_coll_function(state: GameState, coll_t: float, ball_id: int, change_info: ChangeInfo):
-        funcs = get_state_functions(state, change_info)
-        ballang_funcs = parse_file(file, funcs)
-        coll_fn = ballang_funcs.get(function_name)
-        assert coll_fn is not None, f"function {function_name} not found"
+        program.bind(get_state_functions(state, change_info))
         coll_fn(coll_t, ball_id)
     return run_coll_function
 
 def prepare_keydown_function(file: str, function_name: str):
     """
-    Prepare a function that can be called to run a ballang function from python
+    Prepare a function that can be called to run a ballang function from python.
+    The file is only parsed once, each call just binds the current host functions
     """
+    program = compile_file(file, ballang_backend)
+    on_keydown = program.get_function(function_name)
     def run_keydown_function(game: PinballGame, key: int):
-        funcs = get_update_functions(game)
-        ballang_funcs = parse_file(file, funcs)
-        on_keydown = ballang_funcs.get(function_name)
-        assert on_keydown is not None, f"function {function_name} not found"
+        program.bind(get_update_functions(game))
         on_keydown(key)
     return run_keydown_function
 
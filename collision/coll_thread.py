@@ -11,14 +11,13 @@ from ballang_vars import VarHandler
 #from game import GameState
 
 from objects.ball import Ball
-from collision.collision import TimedCollision
-from objects.form import Form, StaticForm
+from collision.collision import BallCollision
+from collision.scheduler import EventScheduler
+from objects.form import StaticForm
 from objects.formhandler import FormHandler
 import multiprocessing as mp
 from multiprocessing import Queue
 
-from objects.forms.transformform import TransformForm
-
 
 def empty_queue(queue: Queue):
     """
@@ -54,6 +53,7 @@ def precalc_colls(in_queue: Queue[Any], out_queues: List[Queue[GameStateChange]]
     curr_out_queue = out_queues[curr_queue_n]
     used_queues: List[int] = []
     game_state = in_queue.get()
+    scheduler = EventScheduler(game_state.forms, game_state.balls)
     i = 0
     prev_obj = None
     prev_coll_t = 0
@@ -85,37 +85,14 @@ def precalc_colls(in_queue: Queue[Any], out_queues: List[Queue[GameStateChange]]
                 empty_queue(out_queues[used_queues.pop(0)])
             continue
 
-        first_coll = None
-        first_coll_t = float("inf")
-        first_coll_ball: int = -1
-        ball_forms = []
         change_info = ChangeInfo()
-        form_with_balls = game_state.forms.copy()
-        for ball in game_state.balls:
-            form = ball.get_form()
-            ball_forms.append(form)
-            form_with_balls.add_form(form)
-        ball_inner_forms: List[Form] = []
-        for form in ball_forms:
-            assert isinstance(form, TransformForm)
-            ball_inner_forms.append(form.form)
-        for i in range(len(game_state.balls)):
-            ball = game_state.balls[i]
-            form = ball_forms[i]
-            coll = form_with_balls.find_collision(ball, ignore=[form])
-            # print("found coll")
-            if coll is None:
-                continue
-
-            coll_time = coll.get_coll_t() + ball.start_t
-            if coll_time < first_coll_t:
-                first_coll = coll
-                first_coll_t = coll_time
-                first_coll_ball = i
-        if first_coll is None:
+        # only the events of balls that changed since the last collision are predicted again
+        scheduler.sync(game_state.forms, game_state.balls)
+        prediction = scheduler.next_event()
+        if prediction is None:
             continue
             raise Exception("no collision found")
-        coll = first_coll
+        first_coll_t, first_coll_ball, coll = prediction
         if first_coll_t < 50:
             log = True
         else:
@@ -124,30 +101,34 @@ def precalc_colls(in_queue: Queue[Any], out_queues: List[Queue[GameStateChange]]
         if log:
             print(f"found coll at t: {first_coll_t}")
         ball = game_state.balls[first_coll_ball]
-        other: StaticForm = coll.get_obj_form()
-        if other.do_reflect:
+        if isinstance(coll, BallCollision):
+            print(f"ball-to-ball: {first_coll_t}")
             dir = coll.get_result_dir()
-            if other in ball_inner_forms:
-                print(f"ball-to-ball: {first_coll_t}")
-                other_ball_i = ball_inner_forms.index(other)
-                other_ball = game_state.balls[other_ball_i]
-                other_ball = other_ball.with_start_t(first_coll_t).with_start_pos(
-                    other_ball.get_pos(first_coll_t)).with_vel(dir*(-1))
-                game_state.balls[other_ball_i] = other_ball
-                #assert isinstance(other, StaticForm)
+            other_ball_i = coll.other_ball
+            other_ball = game_state.balls[other_ball_i]
+            other_ball = other_ball.with_start_t(first_coll_t).with_start_pos(
+                other_ball.get_pos(first_coll_t)).with_vel(dir*(-1))
+            game_state.balls[other_ball_i] = other_ball
             ball = ball.with_start_t(first_coll_t).with_start_pos(
-            ball.get_pos(first_coll_t)).with_vel(dir)
-            # print(f"ball_start_t: {ball.start_t}, first_coll_t: {first_coll_t}, other: {other}")
+                ball.get_pos(first_coll_t)).with_vel(dir)
             game_state.balls[first_coll_ball] = ball
+            on_collision = []
         else:
-            vel = ball.get_vel(first_coll_t)
-            ball = ball.with_start_t(first_coll_t).with_start_pos(
-                ball.get_pos(first_coll_t)).with_vel(vel)
-            game_state.balls[first_coll_ball] = ball
+            other: StaticForm = coll.get_obj_form()
+            if other.do_reflect:
+                dir = coll.get_result_dir()
+                ball = ball.with_start_t(first_coll_t).with_start_pos(
+                ball.get_pos(first_coll_t)).with_vel(dir)
+                # print(f"ball_start_t: {ball.start_t}, first_coll_t: {first_coll_t}, other: {other}")
+                game_state.balls[first_coll_ball] = ball
+            else:
+                vel = ball.get_vel(first_coll_t)
+                ball = ball.with_start_t(first_coll_t).with_start_pos(
+                    ball.get_pos(first_coll_t)).with_vel(vel)
+                game_state.balls[first_coll_ball] = ball
+            on_collision = other.on_collision
         change_info.set_balls_changed()
 
-        on_collision = other.on_collision
-
         for fn_name in on_collision:
             print(f"collision, executing {fn_name}, on_collision: {on_collision}")
             form_functions[fn_name](game_state, first_coll_t, first_coll_ball, change_info)
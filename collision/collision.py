@@ -3,6 +3,26 @@ from objects.material import Material
 from math_utils.vec import Vec
 
 #from path import Path
+
+
+def reflect(vel_before: Vec, normal: Vec, material: Material) -> Vec:
+    """
+    Returns the direction of a ball after bouncing off a surface
+
+    Args:
+        vel_before (Vec): the velocity before the collision
+        normal (Vec): the normal of the surface
+        material (Material): the material of the surface
+    """
+    vel_ort, vel_par = vel_before.decompose(normal)
+    if vel_ort.magnitude() < material.min_ort:
+        vel_ort = vel_ort.normalize()*material.min_ort
+    if vel_par.magnitude() < material.min_par:
+        vel_par = vel_par.normalize()*material.min_par
+    #print(f"vel_before: {vel_before}, vel_ort: {vel_ort}, vel_par: {vel_par}")
+    return vel_par*material.factor_par - vel_ort*material.factor_ort#(vel_par*0.95 - vel_ort*0.8)
+
+
 class Collision(ABC):
     """
     Interface for collision
@@ -40,15 +60,7 @@ class SimpleCollision(Collision):
         normal = self.obj.get_normal(self.bahn.apply(self.time))
         #print(f"normal: {normal}")
         vel_before = self.bahn.deriv().apply(self.time)
-
-        vel_ort, vel_par = vel_before.decompose(normal)
-        if vel_ort.magnitude() < material.min_ort:
-            vel_ort = vel_ort.normalize()*material.min_ort
-        if vel_par.magnitude() < material.min_par:
-            vel_par = vel_par.normalize()*material.min_par
-        #print(f"vel_before: {vel_before}, vel_ort: {vel_ort}, vel_par: {vel_par}")
-        #raise ValueError("stop")
-        return vel_par*material.factor_par - vel_ort*material.factor_ort#(vel_par*0.95 - vel_ort*0.8)
+        return reflect(vel_before, normal, material)
     def __str__(self):
         return f"Collision(time: {self.time}, bahn: {self.bahn}, obj: {self.obj})"
     def get_coll_t(self) -> float:
@@ -84,4 +96,43 @@ class TimedCollision(Collision):
     def get_coll_t(self) -> float:
         return self.time
     def get_obj_form(self):
-        return self.static_coll.get_obj_form()
\ No newline at end of file
+        return self.static_coll.get_obj_form()
+
+
+class BallCollision(Collision):
+    """
+    Collision of two balls
+
+    Attributes:
+        time (float): the time of the collision, relative to the start of the first ball
+        bahn (Vec): the position of the first ball relative to the second one, in the time of the first ball
+        other_ball (int): the index of the second ball
+        material (Material): the material of the balls
+    """
+    time: float
+    bahn: Vec
+    other_ball: int
+    material: Material
+
+    def __init__(self, time: float, bahn: Vec, other_ball: int, material: Material):
+        self.time = time
+        self.bahn = bahn
+        self.other_ball = other_ball
+        self.material = material
+
+    def get_result_dir(self) -> Vec:
+        """
+        Returns the resulting direction of the first ball after the collision, the second ball moves in the opposite direction
+        """
+        normal = self.bahn.apply(self.time).normalize()
+        vel_before = self.bahn.deriv().apply(self.time)
+        return reflect(vel_before, normal, self.material)
+
+    def get_coll_t(self) -> float:
+        return self.time
+
+    def get_obj_form(self):
+        raise Exception("a ball collision has no form, use other_ball")
+
+    def __str__(self):
+        return f"BallCollision(time: {self.time}, other_ball: {self.other_ball})"
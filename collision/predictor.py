@@ -0,0 +1,65 @@
+"""
+Finds the next event of the game: the earliest collision of any ball, with a form or with another ball.
+The balls are solved against each other all at once using a BallStore, the forms are checked for every ball by the FormHandler.
+"""
+from __future__ import annotations
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from collision.collision import Collision
+from objects.ball import Ball
+from objects.ballstore import BallStore
+from objects.formhandler import FormHandler
+
+
+def predict_next_collision(forms: FormHandler, balls: List[Ball]) -> Optional[Tuple[float, int, Collision]]:
+    """
+    Find the earliest collision of any of the balls
+
+    Args:
+        - forms: the forms of the game, balls are not part of it
+        - balls: the balls
+
+    Returns:
+        - Optional[Tuple[float, int, Collision]]: the absolute time of the collision, the index of the ball it belongs to and
+          the collision (relative to the start of that ball), None if no ball collides anymore
+    """
+    if len(balls) == 0:
+        return None
+    stored = all(BallStore.can_store(ball) for ball in balls)
+    best: Optional[Tuple[float, int, Collision]] = None
+    best_t = math.inf
+    store = BallStore(balls) if stored else None
+    if store is not None and len(balls) > 1:
+        first, second = store.all_pairs()
+        times = store.pair_collision_times(first, second)
+        pair = int(np.argmin(times))
+        if times[pair] < math.inf:
+            best_t = float(times[pair])
+            best = (best_t, int(first[pair]), store.make_collision(int(first[pair]), int(second[pair]), best_t))
+    elif len(balls) > 1:
+        raise Exception("only balls with at most quadratic trajectories can collide with each other")
+    start_t = np.array([ball.start_t for ball in balls], dtype=float)
+    colls = find_form_collisions(forms, balls, best_t - start_t)
+    for i, coll in enumerate(colls):
+        if coll is not None and coll.get_coll_t() + balls[i].start_t < best_t:
+            best_t = coll.get_coll_t() + balls[i].start_t
+            best = (best_t, i, coll)
+    return best
+
+
+def find_form_collisions(forms: FormHandler, balls: List[Ball], max_t: np.ndarray) -> List[Optional[Collision]]:
+    """
+    Find the first collision of each ball with the forms
+
+    Args:
+        - forms: the forms of the game
+        - balls: the balls
+        - max_t: time horizon of each ball, relative to its start_t
+
+    Returns:
+        - List[Optional[Collision]]: the first collision of each ball or None
+    """
+    return [forms.find_collision(ball, [], float(horizon)) for ball, horizon in zip(balls, max_t)]
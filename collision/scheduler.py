@@ -0,0 +1,171 @@
+"""
+Event driven collision prediction: the next event of every ball and of every pair of balls is kept in a heap, after a
+collision only the events of the balls whose trajectory changed are predicted again.
+"""
+from __future__ import annotations
+import heapq
+import math
+from typing import List, Optional, Tuple
+
+import numpy as np
+
+from collision.collision import Collision
+from collision.predictor import find_form_collisions
+from objects.ball import Ball
+from objects.ballstore import BallStore
+from objects.formhandler import FormHandler
+
+# the heap is cleaned from outdated events once it is this many times larger than the number of possible events
+compact_factor = 4
+
+
+class EventScheduler:
+    """
+    Keeps the predicted events of a list of balls in a heap.
+    Every ball has a version that is increased whenever its trajectory changes. Events remember the versions of their balls,
+    outdated events are not removed from the heap but skipped when they come up.
+    Balls are compared by identity, a ball whose trajectory changes is always replaced by a new Ball object (see Ball.with_vel).
+
+    Attributes:
+        - forms (FormHandler): the forms the events were predicted with
+        - balls (List[Ball]): the balls the events were predicted with
+        - store (Optional[BallStore]): the trajectories of the balls, None if they can't be stored
+        - versions (List[int]): the version of each ball
+        - heap (List[Tuple[float, int, int, int, int, int, Optional[Collision]]]): the events as (absolute time, number of the
+          event, ball, other ball or -1 for forms, version of the ball, version of the other ball, collision with a form)
+        - n_pushed (int): the number of events pushed so far, keeps events with equal times in order
+    """
+    forms: FormHandler
+    balls: List[Ball]
+    store: Optional[BallStore]
+    versions: List[int]
+    heap: List[Tuple[float, int, int, int, int, int, Optional[Collision]]]
+    n_pushed: int
+
+    def __init__(self, forms: FormHandler, balls: List[Ball]):
+        """
+        Predict the events of all balls
+
+        Args:
+            - forms: the forms of the game
+            - balls: the balls
+        """
+        self.reset(forms, balls)
+
+    def reset(self, forms: FormHandler, balls: List[Ball]):
+        """
+        Forget all events and predict them again
+
+        Args:
+            - forms: the forms of the game
+            - balls: the balls
+        """
+        self.forms = forms
+        self.balls = []
+        self.store = None
+        self.versions = []
+        self.heap = []
+        self.n_pushed = 0
+        self.update(balls)
+
+    def sync(self, forms: FormHandler, balls: List[Ball]):
+        """
+        Update the events after the game changed. Only the events of balls that were replaced or added are predicted again,
+        if the forms changed or balls were removed all events are predicted again.
+
+        Args:
+            - forms: the forms of the game
+            - balls: the balls
+        """
+        if forms is not self.forms or len(balls) < len(self.balls):
+            self.reset(forms, balls)
+        else:
+            self.update(balls)
+
+    def update(self, balls: List[Ball]):
+        """
+        Predict the events of the balls that are not in self.balls at the same index
+
+        Args:
+            - balls: the balls, at least as many as self.balls
+        """
+        changed = [i for i, ball in enumerate(balls) if i >= len(self.balls) or ball is not self.balls[i]]
+        if len(changed) == 0:
+            return
+        self.balls = list(balls)
+        self.versions.extend([0]*(len(balls) - len(self.versions)))
+        for i in changed:
+            self.versions[i] += 1
+        if all(BallStore.can_store(ball) for ball in balls):
+            self.store = BallStore(self.balls)
+        elif len(balls) > 1:
+            raise Exception("only balls with at most quadratic trajectories can collide with each other")
+        else:
+            self.store = None
+        self.predict_form_events(changed)
+        self.predict_pair_events(changed)
+        n_balls = len(balls)
+        if len(self.heap) > compact_factor*(n_balls + n_balls*(n_balls - 1)//2) + 64:
+            self.heap = [event for event in self.heap if self.is_valid(event)]
+            heapq.heapify(self.heap)
+
+    def predict_form_events(self, changed: List[int]):
+        """
+        Predict the next collision with a form of the given balls
+        """
+        balls = [self.balls[i] for i in changed]
+        colls = find_form_collisions(self.forms, balls, np.full(len(balls), math.inf))
+        for i, coll in zip(changed, colls):
+            if coll is not None:
+                self.push(coll.get_coll_t() + self.balls[i].start_t, i, -1, coll)
+
+    def predict_pair_events(self, changed: List[int]):
+        """
+        Predict the next collision of the given balls with every other ball, pairs of two changed balls are solved once
+        """
+        if self.store is None or len(self.balls) < 2:
+            return
+        n_balls = len(self.balls)
+        is_changed = np.zeros(n_balls, dtype=bool)
+        is_changed[changed] = True
+        ball, other = np.meshgrid(np.array(changed), np.arange(n_balls), indexing="ij")
+        ball, other = ball.ravel(), other.ravel()
+        keep = (ball != other) & ~(is_changed[other] & (other < ball))
+        first = np.minimum(ball, other)[keep]
+        second = np.maximum(ball, other)[keep]
+        times = self.store.pair_collision_times(first, second)
+        for pair in np.flatnonzero(times < math.inf):
+            self.push(float(times[pair]), int(first[pair]), int(second[pair]), None)
+
+    def push(self, time: float, ball: int, other: int, coll: Optional[Collision]):
+        """
+        Add an event for the current versions of the balls
+        """
+        other_version = -1 if other < 0 else self.versions[other]
+        heapq.heappush(self.heap, (time, self.n_pushed, ball, other, self.versions[ball], other_version, coll))
+        self.n_pushed += 1
+
+    def is_valid(self, event: Tuple[float, int, int, int, int, int, Optional[Collision]]) -> bool:
+        """
+        Check if none of the balls of an event changed since it was predicted
+        """
+        _, _, ball, other, version, other_version, _ = event
+        return self.versions[ball] == version and (other < 0 or self.versions[other] == other_version)
+
+    def next_event(self) -> Optional[Tuple[float, int, Collision]]:
+        """
+        Get the earliest event. It stays in the heap until the trajectory of one of its balls changes.
+
+        Returns:
+            - Optional[Tuple[float, int, Collision]]: the absolute time of the collision, the index of the ball it belongs to
+              and the collision (relative to the start of that ball), None if no ball collides anymore
+        """
+        while len(self.heap) > 0 and not self.is_valid(self.heap[0]):
+            heapq.heappop(self.heap)
+        if len(self.heap) == 0:
+            return None
+        time, _, ball, other, _, _, coll = self.heap[0]
+        if coll is None:
+            assert self.store is not None
+            coll = self.store.make_collision(ball, other, time)
+        return time, ball, coll
@@ -5,7 +5,7 @@ from __future__ import annotations
 
 import math
 import time
-from typing import Any, Callable, Dict, List, Set, Tuple
+from typing import Any, Callable, Dict, List, Set
 import pygame
 from ballang_vars import VarHandler
 import json
@@ -18,26 +18,16 @@ from objects.ball import Ball
 from objects.form import Form
 from objects.formhandler import FormHandler
 from objects.forms.lineform import LineForm
-from objects.forms.periodicform import PeriodicForm
 from objects.forms.rotateform import RotateForm
 from objects.forms.tempform import TempForm
 
 
 def make_rotating(form: Form, rot_point: Vec, period: float):
     """
-    Makes a rotating form
+    Makes a form that rotates around rot_point forever, one turn per period.
+    RotateForm solves in short time windows, so the rotation doesn't have to be split into sub forms.
     """
-    n_subforms = 5
-    step_size = 2*math.pi/n_subforms
-    step_duration = period/n_subforms
-    subforms: List[Tuple[Form, float]] = []
-    for i in range(n_subforms):
-        angle = 2*math.pi*i/n_subforms
-        sub_form = form.rotate(angle, rot_point)
-        rotating_sub_form = RotateForm(
-            sub_form, rot_point, 0.0, step_size/step_duration, 0)
-        subforms.append((rotating_sub_form, step_duration))
-    return PeriodicForm(subforms)
+    return RotateForm(form, rot_point, 0.0, 2*math.pi/period, 0)
 
 
 def make_flipper(line: LineForm, rot_point: Vec, up_angle: float, down_angle: float, turn_duration: float, curr_up: bool, curr_time: float = 0):
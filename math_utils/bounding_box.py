@@ -0,0 +1,181 @@
+"""
+Axis aligned bounding boxes, used as a broad phase for the collision detection.
+A ball can only collide with a form if the box swept by the ball in the searched time window overlaps the box of the form.
+"""
+from __future__ import annotations
+import math
+from typing import Iterable, List, Optional
+
+from math_utils.interval import SimpleInterval
+from math_utils.polynom import Polynom
+from math_utils.vec import Vec
+
+
+class BoundingBox:
+    """
+    An axis aligned rectangle
+
+    Attributes:
+        x_range (SimpleInterval): the x values inside the box
+        y_range (SimpleInterval): the y values inside the box
+    """
+    x_range: SimpleInterval
+    y_range: SimpleInterval
+
+    def __init__(self, x_range: SimpleInterval, y_range: SimpleInterval):
+        """
+        Create a new BoundingBox
+
+        Args:
+            x_range (SimpleInterval): the x values inside the box
+            y_range (SimpleInterval): the y values inside the box
+        """
+        self.x_range = x_range
+        self.y_range = y_range
+
+    @staticmethod
+    def from_points(points: Iterable[Vec[float]]) -> BoundingBox:
+        """
+        Get the smallest box containing all points
+
+        Args:
+            points (Iterable[Vec[float]]): the points, at least one
+
+        Returns:
+            BoundingBox: the box
+        """
+        xs: List[float] = []
+        ys: List[float] = []
+        for point in points:
+            xs.append(point.x)
+            ys.append(point.y)
+        return BoundingBox(SimpleInterval(min(xs), max(xs)), SimpleInterval(min(ys), max(ys)))
+
+    def overlaps(self, other: BoundingBox) -> bool:
+        """
+        Check if the two boxes have at least one point in common
+
+        Args:
+            other (BoundingBox): the other box
+
+        Returns:
+            bool: True if they overlap
+        """
+        return self.x_range.overlaps(other.x_range) and self.y_range.overlaps(other.y_range)
+
+    def union(self, other: BoundingBox) -> BoundingBox:
+        """
+        Get the smallest box containing both boxes
+
+        Args:
+            other (BoundingBox): the other box
+
+        Returns:
+            BoundingBox: the box
+        """
+        return BoundingBox(SimpleInterval(min(self.x_range.min, other.x_range.min), max(self.x_range.max, other.x_range.max)),
+                           SimpleInterval(min(self.y_range.min, other.y_range.min), max(self.y_range.max, other.y_range.max)))
+
+    def translate(self, x_range: SimpleInterval, y_range: SimpleInterval) -> BoundingBox:
+        """
+        Get the box containing this box moved by any offset in the given ranges
+
+        Args:
+            x_range (SimpleInterval): the possible offsets in x direction
+            y_range (SimpleInterval): the possible offsets in y direction
+
+        Returns:
+            BoundingBox: the box
+        """
+        return BoundingBox(SimpleInterval(self.x_range.min + x_range.min, self.x_range.max + x_range.max),
+                           SimpleInterval(self.y_range.min + y_range.min, self.y_range.max + y_range.max))
+
+    def get_corners(self) -> List[Vec[float]]:
+        """
+        Returns the four corners of the box
+        """
+        return [Vec(self.x_range.min, self.y_range.min), Vec(self.x_range.max, self.y_range.min),
+                Vec(self.x_range.max, self.y_range.max), Vec(self.x_range.min, self.y_range.max)]
+
+    def rotate(self, min_angle: float, max_angle: float, center: Vec[float]) -> BoundingBox:
+        """
+        Get the box containing this box rotated around center by any angle between min_angle and max_angle.
+        A rotated rectangle is the convex hull of its rotated corners, so it is enough to bound the arcs the corners move on.
+
+        Args:
+            min_angle (float): the smallest angle
+            max_angle (float): the biggest angle
+            center (Vec[float]): the center of the rotation
+
+        Returns:
+            BoundingBox: the box
+        """
+        points: List[Vec[float]] = []
+        for corner in self.get_corners():
+            points.extend(arc_extremes(corner, min_angle, max_angle, center))
+        return BoundingBox.from_points(points)
+
+    def __str__(self) -> str:
+        return f"BoundingBox(x: {self.x_range.min} to {self.x_range.max}, y: {self.y_range.min} to {self.y_range.max})"
+
+
+def arc_extremes(point: Vec[float], min_angle: float, max_angle: float, center: Vec[float]) -> List[Vec[float]]:
+    """
+    Get the points that bound the arc a point moves on when it is rotated around center from min_angle to max_angle:
+    the ends of the arc and the points where it is furthest left/right/up/down
+
+    Args:
+        point (Vec[float]): the point
+        min_angle (float): the smallest angle
+        max_angle (float): the biggest angle
+        center (Vec[float]): the center of the rotation
+
+    Returns:
+        List[Vec[float]]: the points
+    """
+    if max_angle - min_angle >= 2*math.pi:
+        min_angle, max_angle = 0.0, 2*math.pi
+    points = [point.rotate(min_angle, center), point.rotate(max_angle, center)]
+    offset = point - center
+    radius = math.hypot(offset.x, offset.y)
+    start = math.atan2(offset.y, offset.x) + min_angle
+    end = start + max_angle - min_angle
+    # the extremes are at multiples of pi/2
+    k = math.ceil(start/(math.pi/2))
+    while k*math.pi/2 <= end:
+        points.append(center + Vec.from_angle(k*math.pi/2)*radius)
+        k += 1
+    return points
+
+
+def get_swept_bound(bahn: Vec[Polynom], min_t: float, max_t: float) -> BoundingBox:
+    """
+    Get the box containing every position of a trajectory between min_t and max_t
+
+    Args:
+        bahn (Vec[Polynom]): the trajectory
+        min_t (float): the start of the time window
+        max_t (float): the end of the time window, must be finite
+
+    Returns:
+        BoundingBox: the box
+    """
+    return BoundingBox(bahn.x.get_range(min_t, max_t), bahn.y.get_range(min_t, max_t))
+
+
+def union_bounds(bounds: Iterable[Optional[BoundingBox]]) -> Optional[BoundingBox]:
+    """
+    Get the box containing all given boxes
+
+    Args:
+        bounds (Iterable[Optional[BoundingBox]]): the boxes, None means unbounded
+
+    Returns:
+        Optional[BoundingBox]: the box, None if any of the boxes is None or there are no boxes
+    """
+    result: Optional[BoundingBox] = None
+    for bound in bounds:
+        if bound is None:
+            return None
+        result = bound if result is None else result.union(bound)
+    return result
@@ -63,6 +63,12 @@ class SimpleInterval(Interval):
         for i in range(n_steps):
             yield self.min+i*step_size
 
+    def overlaps(self, other: SimpleInterval) -> bool:
+        """
+        Check if the two intervals have at least one value in common, ignoring whether the ends are inclusive
+        """
+        return self.min <= other.max and other.min <= self.max
+
     def intersect(self, other: SimpleInterval):
         #print(
             #f"intersect range {{{self.min} to {self.max}}}, {{{other.min} to {other.max}}}")
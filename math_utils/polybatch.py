@@ -0,0 +1,131 @@
+"""
+Vectorized versions of the polynom solvers, which find the roots of many polynoms of the same degree with a few numpy
+array operations. Used to find the collisions of many pairs of balls at once (see BallStore).
+"""
+from __future__ import annotations
+from typing import Tuple
+
+import numpy as np
+
+# roots of quartic polynoms whose imaginary part is smaller than this (relative to their size) are treated as real
+imag_tolerance = 1e-7
+# number of newton steps used to polish the roots of quartic polynoms
+polish_steps = 2
+
+
+def quadratic_roots_batch(c: np.ndarray, b: np.ndarray, a: np.ndarray) -> np.ndarray:
+    """
+    Find the real roots of a*x^2 + b*x + c for many polynoms, using the same stable formula as quadratic_roots.
+    Rows where a is 0 are solved as linear equations.
+
+    Args:
+        c (np.ndarray): the constant coefficients
+        b (np.ndarray): the linear coefficients
+        a (np.ndarray): the quadratic coefficients
+
+    Returns:
+        np.ndarray: the roots of every polynom, with an extra last axis of length 2, nan where there is no root
+    """
+    with np.errstate(all="ignore"):
+        disc = b*b - 4*a*c
+        q = -0.5*(b + np.copysign(np.sqrt(disc), b))
+        roots = np.stack([q/a, c/q], axis=-1)
+        linear = -c/b
+    roots[a == 0, 0] = linear[a == 0]
+    roots[a == 0, 1] = np.nan
+    roots[~np.isfinite(roots)] = np.nan
+    return roots
+
+
+def quartic_roots_batch(coefs: np.ndarray) -> np.ndarray:
+    """
+    Find the real roots of many quartic polynoms as the eigenvalues of their companion matrices, polished with newton steps
+
+    Args:
+        coefs (np.ndarray): shape (n, 5), the coefficients (lowest exponent first), the last column must not be 0
+
+    Returns:
+        np.ndarray: shape (n, 4), the roots of every polynom, nan for complex roots
+    """
+    n = coefs.shape[0]
+    companion = np.zeros((n, 4, 4))
+    companion[:, 1:, :-1] = np.eye(3)
+    companion[:, :, -1] = -coefs[:, :4]/coefs[:, 4:]
+    eigvals = np.linalg.eigvals(companion)
+    roots = eigvals.real.copy()
+    roots[np.abs(eigvals.imag) > imag_tolerance*np.maximum(1.0, np.abs(roots))] = np.nan
+    deriv = coefs[:, 1:]*np.arange(1, 5)
+    with np.errstate(all="ignore"):
+        for _ in range(polish_steps):
+            value = np.zeros_like(roots)
+            slope = np.zeros_like(roots)
+            for i in range(4, -1, -1):
+                value = value*roots + coefs[:, i:i + 1]
+            for i in range(3, -1, -1):
+                slope = slope*roots + deriv[:, i:i + 1]
+            step = value/slope
+            roots = np.where(np.isfinite(step), roots - step, roots)
+    return roots
+
+
+def square_coefs(coefs: np.ndarray) -> np.ndarray:
+    """
+    Square many quadratic polynoms
+
+    Args:
+        - coefs: shape (m, 3), the coefficients
+
+    Returns:
+        - np.ndarray: shape (m, 5), the coefficients of the squares
+    """
+    c0, c1, c2 = coefs[:, 0], coefs[:, 1], coefs[:, 2]
+    return np.stack([c0*c0, 2*c0*c1, c1*c1 + 2*c0*c2, 2*c1*c2, c2*c2], axis=1)
+
+
+def solve_circle_equations(coefs: np.ndarray) -> np.ndarray:
+    """
+    Find the real roots of many equations of the form |bahn - center|^2 - radius^2.
+    Their leading coefficients only depend on the acceleration, so each row is either quartic or (without acceleration) quadratic.
+
+    Args:
+        - coefs: shape (..., 5), the coefficients
+
+    Returns:
+        - np.ndarray: shape (..., 4), the roots, nan where there is no root
+
+    Raises:
+        - Exception: if an equation is cubic
+    """
+    roots = np.full(coefs.shape[:-1] + (4,), np.nan)
+    quartic = coefs[..., 4] != 0
+    if np.any(quartic):
+        roots[quartic] = quartic_roots_batch(coefs[quartic])
+    if np.any(~quartic & (coefs[..., 3] != 0)):
+        raise Exception("circle equations can't be cubic")
+    quadratic = ~quartic
+    if np.any(quadratic):
+        rest = coefs[quadratic]
+        roots[quadratic, :2] = quadratic_roots_batch(rest[:, 0], rest[:, 1], rest[:, 2])
+    return roots
+
+
+def eval_bahn(bahn_x: np.ndarray, bahn_y: np.ndarray, t: np.ndarray) -> Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Get the position and velocity of quadratic trajectories at many times
+
+    Args:
+        - bahn_x: shape (m, 3), the coefficients of the x coordinates
+        - bahn_y: shape (m, 3), the coefficients of the y coordinates
+        - t: shape (m, ...), the times, the first axis selects the trajectory
+
+    Returns:
+        - Tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]: x position, y position, x velocity and y velocity
+    """
+    shape = (bahn_x.shape[0],) + (1,)*(t.ndim - 1)
+    x0, x1, x2 = (bahn_x[:, i].reshape(shape) for i in range(3))
+    y0, y1, y2 = (bahn_y[:, i].reshape(shape) for i in range(3))
+    pos_x = x0 + t*(x1 + t*x2)
+    pos_y = y0 + t*(y1 + t*y2)
+    vel_x = x1 + t*(2*x2)
+    vel_y = y1 + t*(2*y2)
+    return pos_x, pos_y, vel_x, vel_y
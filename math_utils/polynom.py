@@ -1,11 +1,336 @@
 """
-This module contains the Polynom class, which is a wrapper around numpy.polynomial.Polynomial.
+This module contains the Polynom class, which is a wrapper around numpy.polynomial.Polynomial, and SmallPolynom, a
+lightweight polynom for the low degrees of ball trajectories.
 """
 from __future__ import annotations
-from typing import Callable, Dict, Optional, List
+import math
+from itertools import chain
+from typing import Callable, Dict, Iterator, Optional, List, Sequence, Tuple, Union
 
 import numpy as np
 from numpy.polynomial import Polynomial as NpPoly
+from math_utils.interval import SimpleInterval
+from numpy.polynomial.polynomial import polyroots
+
+# polynoms up to this degree are solved by isolating the roots with the derivative, higher degrees use the eigenvalues
+# of the companion matrix (numpy), which is faster there
+max_isolation_degree = 4
+# number of newton steps used to polish the roots numpy finds for higher degrees
+polish_steps = 2
+# the highest degree a SmallPolynom holds, results of a higher degree are Polynoms
+max_small_degree = 4
+# the rows of pascal's triangle computed so far, binomial_rows[n][k] is n choose k
+binomial_rows: List[List[int]] = [[1]]
+
+
+def horner(coefs: List[float], x: float) -> float:
+    """
+    Evaluate a polynom given by its coefficients (lowest exponent first) using the horner scheme
+
+    Args:
+        coefs (List[float]): the coefficients
+        x (float): the value to evaluate the polynom at
+
+    Returns:
+        float: the value of the polynom at x
+    """
+    result = 0.0
+    for coef in reversed(coefs):
+        result = result*x + coef
+    return result
+
+
+def deriv_coefs(coefs: List[float]) -> List[float]:
+    """
+    Get the coefficients of the derivative of a polynom given by its coefficients (lowest exponent first)
+    """
+    return [i*coef for i, coef in enumerate(coefs)][1:]
+
+
+def get_binomials(n: int) -> List[int]:
+    """
+    Get the binomial coefficients n choose k for k = 0..n, the rows are computed once and kept in binomial_rows.
+    The list is shared, it must not be changed.
+    """
+    while len(binomial_rows) <= n:
+        last = binomial_rows[-1]
+        binomial_rows.append([1] + [a + b for a, b in zip(last, last[1:])] + [1])
+    return binomial_rows[n]
+
+
+def compose_linear(coefs: List[float], scale: float, shift: float) -> List[float]:
+    """
+    Get the coefficients of p(scale*x + shift) for a polynom p given by its coefficients (lowest exponent first).
+    Uses p(scale*x + shift) = sum over k of coefs[k] * sum over j of (k choose j) * shift^(k-j) * scale^j * x^j.
+
+    Args:
+        coefs (List[float]): the coefficients of p
+        scale (float): the factor of x
+        shift (float): the constant added to scale*x
+
+    Returns:
+        List[float]: the coefficients of the composed polynom
+    """
+    n = len(coefs)
+    if shift == 0:
+        if scale == 1:
+            return list(coefs)
+        result = []
+        factor = 1.0
+        for coef in coefs:
+            result.append(coef*factor)
+            factor *= scale
+        return result
+    shift_powers = [1.0]
+    for _ in range(n - 1):
+        shift_powers.append(shift_powers[-1]*shift)
+    result = []
+    factor = 1.0
+    for j in range(n):
+        value = 0.0
+        for k in range(j, n):
+            value += coefs[k]*get_binomials(k)[j]*shift_powers[k - j]
+        result.append(value*factor)
+        factor *= scale
+    return result
+
+
+def shift_coefs(coefs: List[float], shift: float) -> List[float]:
+    """
+    Get the coefficients of p(x + shift) for a polynom p given by its coefficients (lowest exponent first),
+    see compose_linear.
+
+    Args:
+        coefs (List[float]): the coefficients of p
+        shift (float): the shift
+
+    Returns:
+        List[float]: the coefficients of the shifted polynom
+    """
+    return compose_linear(coefs, 1.0, shift)
+
+
+def quadratic_roots(c: float, b: float, a: float) -> List[float]:
+    """
+    Find the real roots of a*x^2 + b*x + c, a must not be 0.
+    Uses the numerically stable variant of the quadratic formula, which doesn't lose precision when b^2 is much bigger than 4ac.
+
+    Args:
+        c (float): the constant coefficient
+        b (float): the linear coefficient
+        a (float): the quadratic coefficient
+
+    Returns:
+        List[float]: the distinct real roots, sorted
+    """
+    disc = b*b - 4*a*c
+    if disc < 0:
+        return []
+    q = -0.5*(b + math.copysign(math.sqrt(disc), b))
+    if q == 0:
+        # b and c are 0
+        return [0.0]
+    x1 = q/a
+    x2 = c/q
+    if x1 == x2:
+        return [x1]
+    return [x1, x2] if x1 < x2 else [x2, x1]
+
+
+def refine_root(coefs: List[float], deriv: List[float], a: float, b: float, f_a: float, f_b: float) -> float:
+    """
+    Find the root of a polynom between a and b, where the polynom has different signs.
+    Uses newton's method, falling back to bisection whenever a newton step would leave the bracket or doesn't
+    at least halve the step size.
+
+    Args:
+        coefs (List[float]): the coefficients of the polynom
+        deriv (List[float]): the coefficients of its derivative
+        a (float): one end of the bracket
+        b (float): the other end of the bracket
+        f_a (float): the value at a
+        f_b (float): the value at b, must have the opposite sign of f_a
+
+    Returns:
+        float: the root
+    """
+    if f_a > 0:
+        # from now on the polynom is negative at a and positive at b
+        a, b = b, a
+    x = 0.5*(a + b)
+    step = old_step = abs(b - a)
+    f_x = horner(coefs, x)
+    df_x = horner(deriv, x)
+    for _ in range(200):
+        if f_x == 0:
+            return x
+        if f_x < 0:
+            a = x
+        else:
+            b = x
+        next_x = x - f_x/df_x if df_x != 0 else x
+        if not min(a, b) < next_x < max(a, b) or abs(2*f_x) > abs(old_step*df_x):
+            next_x = 0.5*(a + b)
+        old_step = step
+        step = abs(next_x - x)
+        x = next_x
+        if step <= 1e-13*max(1.0, abs(x)):
+            return x
+        f_x = horner(coefs, x)
+        df_x = horner(deriv, x)
+    return x
+
+
+def root_bound(coefs: List[float]) -> float:
+    """
+    Get a bound for the absolute value of all complex roots of a polynom (Fujiwara's bound)
+
+    Args:
+        coefs (List[float]): the coefficients, lowest exponent first, the last one must not be 0
+
+    Returns:
+        float: the bound
+    """
+    degree = len(coefs) - 1
+    lead = abs(coefs[-1])
+    bound = (abs(coefs[0])/(2*lead))**(1/degree)
+    for i in range(1, degree):
+        bound = max(bound, (abs(coefs[degree - i])/lead)**(1/i))
+    return 2*bound
+
+
+def iter_real_roots(coefs: List[float], min_x: float, max_x: float) -> Iterator[float]:
+    """
+    Find the distinct real roots of a polynom in the window min_x < x <= max_x, in increasing order.
+    Degree 1 and 2 are solved directly. Up to max_isolation_degree the roots of the derivative (found the same way, recursively)
+    split the window into parts where the polynom is monotonic, each of them contains a root exactly if the polynom changes
+    its sign. The roots are generated lazily, so a caller only looking for the first root doesn't pay for the others.
+    Higher degrees are solved with numpy.
+
+    Args:
+        coefs (List[float]): the coefficients, lowest exponent first
+        min_x (float): the lower end of the window (exclusive)
+        max_x (float): the upper end of the window (inclusive), may be infinite
+
+    Returns:
+        Iterator[float]: the roots
+    """
+    degree = len(coefs) - 1
+    while degree > 0 and coefs[degree] == 0:
+        degree -= 1
+    if degree <= 0:
+        return
+    coefs = coefs[:degree + 1]
+    if degree == 1:
+        root = -coefs[0]/coefs[1]
+        if min_x < root <= max_x:
+            yield root
+        return
+    if degree == 2:
+        for root in quadratic_roots(coefs[0], coefs[1], coefs[2]):
+            if min_x < root <= max_x:
+                yield root
+        return
+    if degree > max_isolation_degree:
+        deriv = deriv_coefs(coefs)
+        real_roots = []
+        for root in polyroots(coefs):
+            if root.imag != 0:
+                continue
+            x = float(root.real)
+            # the eigenvalues lose precision for high degrees, polish them with newton steps
+            for _ in range(polish_steps):
+                df_x = horner(deriv, x)
+                if df_x == 0:
+                    break
+                x -= horner(coefs, x)/df_x
+            if min_x < x <= max_x:
+                real_roots.append(x)
+        yield from sorted(real_roots)
+        return
+    # all roots lie inside the bound, so the window can be made finite
+    bound = root_bound(coefs)
+    min_x = max(min_x, -bound)
+    max_x = min(max_x, bound)
+    if min_x >= max_x:
+        return
+    deriv = deriv_coefs(coefs)
+    prev_x = min_x
+    prev_y = horner(coefs, min_x)
+    for x in chain(iter_real_roots(deriv, min_x, max_x), (max_x,)):
+        if x <= prev_x:
+            continue
+        y = horner(coefs, x)
+        if y == 0:
+            yield x
+        elif (prev_y < 0 < y) or (y < 0 < prev_y):
+            yield refine_root(coefs, deriv, prev_x, x, prev_y, y)
+        prev_x = x
+        prev_y = y
+
+
+def find_roots(coefs: List[float], min_x: float = 0.000001, filter_fn: Optional[Callable[[float], bool]] = None,
+               max_x: float = math.inf, first_only: bool = False) -> List[float]:
+    """
+    find the real roots of a polynom given by its coefficients in the window min_x < x <= max_x, see iter_real_roots
+
+    Args:
+        coefs (List[float]): the coefficients, lowest exponent first
+        min_x (float, optional): minimum x value for the roots (exclusive). Defaults to 0.000001.
+        filter_fn (Optional[Callable[[float], bool]], optional): a function to filter the roots. Defaults to None.
+        max_x (float, optional): maximum x value for the roots. Defaults to infinity.
+        first_only (bool, optional): stop at the first root that passes filter_fn. Defaults to False.
+
+    Returns:
+        List[float]: the roots, sorted
+    """
+    roots = []
+    for root in iter_real_roots(coefs, min_x, max_x):
+        if filter_fn is None or filter_fn(root):
+            roots.append(root)
+            if first_only:
+                break
+    return roots
+
+
+def coefs_range(coefs: List[float], min_x: float, max_x: float) -> SimpleInterval:
+    """
+    Get the smallest and biggest value of a polynom given by its coefficients for min_x <= x <= max_x
+
+    Args:
+        coefs (List[float]): the coefficients, lowest exponent first
+        min_x (float): the start of the range
+        max_x (float): the end of the range, must be finite
+
+    Returns:
+        SimpleInterval: the values the polynom takes in the range
+    """
+    values = [horner(coefs, min_x), horner(coefs, max_x)]
+    # the extreme values are at the ends or where the derivative is 0
+    deriv = deriv_coefs(coefs)
+    values.extend(horner(coefs, x) for x in iter_real_roots(deriv, min_x, max_x))
+    return SimpleInterval(min(values), max(values))
+
+
+def trim_coefs(coefs: List[float]) -> List[float]:
+    """
+    Remove zero coefficients of the highest exponents, keeps at least one coefficient (like numpy does after adding or
+    multiplying)
+    """
+    end = len(coefs)
+    while end > 1 and coefs[end - 1] == 0:
+        end -= 1
+    return coefs[:end]
+
+
+def make_polynom(coefs: Sequence[float]) -> Union[SmallPolynom, Polynom]:
+    """
+    Get a SmallPolynom if the degree is at most max_small_degree, a Polynom otherwise
+    """
+    if len(coefs) <= max_small_degree + 1:
+        return SmallPolynom(coefs)
+    return Polynom(coefs)
+
 
 class Polynom(NpPoly):
     """
@@ -13,24 +338,49 @@ class Polynom(NpPoly):
     It used to be implemented by myself, but I switched to numpy.polynomial.Polynomial because it is faster.
     To those interested, the old implementation is still in the comments.
     """
-    def find_roots(self, min_x: float = 0.000001, filter_fn: Optional[Callable[[float], bool]] = None, sort: bool = True) -> List[float]:
+    def find_roots(self, min_x: float = 0.000001, filter_fn: Optional[Callable[[float], bool]] = None, sort: bool = True,
+                   max_x: float = math.inf, first_only: bool = False) -> List[float]:
         """
-        find roots using numpy
+        find the real roots in the window min_x < x <= max_x, see iter_real_roots
 
         Args:
-            min_x (float, optional): minimum x value for the roots. Defaults to 0.0.
+            min_x (float, optional): minimum x value for the roots (exclusive). Defaults to 0.000001.
             filter_fn (Optional[Callable[[float], bool]], optional): a function to filter the roots. Defaults to None.
-            sort (bool, optional): wether to sort the roots. Defaults to True.
+            sort (bool, optional): unused, the roots are always sorted. Defaults to True.
+            max_x (float, optional): maximum x value for the roots. Defaults to infinity.
+            first_only (bool, optional): stop at the first root that passes filter_fn. Defaults to False.
+
+        Returns:
+            List[float]: the roots, sorted
         """
-        roots = self.roots()
-        roots = list(filter(np.isreal, roots))
-        roots = np.real(roots)
-        roots = list(filter(lambda x: x>min_x, roots))
-        if sort:
-            roots.sort()
-        if filter_fn is not None:
-            roots = list(filter(filter_fn, roots))
-        return roots
+        return find_roots(self.coef.tolist(), min_x, filter_fn, max_x, first_only)
+    def get_range(self, min_x: float, max_x: float) -> SimpleInterval:
+        """
+        Get the smallest and biggest value of the polynom for min_x <= x <= max_x
+
+        Args:
+            min_x (float): the start of the range
+            max_x (float): the end of the range, must be finite
+
+        Returns:
+            SimpleInterval: the values the polynom takes in the range
+        """
+        return coefs_range(self.coef.tolist(), min_x, max_x)
+
+    def get_coefs(self) -> List[float]:
+        """
+        Returns the coefficients as a list, lowest exponent first
+        """
+        return self.coef.tolist()
+
+    def _get_coefficients(self, other):
+        """
+        Used by numpy for the coefficients of the other operand of +, - and *, SmallPolynoms are used like Polynoms
+        """
+        if isinstance(other, SmallPolynom):
+            return np.array(other.coefs)
+        return super()._get_coefficients(other)
+
     def apply(self, x):
         """
         Returns the value of the polynom at x
@@ -338,3 +688,156 @@ class Polynom(NpPoly):
     #             yb = ym
     #         i += 1
     #     return b
+
+
+class SmallPolynom:
+    """
+    A polynom of a low degree, stored as a tuple of float coefficients starting with the lowest exponent.
+    Ball trajectories are at most quadratic, for them the numpy Polynomial spends most of its time on checks and allocating
+    small arrays. The operations here give the same coefficients as numpy (including removing zero coefficients of the
+    highest exponents), results of a degree above max_small_degree and operations with Polynoms give Polynoms.
+
+    Attributes:
+        - coefs (Tuple[float, ...]): the coefficients, lowest exponent first
+    """
+    coefs: Tuple[float, ...]
+    __slots__ = ("coefs",)
+
+    def __init__(self, coefs: Sequence[float]):
+        self.coefs = tuple(float(coef) for coef in coefs) or (0.0,)
+
+    def to_polynom(self) -> Polynom:
+        return Polynom(self.coefs)
+
+    def get_coefs(self) -> List[float]:
+        """
+        Returns the coefficients as a list, lowest exponent first
+        """
+        return list(self.coefs)
+
+    def __add__(self, other) -> Union[SmallPolynom, Polynom]:
+        if isinstance(other, SmallPolynom):
+            short, long = sorted((self.coefs, other.coefs), key=len)
+            coefs = [a + b for a, b in zip(long, short)] + list(long[len(short):])
+        elif isinstance(other, Polynom):
+            return self.to_polynom() + other
+        else:
+            coefs = list(self.coefs)
+            coefs[0] = coefs[0] + other
+        return SmallPolynom(trim_coefs(coefs))
+
+    def __radd__(self, other) -> Union[SmallPolynom, Polynom]:
+        return self + other
+
+    def __neg__(self) -> SmallPolynom:
+        return SmallPolynom([-coef for coef in self.coefs])
+
+    def __sub__(self, other) -> Union[SmallPolynom, Polynom]:
+        if isinstance(other, SmallPolynom):
+            coefs = list(self.coefs) + [0.0]*(len(other.coefs) - len(self.coefs))
+            for i, coef in enumerate(other.coefs):
+                coefs[i] = coefs[i] - coef
+        elif isinstance(other, Polynom):
+            return self.to_polynom() - other
+        else:
+            coefs = list(self.coefs)
+            coefs[0] = coefs[0] - other
+        return SmallPolynom(trim_coefs(coefs))
+
+    def __rsub__(self, other) -> Union[SmallPolynom, Polynom]:
+        return (-self) + other
+
+    def __mul__(self, other) -> Union[SmallPolynom, Polynom]:
+        if isinstance(other, SmallPolynom):
+            coefs = [0.0]*(len(self.coefs) + len(other.coefs) - 1)
+            for i, a in enumerate(self.coefs):
+                for j, b in enumerate(other.coefs):
+                    coefs[i + j] += a*b
+            return make_polynom(trim_coefs(coefs))
+        if isinstance(other, Polynom):
+            return self.to_polynom()*other
+        # adding 0.0 like numpy's convolution does, so -0.0 becomes 0.0
+        return SmallPolynom(trim_coefs([coef*other + 0.0 for coef in self.coefs]))
+
+    def __rmul__(self, other) -> Union[SmallPolynom, Polynom]:
+        return self*other
+
+    def __pow__(self, exponent: int) -> Union[SmallPolynom, Polynom]:
+        result: Union[SmallPolynom, Polynom] = SmallPolynom([1.0])
+        for _ in range(exponent):
+            result = result*self
+        return result
+
+    def apply(self, x):
+        """
+        Returns the value of the polynom at x. If x is a polynom, this is the composition of both polynoms
+        """
+        return horner(self.coefs, x)
+
+    def deriv(self) -> SmallPolynom:
+        return SmallPolynom(deriv_coefs(self.coefs) or [0.0])
+
+    def find_roots(self, min_x: float = 0.000001, filter_fn: Optional[Callable[[float], bool]] = None, sort: bool = True,
+                   max_x: float = math.inf, first_only: bool = False) -> List[float]:
+        """
+        find the real roots in the window min_x < x <= max_x, see Polynom.find_roots
+        """
+        return find_roots(list(self.coefs), min_x, filter_fn, max_x, first_only)
+
+    def get_range(self, min_x: float, max_x: float) -> SimpleInterval:
+        """
+        Get the smallest and biggest value of the polynom for min_x <= x <= max_x, see Polynom.get_range
+        """
+        return coefs_range(list(self.coefs), min_x, max_x)
+
+    def get_json(self) -> Dict:
+        return {
+            "koefs": list(self.coefs)
+        }
+
+    def __str__(self) -> str:
+        return str(self.to_polynom())
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    # compare find_roots with filtering the roots numpy finds, for the degrees of the collision equations
+    random.seed(0)
+    # cubics with a leading coefficient close to 0, like (t-1)(t-2)(1+e*t), come from lines rotating very slowly
+    small_lead_cubics = [Polynom([2.0, -3.0 + 2*e, 1.0 - 3*e, e]) for e in [1e-8, 1e-9, 1e-10, -1e-8, -1e-9, -1e-10]]
+    for degree in [1, 2, 3, 4, 7]:
+        polys = [Polynom([random.uniform(-100, 100) for _ in range(degree + 1)]) for _ in range(2000)]
+        if degree == 3:
+            polys.extend(small_lead_cubics)
+        start = time.time()
+        numpy_roots = [sorted(float(r.real) for r in poly.roots() if np.isreal(r) and r.real > 0.000001) for poly in polys]
+        numpy_duration = time.time() - start
+        start = time.time()
+        own_roots = [poly.find_roots() for poly in polys]
+        duration = time.time() - start
+        for expected, found in zip(numpy_roots, own_roots):
+            assert len(expected) == len(found) and all(math.isclose(a, b, rel_tol=1e-6, abs_tol=1e-9) for a, b in zip(expected, found))
+        print(f"degree {degree}: numpy {numpy_duration:.4f}s, find_roots {duration:.4f}s")
+
+    # compare Polynom and SmallPolynom for the operations of Ball.update_bahn, Ball.get_vel_bahn, evaluating the trajectory
+    # and building the equation of a LinePath
+    operations: Dict[str, Callable[[type], object]] = {
+        "trajectory": lambda cls: -4.9*(cls([0, 1])**2) + 3.0*cls([0, 1]) + 1.5,
+        "deriv": lambda cls: cls([1.5, 3.0, -4.9]).deriv(),
+        "apply": lambda cls: cls([1.5, 3.0, -4.9]).apply(0.25),
+        "line": lambda cls: (cls([0, 1]) - 2.0)*0.5 + 1.0,
+        "coefs": lambda cls: cls([1.5, 3.0, -4.9]).get_coefs(),
+    }
+    for name, operation in operations.items():
+        durations = []
+        for cls in [Polynom, SmallPolynom]:
+            start = time.time()
+            for _ in range(20000):
+                operation(cls)
+            durations.append(time.time() - start)
+        # both have to give the same coefficients
+        results = [operation(cls) for cls in [Polynom, SmallPolynom]]
+        values = [result.get_coefs() if isinstance(result, (Polynom, SmallPolynom)) else result for result in results]
+        assert values[0] == values[1], f"{name}: {values}"
+        print(f"{name}: Polynom {durations[0]:.4f}s, SmallPolynom {durations[1]:.4f}s")
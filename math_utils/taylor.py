@@ -1,14 +1,39 @@
 """
 This module provides functions for calculating sine and cosine using Taylor series expansion.
+The coefficients are computed once per number of terms and kept in taylor_tables.
 
 Functions:
 - sin_taylor(k): Calculates the sine of x using Taylor series expansion up to the k-th term.
 - cos_taylor(k): Calculates the cosine of x using Taylor series expansion up to the k-th term.
+- rotation_coefs(angle, speed, k): The Taylor coefficients of cos and sin of a linearly changing angle.
+- taylor_order(speed, span, tolerance, min_k, max_k): The number of terms needed for a given error.
 """
 
 import math
+from typing import Dict, List, Tuple
 from math_utils.polynom import Polynom
 
+# the coefficients of sin and cos (lowest exponent first) for every number of terms that was used so far
+taylor_tables: Dict[int, Tuple[List[float], List[float]]] = {}
+
+
+def taylor_coefs(k: int) -> Tuple[List[float], List[float]]:
+    """
+    Get the coefficients of the Taylor series of sine and cosine around 0.0 up to the k-th term.
+    The lists are shared, they must not be changed.
+
+    Parameters:
+    - k (int): The number of terms.
+
+    Returns:
+    - Tuple[List[float], List[float]]: the coefficients of sine and of cosine, lowest exponent first
+    """
+    if k not in taylor_tables:
+        sin_coefs = [[0, 1, 0, -1][i % 4]/math.factorial(i) for i in range(k)]
+        cos_coefs = [[1, 0, -1, 0][i % 4]/math.factorial(i) for i in range(k)]
+        taylor_tables[k] = (sin_coefs, cos_coefs)
+    return taylor_tables[k]
+
 
 def sin_taylor(k):
     """
@@ -20,12 +45,7 @@ def sin_taylor(k):
     Returns:
     - sum (Polynom): The approximation of sine(x) using the Taylor series expansion.
     """
-    x = Polynom([0, 1])
-    sum = Polynom([0])
-    for i in range(k):
-        a = [0, 1, 0, -1][i % 4]
-        sum += (x**i)*(a/math.factorial(i))
-    return sum
+    return Polynom(taylor_coefs(k)[0] or [0])
 
 
 def cos_taylor(k):
@@ -38,9 +58,55 @@ def cos_taylor(k):
     Returns:
     - sum (Polynom): The approximation of cosine(x) using the Taylor series expansion.
     """
-    x = Polynom([0, 1])
-    sum = Polynom([0])
-    for i in range(k):
-        a = [1, 0, -1, 0][i % 4]
-        sum += (x**i)*(a/math.factorial(i))
-    return sum
+    return Polynom(taylor_coefs(k)[1] or [0])
+
+
+def rotation_coefs(angle: float, speed: float, k: int) -> Tuple[List[float], List[float]]:
+    """
+    Calculates the cosine and sine of angle + speed*t as polynoms in t.
+    Only speed*t is expanded into the Taylor series, the angle is used exactly, so only speed*t has to be small.
+
+    Parameters:
+    - angle (float): The angle at t = 0.
+    - speed (float): The change of the angle per time.
+    - k (int): The number of terms to include in the Taylor series expansion.
+
+    Returns:
+    - Tuple[List[float], List[float]]: the coefficients (in t, lowest exponent first) of the cosine and of the sine
+    """
+    sin_coefs, cos_coefs = taylor_coefs(k)
+    cos_a = math.cos(angle)
+    sin_a = math.sin(angle)
+    # cos(a + x) = cos(a)cos(x) - sin(a)sin(x), sin(a + x) = sin(a)cos(x) + cos(a)sin(x), with x = speed*t
+    cos_result = []
+    sin_result = []
+    factor = 1.0
+    for sin_coef, cos_coef in zip(sin_coefs, cos_coefs):
+        cos_result.append(factor*(cos_a*cos_coef - sin_a*sin_coef))
+        sin_result.append(factor*(sin_a*cos_coef + cos_a*sin_coef))
+        factor *= speed
+    return cos_result, sin_result
+
+
+def taylor_order(speed: float, span: float, tolerance: float, min_k: int, max_k: int) -> int:
+    """
+    Get the number of terms needed so sine and cosine of an angle changing with speed are off by at most tolerance
+    within span of the start of the expansion. Uses the bound |x|^k/k! of the remainder.
+
+    Parameters:
+    - speed (float): The change of the angle per time.
+    - span (float): The biggest distance from the center of the expansion.
+    - tolerance (float): The biggest error allowed.
+    - min_k (int): The smallest number of terms returned.
+    - max_k (int): The biggest number of terms returned, used if no smaller number is accurate enough.
+
+    Returns:
+    - int: the number of terms
+    """
+    x = abs(speed)*span
+    error = x**min_k/math.factorial(min_k)
+    k = min_k
+    while error > tolerance and k < max_k:
+        k += 1
+        error *= x/k
+    return k
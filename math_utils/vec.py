@@ -1,10 +1,13 @@
 from __future__ import annotations
 import math
 import numbers
-from typing import Generic, Self, Tuple, TypeVar
+from typing import Generic, Iterable, Iterator, Self, Tuple, TypeVar
 
-from math_utils.polynom import Polynom
-from math_utils.taylor import cos_taylor, sin_taylor
+import numpy as np
+from numpy.polynomial.polynomial import polyadd, polysub
+
+from math_utils.polynom import Polynom, SmallPolynom, make_polynom
+from math_utils.taylor import cos_taylor, rotation_coefs, sin_taylor
 
 T = TypeVar("T")
 
@@ -13,6 +16,8 @@ class Vec(Generic[T]):
     """
     A 2D vector. The coordinates can be of any type, but it is assumed it has normal number operations defined.
     If T is a polynom, the vector can be thought of as a function of time.
+    Hot numeric code should use the subclasses FloatVec (coordinates are floats) and Trajectory (coordinates are polynoms),
+    they skip the type checks of this class.
 
     Attributes:
         - x (T): The x coordinate of the vector.
@@ -23,6 +28,7 @@ class Vec(Generic[T]):
     """
     x: T
     y: T
+    __slots__ = ("x", "y")
 
     def __init__(self, x: T, y: T) -> None:
         self.x = x
@@ -68,8 +74,8 @@ class Vec(Generic[T]):
         """
         This can only be used if T is a polynom. It finds the vector at time v
         """
-        if isinstance(self.x, Polynom) and isinstance(self.y, Polynom):
-            return Vec(self.x.apply(v), self.y.apply(v))
+        if isinstance(self.x, (Polynom, SmallPolynom)) and isinstance(self.y, (Polynom, SmallPolynom)):
+            return FloatVec(self.x.apply(v), self.y.apply(v))
         else:
             raise ValueError("can only apply to Polynom")
 
@@ -77,8 +83,8 @@ class Vec(Generic[T]):
         """
         This can only be used if T is a polynom. It finds the derivative of the vector, meaning the velocity vector over time
         """
-        if isinstance(self.x, Polynom) and isinstance(self.y, Polynom):
-            return Vec(self.x.deriv(), self.y.deriv())
+        if isinstance(self.x, (Polynom, SmallPolynom)) and isinstance(self.y, (Polynom, SmallPolynom)):
+            return Trajectory(self.x.deriv(), self.y.deriv())
         else:
             raise ValueError("can only derive polynom")
 
@@ -133,6 +139,24 @@ class Vec(Generic[T]):
                               this_offset.x*math.sin(angle) + this_offset.y*math.cos(angle))
         return this_offset_rot + center
 
+    def rotate_linear(self, angle: float, speed: float, center: Vec, taylor_approx: int) -> Vec:
+        """
+        rotate self around center by the angle angle + speed*t "im Uhrzeigersinn". Only works if T is a polynom in t.
+        The rotation is approximated with the Taylor series of speed*t (see rotation_coefs) and composed directly
+        on the coefficients.
+        """
+        cos_coefs, sin_coefs = rotation_coefs(angle, speed, taylor_approx)
+        assert isinstance(self.x, (Polynom, SmallPolynom)) and isinstance(self.y, (Polynom, SmallPolynom))
+        offset_x = np.array(self.x.get_coefs(), dtype=float)
+        offset_y = np.array(self.y.get_coefs(), dtype=float)
+        offset_x[0] -= center.x
+        offset_y[0] -= center.y
+        rot_x = polysub(np.convolve(offset_x, cos_coefs), np.convolve(offset_y, sin_coefs))
+        rot_y = polyadd(np.convolve(offset_x, sin_coefs), np.convolve(offset_y, cos_coefs))
+        rot_x[0] += center.x
+        rot_y[0] += center.y
+        return Trajectory(make_polynom(rot_x), make_polynom(rot_y))
+
     def rotate_poly(self, angle: Polynom, center: Vec, taylor_approx: int) -> Vec:
         """
         rotate self around center by angle "im Uhrzeigersinn"
@@ -149,10 +173,185 @@ class Vec(Generic[T]):
 
     def as_tuple(self) -> Tuple[T, T]:
         return (self.x, self.y)
+
     def get_json(self) -> dict:
         if isinstance(self.x, numbers.Number) and isinstance(self.y, numbers.Number):
             return {"x": self.x, "y": self.y}
-        elif isinstance(self.x, Polynom) and isinstance(self.y, Polynom):
+        elif isinstance(self.x, (Polynom, SmallPolynom)) and isinstance(self.y, (Polynom, SmallPolynom)):
             return {"x": self.x.get_json(), "y": self.y.get_json()}
         else:
-            raise ValueError("can only get json of numbers or polynoms")
\ No newline at end of file
+            raise ValueError("can only get json of numbers or polynoms")
+
+class FloatVec(Vec[float]):
+    """
+    A 2D vector of floats. Does the same as Vec, but without checking the types of the coordinates.
+    Operations with other FloatVecs or numbers return FloatVecs, everything else is left to Vec.
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def from_vec(vec: Vec) -> FloatVec:
+        return FloatVec(float(vec.x), float(vec.y))
+
+    @staticmethod
+    def from_angle(angle: float) -> FloatVec:
+        return FloatVec(math.cos(angle), math.sin(angle))
+
+    def __add__(self, other: Vec):
+        if type(other) is FloatVec:
+            return FloatVec(self.x + other.x, self.y + other.y)
+        return Vec.__add__(self, other)
+
+    def __sub__(self, other: Vec):
+        if type(other) is FloatVec:
+            return FloatVec(self.x - other.x, self.y - other.y)
+        return Vec.__sub__(self, other)
+
+    def __mul__(self, other) -> Vec:
+        """
+        multiply the vector with a number, multiplying with a polynom gives a Trajectory
+        """
+        if isinstance(other, (float, int)):
+            return FloatVec(other*self.x, other*self.y)
+        if isinstance(other, (Polynom, SmallPolynom)):
+            return Trajectory(other*self.x, other*self.y)
+        return Vec.__mul__(self, other)
+
+    def get_angle(self) -> float:
+        angle = math.atan2(self.y, self.x)
+        if angle < 0:
+            angle += 2*math.pi
+        return angle
+
+    def magnitude(self) -> float:
+        return math.sqrt(self.x**2+self.y**2)
+
+    def normalize(self) -> FloatVec:
+        factor = 1/self.magnitude()
+        return FloatVec(factor*self.x, factor*self.y)
+
+    def decompose(self, other: Vec) -> Tuple[FloatVec, FloatVec]:
+        proj = self.project(other)
+        return (proj, FloatVec(self.x - proj.x, self.y - proj.y))
+
+    def project(self, other: Vec) -> FloatVec:
+        factor = (self.x*other.x + self.y*other.y)/(math.sqrt(other.x**2+other.y**2)**2)
+        return FloatVec(factor*other.x, factor*other.y)
+
+    def orhtogonal(self) -> FloatVec:
+        return FloatVec(-self.y, self.x)
+
+    def rotate(self, angle: float, center: Vec) -> FloatVec:
+        cos_a = math.cos(angle)
+        sin_a = math.sin(angle)
+        offset_x = self.x - center.x
+        offset_y = self.y - center.y
+        return FloatVec(offset_x*cos_a - offset_y*sin_a + center.x, offset_x*sin_a + offset_y*cos_a + center.y)
+
+
+class Trajectory(Vec[Polynom]):
+    """
+    A 2D vector of polynoms in the time t, like the path of a ball. Does the same as Vec, but without checking the types of
+    the coordinates. Adding or subtracting vectors and multiplying with numbers or polynoms keeps it a Trajectory.
+    """
+    __slots__ = ()
+
+    @staticmethod
+    def from_vec(vec: Vec[Polynom]) -> Trajectory:
+        return Trajectory(vec.x, vec.y)
+
+    def __add__(self, other: Vec):
+        return Trajectory(self.x + other.x, self.y + other.y)
+
+    def __sub__(self, other: Vec):
+        return Trajectory(self.x - other.x, self.y - other.y)
+
+    def __mul__(self, other) -> Trajectory:
+        assert not isinstance(other, Vec)
+        return Trajectory(other*self.x, other*self.y)
+
+    def apply(self, v) -> FloatVec:
+        """
+        The vector at time v
+        """
+        return FloatVec(self.x.apply(v), self.y.apply(v))
+
+    def deriv(self) -> Trajectory:
+        """
+        The derivative of the vector, meaning the velocity vector over time
+        """
+        return Trajectory(self.x.deriv(), self.y.deriv())
+
+
+class VecArray:
+    """
+    Many 2D float vectors stored in two numpy arrays, for operations on all points of a form at once (drawing, building
+    paths). Iterating over it or indexing it gives FloatVecs.
+
+    Attributes:
+        - xs (np.ndarray): the x coordinates
+        - ys (np.ndarray): the y coordinates
+    """
+    xs: np.ndarray
+    ys: np.ndarray
+    __slots__ = ("xs", "ys")
+
+    def __init__(self, xs: np.ndarray, ys: np.ndarray):
+        self.xs = xs
+        self.ys = ys
+
+    @staticmethod
+    def from_vecs(vecs: Iterable[Vec[float]]) -> VecArray:
+        """
+        Get the points of any iterable of vectors, VecArrays are returned as they are
+        """
+        if isinstance(vecs, VecArray):
+            return vecs
+        coords = np.array([(vec.x, vec.y) for vec in vecs], dtype=float).reshape(-1, 2)
+        return VecArray(coords[:, 0], coords[:, 1])
+
+    @staticmethod
+    def from_arc(center: Vec[float], radius: float, min_angle: float, max_angle: float, resolution: int) -> VecArray:
+        """
+        Get resolution points on the circle around center, from min_angle to max_angle (both included), so drawing them as
+        lines covers the whole arc. For a full circle the first and the last point are the same.
+        """
+        angles = np.linspace(min_angle, max_angle, resolution)
+        return VecArray(np.cos(angles)*radius + center.x, np.sin(angles)*radius + center.y)
+
+    def __len__(self) -> int:
+        return len(self.xs)
+
+    def __getitem__(self, i: int) -> FloatVec:
+        return FloatVec(float(self.xs[i]), float(self.ys[i]))
+
+    def __iter__(self) -> Iterator[FloatVec]:
+        return map(FloatVec, self.xs.tolist(), self.ys.tolist())
+
+    def __add__(self, other: Vec[float]) -> VecArray:
+        """
+        move all points by the vector other
+        """
+        return VecArray(self.xs + other.x, self.ys + other.y)
+
+    def __sub__(self, other: Vec[float]) -> VecArray:
+        return VecArray(self.xs - other.x, self.ys - other.y)
+
+    def __mul__(self, other: float) -> VecArray:
+        return VecArray(self.xs*other, self.ys*other)
+
+    def rotate(self, angle: float, center: Vec[float]) -> VecArray:
+        """
+        rotate all points around center by angle, like Vec.rotate
+        """
+        cos_a = math.cos(angle)
+        sin_a = math.sin(angle)
+        offset_x = self.xs - center.x
+        offset_y = self.ys - center.y
+        return VecArray(offset_x*cos_a - offset_y*sin_a + center.x, offset_x*sin_a + offset_y*cos_a + center.y)
+
+    def as_tuples(self) -> list:
+        """
+        The points as a list of (x, y) tuples, like pygame wants them
+        """
+        return list(zip(self.xs.tolist(), self.ys.tolist()))
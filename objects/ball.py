@@ -1,11 +1,15 @@
 import copy
-from typing import Tuple
+from typing import Optional, Tuple
 
 import pygame
 # from form import CircleForm#, TransformForm
 
-from math_utils.vec import Vec
-from math_utils.polynom import Polynom
+from math_utils.vec import FloatVec, Trajectory, Vec
+from math_utils.polynom import Polynom, SmallPolynom, make_polynom, shift_coefs
+from objects.material import Material
+
+# the material balls have when other balls bounce off them
+ball_material = Material(0.8, 0.95, 20, 1)
 
 
 class Ball:
@@ -14,13 +18,15 @@ class Ball:
 
     Attributes:
         - pos_0 (Vec[float]): The initial position of the ball
-        - bahn (Vec[Polynom]): The path of the ball, bahn(t) gives the position of the ball at time t, relative to start_t
+        - bahn (Trajectory): The path of the ball, bahn(t) gives the position of the ball at time t, relative to start_t
+        - vel_bahn (Optional[Trajectory]): The derivative of bahn, computed when it is first needed (see get_vel_bahn)
         - radius (float): The radius of the ball
         - color (Tuple[int]): The color of the ball
         - start_t (float): The time at which the ball last collided. Maybe rename?
     """
     pos_0: Vec[float]
-    bahn: Vec[Polynom]
+    bahn: Trajectory
+    vel_bahn: Optional[Trajectory]
     radius: float
     color: Tuple[int]
     start_t: float
@@ -37,8 +43,8 @@ class Ball:
         self.pos_0 = pos
         self.radius = radius
         self.color = color
-        self.vel_0 = Vec(0.0, 0.0)
-        self.acc = Vec(0.0, 0.0)
+        self.vel_0 = FloatVec(0.0, 0.0)
+        self.acc = FloatVec(0.0, 0.0)
         self.start_t = 0
         self.update_bahn()
 
@@ -63,7 +69,19 @@ class Ball:
         Returns:
             - Vec: velocity of the ball at time t
         """
-        return self.bahn.deriv().apply(t-self.start_t)
+        return self.get_vel_bahn().apply(t-self.start_t)
+
+    def get_vel_bahn(self) -> Trajectory:
+        """
+        Get the derivative of the path, it is only computed once for every path
+
+        Returns:
+            - Vec[Polynom]: velocity of the ball at time t, relative to start_t
+        """
+        if self.vel_bahn is None:
+            self.vel_bahn = self.bahn.deriv()
+        return self.vel_bahn
+
     def draw(self, t, screen):
         """
         Draw the ball at its position at time t
@@ -76,8 +94,9 @@ class Ball:
         """
         Recalculate the path of the ball
         """
-        t = Polynom([0, 1])
-        self.bahn = self.acc*0.5*(t**2)+self.vel_0*t+self.pos_0
+        t = SmallPolynom([0, 1])
+        self.bahn = Trajectory.from_vec(self.acc*0.5*(t**2)+self.vel_0*t+self.pos_0)
+        self.vel_bahn = None
 
     def with_acc(self, acc: Vec):
         """
@@ -111,7 +130,8 @@ class Ball:
         Make a copy of the ball with a different trajectory
         """
         new = copy.copy(self)
-        new.bahn = bahn
+        new.bahn = Trajectory.from_vec(bahn)
+        new.vel_bahn = None
         return new
 
     def with_start_t(self, start_t: float):
@@ -128,7 +148,7 @@ class Ball:
         """
         rel_t = t-self.start_t
         new_pos = self.get_pos(t)
-        new_vel = self.bahn.deriv().apply(rel_t)
+        new_vel = self.get_vel_bahn().apply(rel_t)
         print(f"new_pos: {new_pos}, new_vel: {new_vel}, rel_t: {rel_t}")
         return self.with_start_t(t).with_start_pos(new_pos).with_vel(new_vel)
 
@@ -140,16 +160,13 @@ class Ball:
             - CircleForm: A form representing the ball
         """
         # I have to do this here because of circular imports :(
-        from objects.material import Material
         from objects.forms.circleform import CircleForm
         from objects.forms.transformform import TransformForm
         
-        circle = CircleForm(Vec(0, 0), self.radius, material=Material(
-            0.8, 0.95, 20, 1), color=self.color)
-        t = Polynom([0, 1])
-        x = self.bahn.x.apply(t-self.start_t)
-        y = self.bahn.y.apply(t-self.start_t)
-        bahn = Vec(x, y)
+        circle = CircleForm(Vec(0, 0), self.radius, material=ball_material, color=self.color)
+        x = make_polynom(shift_coefs(self.bahn.x.get_coefs(), -self.start_t))
+        y = make_polynom(shift_coefs(self.bahn.y.get_coefs(), -self.start_t))
+        bahn = Trajectory(x, y)
         moving_circle = TransformForm(circle, bahn)
         return moving_circle
 
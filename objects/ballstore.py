@@ -0,0 +1,156 @@
+"""
+The trajectories of many balls stored as numpy arrays (struct of arrays), so collisions of all balls can be found together.
+Also contains the solver for collisions between balls, which works on the arrays directly instead of wrapping every ball
+in a form.
+"""
+from __future__ import annotations
+import math
+from typing import List, Tuple
+
+import numpy as np
+
+from collision.collision import BallCollision
+from math_utils.polybatch import eval_bahn, solve_circle_equations, square_coefs
+from math_utils.polynom import make_polynom
+from math_utils.vec import Trajectory
+from objects.ball import Ball, ball_material
+
+
+def pad_coefs(coefs: np.ndarray, length: int) -> np.ndarray:
+    """
+    Pad polynom coefficients with zeros to the given length
+
+    Raises:
+        - Exception: if the polynom has more coefficients
+    """
+    if len(coefs) > length:
+        raise Exception(f"polynom of degree {len(coefs) - 1} can't be batched")
+    return np.pad(np.asarray(coefs, dtype=float), (0, length - len(coefs)))
+
+
+class BallStore:
+    """
+    The trajectories of a list of balls as numpy arrays, the trajectories must be at most quadratic.
+
+    Attributes:
+        - balls (List[Ball]): the balls
+        - pos (np.ndarray): shape (n, 2), the position of each ball at its start time
+        - vel (np.ndarray): shape (n, 2), the velocity of each ball at its start time
+        - acc (np.ndarray): shape (n, 2), the acceleration of each ball
+        - start_t (np.ndarray): the start time of each ball
+        - radius (np.ndarray): the radius of each ball
+    """
+    balls: List[Ball]
+    pos: np.ndarray
+    vel: np.ndarray
+    acc: np.ndarray
+    start_t: np.ndarray
+    radius: np.ndarray
+
+    def __init__(self, balls: List[Ball]):
+        """
+        Store the trajectories of the balls
+
+        Args:
+            - balls: the balls, can_store must be True for all of them
+        """
+        self.balls = balls
+        coefs = np.array([[pad_coefs(ball.bahn.x.get_coefs(), 3), pad_coefs(ball.bahn.y.get_coefs(), 3)] for ball in balls]).reshape(-1, 2, 3)
+        self.pos = coefs[:, :, 0]
+        self.vel = coefs[:, :, 1]
+        self.acc = coefs[:, :, 2]*2
+        self.start_t = np.array([ball.start_t for ball in balls], dtype=float)
+        self.radius = np.array([ball.radius for ball in balls], dtype=float)
+
+    @staticmethod
+    def can_store(ball: Ball) -> bool:
+        """
+        Check if the trajectory of a ball is simple enough for the store, it must be at most quadratic
+        """
+        return len(ball.bahn.x.get_coefs()) <= 3 and len(ball.bahn.y.get_coefs()) <= 3
+
+    def __len__(self) -> int:
+        return len(self.balls)
+
+    def get_coefs(self) -> np.ndarray:
+        """
+        Get the coefficients of the trajectories, relative to the start time of each ball
+
+        Returns:
+            - np.ndarray: shape (n, 2, 3), the coefficients of the x and y coordinates of each ball, lowest exponent first
+        """
+        return np.stack([self.pos, self.vel, self.acc*0.5], axis=2)
+
+    def all_pairs(self) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Get the indices of all pairs of different balls, each pair once
+
+        Returns:
+            - Tuple[np.ndarray, np.ndarray]: the first and the second ball of each pair, the first index is smaller
+        """
+        return np.triu_indices(len(self), k=1)
+
+    def pair_collision_times(self, first: np.ndarray, second: np.ndarray) -> np.ndarray:
+        """
+        Find when pairs of balls collide first. Only times after both balls started are searched, before that the trajectory
+        of at least one of them isn't valid anymore. Balls collide when their distance is the sum of their radii and they move
+        towards each other.
+
+        Args:
+            - first: the index of the first ball of each pair
+            - second: the index of the second ball of each pair
+
+        Returns:
+            - np.ndarray: the (absolute) time of the first collision of each pair, infinity if they don't collide
+        """
+        if len(first) == 0:
+            return np.zeros(0)
+        origin = np.maximum(self.start_t[first], self.start_t[second])
+        coefs_first = self.get_coefs_at(first, origin)
+        coefs_second = self.get_coefs_at(second, origin)
+        # position of the first ball relative to the second one, shape (pairs, 2, 3)
+        rel = coefs_first - coefs_second
+        contact = self.radius[first] + self.radius[second]
+        coefs = square_coefs(rel[:, 0, :]) + square_coefs(rel[:, 1, :])
+        coefs[:, 0] -= contact**2
+        roots = solve_circle_equations(coefs)
+        pos_x, pos_y, vel_x, vel_y = eval_bahn(rel[:, 0, :], rel[:, 1, :], roots)
+        with np.errstate(invalid="ignore"):
+            # the balls have to move towards each other, the same as CollDirection.ALLOW_FROM_OUTSIDE
+            valid = (roots > 0.000001) & (pos_x*vel_x + pos_y*vel_y < 0)
+        times = np.where(valid, roots, math.inf).min(axis=1)
+        return origin + times
+
+    def get_coefs_at(self, balls: np.ndarray, origin: np.ndarray) -> np.ndarray:
+        """
+        Get the coefficients of the trajectories of some balls, with the given (absolute) time as time 0
+
+        Args:
+            - balls: the indices of the balls
+            - origin: the new time 0 for each of them
+
+        Returns:
+            - np.ndarray: shape (len(balls), 2, 3), see get_coefs
+        """
+        shift = (origin - self.start_t[balls])[:, None]
+        pos, vel, acc = self.pos[balls], self.vel[balls], self.acc[balls]
+        return np.stack([pos + vel*shift + acc*0.5*shift**2, vel + acc*shift, acc*0.5], axis=2)
+
+    def make_collision(self, first: int, second: int, time: float) -> BallCollision:
+        """
+        Build the collision of two balls found by pair_collision_times
+
+        Args:
+            - first: the index of the ball the collision belongs to
+            - second: the index of the other ball
+            - time: the absolute time of the collision
+
+        Returns:
+            - BallCollision: the collision, its time is relative to the start of the first ball
+        """
+        coefs = self.get_coefs_at(np.array([second]), self.start_t[first:first + 1])[0]
+        ball = self.balls[first]
+        # the trajectory of the other ball in the time of the first ball
+        other = Trajectory(make_polynom(coefs[0]), make_polynom(coefs[1]))
+        rel_bahn = ball.bahn - other
+        return BallCollision(time - ball.start_t, rel_bahn, int(second), ball_material)
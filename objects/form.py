@@ -1,7 +1,9 @@
 from __future__ import annotations
+import math
 from typing import Callable, Dict, List, Optional
 from math_utils.angle import angle_distance, calc_angle_between, normalize_angle
 from objects.ball import Ball
+from math_utils.bounding_box import BoundingBox, get_swept_bound, union_bounds
 from collision.coll_direction import CollDirection
 from collision.collision import RotatedCollision, TimedCollision
 from math_utils.interval import SimpleInterval
@@ -35,9 +37,34 @@ class Form(ABC):
         pass
 
     @abstractmethod
-    def find_collision(self, ball: Ball):
+    def find_collision(self, ball: Ball, max_t: float = math.inf):
+        """
+        Find the first collision of the ball with the form. This must be implemented by forms.
+
+        Args:
+            - ball: ball to check for collision
+            - max_t: time horizon relative to ball.start_t, usually the earliest collision found so far.
+              Collisions after it don't have to be found, but returning one is not an error.
+
+        Returns:
+            - Collision: first collision of the ball with the form or None
+        """
         pass
 
+    def get_bound(self, min_t: float, max_t: float) -> Optional[BoundingBox]:
+        """
+        Get a box containing the form at every time between min_t and max_t, used to skip forms a ball can't reach.
+        Forms that don't know their extent return None, they are always checked.
+
+        Args:
+            - min_t: start of the time window (game time)
+            - max_t: end of the time window (game time), may be math.inf
+
+        Returns:
+            - Optional[BoundingBox]: the box or None
+        """
+        return None
+
     @abstractmethod
     def get_material(self) -> Material:
         """
@@ -88,33 +115,50 @@ class StaticForm(Form):
     paths: List[Path]
     on_collision: List[str]
     do_reflect: bool
+    bound: Optional[BoundingBox]
 
     def __init__(self, paths: List[Path], on_collision: List[str], do_reflect: bool = True):
         self.paths = paths
         self.on_collision = on_collision
         self.do_reflect = do_reflect
+        self.bound = union_bounds(path.bound for path in paths)
+
+    def get_bound(self, min_t: float, max_t: float) -> Optional[BoundingBox]:
+        return self.bound
 
-    def find_collision(self, ball: Ball):
+    def find_collision(self, ball: Ball, max_t: float = math.inf):
         """
         Find the first collision of the ball with the form.
+        Every collision found shrinks the horizon for the remaining paths, so they only look for earlier collisions.
+        If the horizon is finite, paths whose bounding box doesn't overlap the box swept by the ball are skipped.
 
         Args:
             - ball: ball to check for collision
+            - max_t: time horizon relative to ball.start_t
 
         Returns:
             - Collision: first collision of the ball with the form
         """
         # print("finding collision for abstract form")
         first_coll = None
+        ball_bound = None
         for path in self.paths:
             # print(f"checking path: {path}")
-            coll = path.find_collision(ball)
+            if max_t != math.inf:
+                if ball_bound is None:
+                    ball_bound = get_swept_bound(ball.bahn, 0.0, max_t)
+                if not path.bound.overlaps(ball_bound):
+                    continue
+            coll = path.find_collision(ball, max_t)
             if coll is None:
                 # print("no collision")
                 continue
 
             if first_coll is None or coll.get_coll_t() < first_coll.get_coll_t():
                 first_coll = coll
+                max_t = min(max_t, coll.get_coll_t())
+                # the horizon shrank, so the swept box has to be recomputed
+                ball_bound = None
                 # print(f"new first collision: {first_coll}")
         return first_coll
 
@@ -0,0 +1,152 @@
+"""
+A uniform grid over the bounding boxes of forms, used by the FormHandler to find the forms a ball can reach
+without checking every form of the level.
+"""
+from __future__ import annotations
+import math
+from typing import Dict, Iterator, List, Optional, Set, Tuple
+
+from math_utils.bounding_box import BoundingBox
+from objects.form import Form
+
+# side length of the grid cells, in the same units as the level
+cell_size = 100.0
+
+
+class FormGrid:
+    """
+    Uniform grid that maps every cell to the forms whose bounding box touches it.
+    Forms without a bounding box (for example moving balls) are kept in a separate dict and returned by every query.
+    Forms are added and removed one at a time, so the grid never has to be rebuilt.
+
+    Attributes:
+        - cell_size (float): side length of the cells
+        - cells (Dict[Tuple[int, int], List[Form]]): the forms touching each cell
+        - unbounded (Dict[int, Form]): the forms (by id) without a bounding box
+        - entries (Dict[int, Tuple[Form, int, List[Tuple[int, int]]]]): for every form (by id) the form,
+          its insertion number and the cells it is stored in
+        - n_inserted (int): the number of forms inserted so far, used to return candidates in insertion order
+    """
+    cell_size: float
+    cells: Dict[Tuple[int, int], List[Form]]
+    unbounded: Dict[int, Form]
+    entries: Dict[int, Tuple[Form, int, List[Tuple[int, int]]]]
+    n_inserted: int
+
+    def __init__(self, size: Optional[float] = None):
+        """
+        Create an empty grid
+
+        Args:
+            - size: side length of the cells. Defaults to the module variable cell_size.
+        """
+        self.cell_size = cell_size if size is None else size
+        self.cells = {}
+        self.unbounded = {}
+        self.entries = {}
+        self.n_inserted = 0
+
+    def copy(self) -> FormGrid:
+        """
+        Copy of the grid that can be changed without changing this grid. The forms are not copied.
+
+        Returns:
+            FormGrid: the copy
+        """
+        new = FormGrid(self.cell_size)
+        new.cells = {cell: list(forms) for cell, forms in self.cells.items()}
+        new.unbounded = dict(self.unbounded)
+        new.entries = dict(self.entries)
+        new.n_inserted = self.n_inserted
+        return new
+
+    def __len__(self) -> int:
+        return len(self.entries)
+
+    def __contains__(self, form: Form) -> bool:
+        return id(form) in self.entries
+
+    def get_cells(self, bound: BoundingBox) -> Iterator[Tuple[int, int]]:
+        """
+        Get the cells a box touches
+
+        Args:
+            - bound: the box
+
+        Returns:
+            Iterator[Tuple[int, int]]: the cell coordinates
+        """
+        min_x = math.floor(bound.x_range.min/self.cell_size)
+        max_x = math.floor(bound.x_range.max/self.cell_size)
+        min_y = math.floor(bound.y_range.min/self.cell_size)
+        max_y = math.floor(bound.y_range.max/self.cell_size)
+        for x in range(min_x, max_x + 1):
+            for y in range(min_y, max_y + 1):
+                yield (x, y)
+
+    def count_cells(self, bound: BoundingBox) -> int:
+        """
+        Get the number of cells a box touches
+        """
+        n_x = math.floor(bound.x_range.max/self.cell_size) - math.floor(bound.x_range.min/self.cell_size) + 1
+        n_y = math.floor(bound.y_range.max/self.cell_size) - math.floor(bound.y_range.min/self.cell_size) + 1
+        return n_x*n_y
+
+    def insert(self, form: Form, bound: Optional[BoundingBox]):
+        """
+        Add a form to the grid
+
+        Args:
+            - form: the form
+            - bound: a box containing the form at all times, None if the form can't be bounded
+        """
+        if form in self:
+            self.remove(form)
+        cells = [] if bound is None else list(self.get_cells(bound))
+        if bound is None:
+            self.unbounded[id(form)] = form
+        for cell in cells:
+            self.cells.setdefault(cell, []).append(form)
+        self.entries[id(form)] = (form, self.n_inserted, cells)
+        self.n_inserted += 1
+
+    def remove(self, form: Form):
+        """
+        Remove a form from the grid, does nothing if the form is not in the grid
+
+        Args:
+            - form: the form
+        """
+        entry = self.entries.pop(id(form), None)
+        if entry is None:
+            return
+        self.unbounded.pop(id(form), None)
+        for cell in entry[2]:
+            forms = self.cells[cell]
+            forms.remove(form)
+            if len(forms) == 0:
+                del self.cells[cell]
+
+    def query(self, bound: Optional[BoundingBox]) -> List[Form]:
+        """
+        Get the forms that may overlap a box, in the order they were inserted
+
+        Args:
+            - bound: the box, None to get all forms
+
+        Returns:
+            List[Form]: the candidate forms
+        """
+        if bound is None or self.count_cells(bound) >= len(self.cells):
+            # the box covers most of the grid, looking at every cell is cheaper
+            found = list(self.entries.values())
+        else:
+            seen: Set[int] = set(self.unbounded.keys())
+            found = [self.entries[form_id] for form_id in self.unbounded]
+            for cell in self.get_cells(bound):
+                for form in self.cells.get(cell, ()):
+                    if id(form) not in seen:
+                        seen.add(id(form))
+                        found.append(self.entries[id(form)])
+        found.sort(key=lambda entry: entry[1])
+        return [entry[0] for entry in found]
@@ -1,21 +1,46 @@
 from __future__ import annotations
-from typing import Dict, List, Optional
+from typing import Dict, List, Optional, Set
 import copy
+import math
+from math_utils.bounding_box import get_swept_bound
 from objects.ball import Ball
 
 from objects.form import Form
+from objects.formgrid import FormGrid
 from objects.path import Path
+from objects.staticgeometry import StaticGeometry
+
+# if True, find_collision checks the forms near the ball first, found with a FormGrid
+use_grid = True
+# the first time window (relative to the start of the ball) whose forms are checked, it is doubled until it reaches the horizon
+initial_window = 0.5
+# windows longer than this are not used, the remaining forms are checked in one step
+max_window = 1024.0
+# if True, the static forms are compiled into a StaticGeometry (see compile), which find_collision checks in one loop
+use_geometry = True
 
 
 class FormHandler:
     """
     Handels all forms in the game
+
+    Member Variables:
+        - forms (List[Form]): the forms without a name
+        - named_forms (Dict[str, Form]): the forms that can be changed by name
+        - hidden_forms (Dict[str, Form]): forms which are not drawn or checked for collision
+        - grid (FormGrid): spatial index over forms and named_forms
+        - grid_shared (bool): True if the grid is shared with a copy of this handler, it has to be copied before it is changed
+        - geometry (Optional[StaticGeometry]): the compiled paths of the static forms, built by compile or when it is first
+          needed and dropped when they change
     """
     forms: List[Form]
     named_forms: Dict[str, Form]
     hidden_forms: Dict[str, Form]
+    grid: FormGrid
+    grid_shared: bool
+    geometry: Optional[StaticGeometry]
 
-    def __init__(self, forms: Optional[List[Form]] = None, named_forms: Optional[Dict[str, Form]] = None, hidden_forms: Optional[Dict[str, Form]] = None):
+    def __init__(self, forms: Optional[List[Form]] = None, named_forms: Optional[Dict[str, Form]] = None, hidden_forms: Optional[Dict[str, Form]] = None, grid: Optional[FormGrid] = None):
         """
         initializes the formhandler
 
@@ -23,6 +48,7 @@ class FormHandler:
             - forms (List[Form], optional): list of forms. Defaults to None.
             - named_forms (Dict[str, Form], optional): dict of named forms. Defaults to None.
             - hidden_forms (Dict[str, Form], optional): Dict of Forms which are not drawn or checked for collision. Can be used to store forms which are not used at the moment. Defaults to None.
+            - grid (FormGrid, optional): an existing grid containing exactly forms and named_forms, it is shared and not changed. Defaults to None.
         """
         if forms is None:
             forms = []
@@ -33,15 +59,84 @@ class FormHandler:
         self.forms = forms
         self.named_forms = named_forms
         self.hidden_forms = hidden_forms
+        self.geometry = None
+        if grid is not None:
+            self.grid = grid
+            self.grid_shared = True
+            return
+        self.grid = FormGrid()
+        self.grid_shared = False
+        for form in forms + list(named_forms.values()):
+            self.index_form(form)
 
     def copy(self) -> FormHandler:
         """
-        shallow copy of the formhandler
+        shallow copy of the formhandler. The grid is shared until one of the handlers changes its forms.
 
         Returns:
             FormHandler: the cloned formhandler
         """
-        return FormHandler(copy.copy(self.forms), copy.copy(self.named_forms), copy.copy(self.hidden_forms))
+        new = FormHandler(copy.copy(self.forms), copy.copy(self.named_forms), copy.copy(self.hidden_forms), grid=self.grid)
+        new.geometry = self.geometry
+        self.grid_shared = True
+        return new
+
+    def own_grid(self) -> FormGrid:
+        """
+        Get the grid for changing it, copies it first if it is shared with another handler
+
+        Returns:
+            FormGrid: the grid
+        """
+        if self.grid_shared:
+            self.grid = self.grid.copy()
+            self.grid_shared = False
+        return self.grid
+
+    def index_form(self, form: Form):
+        """
+        Add a form to the grid, using the box that contains it at all times
+
+        Args:
+            form (Form): the form
+        """
+        self.own_grid().insert(form, form.get_bound(-math.inf, math.inf))
+        if StaticGeometry.can_compile(form):
+            self.geometry = None
+
+    def unindex_form(self, form: Form):
+        """
+        Remove a form from the grid
+
+        Args:
+            form (Form): the form
+        """
+        self.own_grid().remove(form)
+        if StaticGeometry.can_compile(form):
+            self.geometry = None
+
+    def compile(self) -> StaticGeometry:
+        """
+        Compile the paths of the static forms into a StaticGeometry, done once the level is loaded.
+        The geometry is compiled again when it is needed after a static form was added or removed.
+
+        Returns:
+            StaticGeometry: the geometry
+        """
+        self.geometry = StaticGeometry([form for form in self.forms + list(self.named_forms.values())
+                                        if StaticGeometry.can_compile(form)])  # type: ignore
+        return self.geometry
+
+    def get_geometry(self) -> StaticGeometry:
+        """
+        Get the compiled static forms, compiles them if necessary
+
+        Returns:
+            StaticGeometry: the geometry
+        """
+        if self.geometry is None:
+            return self.compile()
+        return self.geometry
 
     def add_form(self, form: Form):
         """Adds a form to the formhandler
@@ -50,6 +145,7 @@ class FormHandler:
             form (Form): the form to add
         """
         self.forms.append(form)
+        self.index_form(form)
 
     def set_named_form(self, name: str, form: Form):
         """Sets a named form
@@ -58,7 +154,10 @@ class FormHandler:
             name (str): the name of the form
             form (Form): the form to set
         """
+        if name in self.named_forms:
+            self.unindex_form(self.named_forms[name])
         self.named_forms[name] = form
+        self.index_form(form)
     
     def set_hidden_form(self, name, form: Form):
         self.hidden_forms[name] = form
@@ -81,12 +180,15 @@ class FormHandler:
 
     def remove_named_form(self, name: str):
         print(f"removing named form {name}, forms: {self.named_forms}")
+        self.unindex_form(self.named_forms[name])
         del self.named_forms[name]
     def hide_named_form(self, name: str):
         self.hidden_forms[name] = self.named_forms[name]
+        self.unindex_form(self.named_forms[name])
         del self.named_forms[name]
     def show_named_form(self, name: str):
         self.named_forms[name] = self.hidden_forms[name]
+        self.index_form(self.named_forms[name])
         del self.hidden_forms[name]
     def draw(self, screen, color, time: float):
         """Draws all forms in this formhandler"""
@@ -95,29 +197,121 @@ class FormHandler:
         for name, form in self.named_forms.items():
             form.draw(screen, color, time)
 
-    def find_collision(self, ball: Ball, ignore: List[Form] = []):
+    def find_collision(self, ball: Ball, ignore: List[Form] = [], max_t: float = math.inf):
             """
             Finds the first collision between the given ball and the forms in the form handler.
+            If use_grid is set, the forms are checked in the order the ball reaches them: for growing time windows, starting with
+            initial_window, the forms the grid returns for the box swept by the ball in the window are checked, if they weren't
+            checked before. This makes the horizon shrink early, and once the window reaches the horizon no other form can collide.
+            Every form is checked at most once.
             
             Parameters:
             - ball (Ball): The ball object to check for collision.
             - ignore (List[Form]): A list of forms to ignore during collision detection.
+            - max_t (float): Only collisions up to this time (relative to ball.start_t) are searched for.
             
             Returns:
             - coll (Collision): The first collision found, or None if no collision occurs.
             """
+            if not use_grid:
+                return self.find_collision_in(self.forms + list(self.named_forms.values()), ball, ignore, max_t)
             first_coll = None
-            for form in self.forms + list(self.named_forms.values()):
+            checked: Set[int] = set()
+            window = initial_window
+            while True:
+                last = window >= max_t or window > max_window
+                if not last:
+                    bound = get_swept_bound(ball.bahn, 0.0, window)
+                elif max_t == math.inf:
+                    bound = None
+                else:
+                    # the last query has to cover everything up to the horizon, also when it stops at max_window
+                    bound = get_swept_bound(ball.bahn, 0.0, max_t)
+                candidates = [form for form in self.grid.query(bound) if id(form) not in checked]
+                checked.update(id(form) for form in candidates)
+                coll = self.find_collision_in(candidates, ball, ignore, max_t)
+                if coll is not None and (first_coll is None or coll.get_coll_t() < first_coll.get_coll_t()):
+                    first_coll = coll
+                    max_t = min(max_t, coll.get_coll_t())
+                if last:
+                    return first_coll
+                window *= 2
+
+    def find_collision_in(self, forms: List[Form], ball: Ball, ignore: List[Form], max_t: float):
+            """
+            Finds the first collision between the given ball and the given forms.
+            The earliest collision found so far is passed to the remaining forms as their time horizon.
+            Once the horizon is finite, forms whose bounding box doesn't overlap the box swept by the ball until the horizon are skipped.
+            If use_geometry is set, the compiled static forms are checked first, together (see StaticGeometry.find_collision).
+            
+            Parameters:
+            - forms (List[Form]): The forms to check.
+            - ball (Ball): The ball object to check for collision.
+            - ignore (List[Form]): A list of forms to ignore during collision detection.
+            - max_t (float): Only collisions up to this time (relative to ball.start_t) are searched for.
+            
+            Returns:
+            - coll (Collision): The first collision found, or None if no collision occurs.
+            """
+            first_coll = None
+            ball_bound = None
+            if use_geometry:
+                geometry = self.get_geometry()
+                compiled = [form for form in forms if geometry.contains(form) and form not in ignore]
+                if len(compiled) > 0:
+                    first_coll = geometry.find_collision(ball, compiled, max_t)
+                    if first_coll is not None:
+                        max_t = min(max_t, first_coll.get_coll_t())
+                forms = [form for form in forms if not geometry.contains(form)]
+            for form in forms:
                 if form in ignore:
                     continue
-                coll = form.find_collision(ball)
+                if max_t != math.inf:
+                    if ball_bound is None:
+                        ball_bound = get_swept_bound(ball.bahn, 0.0, max_t)
+                    form_bound = form.get_bound(ball.start_t, ball.start_t + max_t)
+                    if form_bound is not None and not form_bound.overlaps(ball_bound):
+                        continue
+                coll = form.find_collision(ball, max_t)
                 if coll is None:
                     continue
                 if first_coll is None or coll.get_coll_t() < first_coll.get_coll_t():
                     first_coll = coll
+                    max_t = min(max_t, coll.get_coll_t())
+                    ball_bound = None
                 else:
                     pass
                     # print(f"no reset, coll_t: {coll.get_coll_t()}, first_coll_t: {first_coll.get_coll_t()}")
             if first_coll is not None and False:
                 print(f"first_coll: {first_coll.get_coll_t()}")
             return first_coll
+
+
+if __name__ == "__main__":
+    import random
+    import time
+    from math_utils.vec import Vec
+    from objects.forms.lineform import LineForm
+    from objects.material import Material
+    # a closed table with a few hundred short lines, compare the linear scan with the grid and the compiled geometry
+    random.seed(0)
+    material = Material(1.0, 1.0, 0.0, 0.0)
+    corners = [Vec(0.0, 0.0), Vec(1000.0, 0.0), Vec(1000.0, 1000.0), Vec(0.0, 1000.0)]
+    table: List[Form] = [LineForm(corners[i], corners[(i + 1) % 4], 10, material) for i in range(4)]
+    for _ in range(300):
+        start = Vec(random.uniform(50, 950), random.uniform(50, 950))
+        table.append(LineForm(start, start + Vec(random.uniform(-20, 20), random.uniform(-20, 20)), 10, material))
+    handler = FormHandler(table)
+    balls = [Ball(Vec(random.uniform(50, 950), random.uniform(50, 950)), 10, (255, 255, 255))
+             .with_acc(Vec(0.0, 9.8)).with_vel(Vec(random.uniform(-300, 300), random.uniform(-300, 300))) for _ in range(100)]
+    results = {}
+    handler.compile()
+    for use_grid, use_geometry in [(False, False), (False, True), (True, False), (True, True)]:
+        start_time = time.time()
+        results[use_grid, use_geometry] = [handler.find_collision(ball) for ball in balls]
+        print(f"use_grid={use_grid}, use_geometry={use_geometry}: {time.time() - start_time:.3f}s")
+    for linear, *others in zip(*results.values()):
+        for other in others:
+            assert (linear is None) == (other is None)
+            if linear is not None and other is not None:
+                assert math.isclose(linear.get_coll_t(), other.get_coll_t())
@@ -8,7 +8,7 @@ from math_utils.angle import angle_distance, rad_to_deg
 from objects.material import Material
 from objects.form import Form, StaticForm
 from objects.path import Path, CirclePath
-from math_utils.vec import Vec
+from math_utils.vec import Vec, VecArray
 
 class CircleForm(StaticForm):
     """
@@ -21,7 +21,8 @@ class CircleForm(StaticForm):
         - max_angle (float): The maximum angle of the circle.
         - name (str): The name of the circle.
         - material (Material): The material of the circle.
-        - points (List[Tuple[float, float]]): The points of the circle. Used for drawing.
+        - point_array (VecArray): The points of the circle. Used for drawing.
+        - points (List[Tuple[float, float]]): The points of the circle as tuples, for pygame.
         - edges (List[Tuple[Vec, bool]]): The edges of the circle.
         - paths (List[Path]): The paths of the circle.
         - color (Tuple[float, float, float]): The color of the circle.
@@ -33,6 +34,7 @@ class CircleForm(StaticForm):
     name: str
     material: Material
 
+    point_array: VecArray
     points: List[Tuple[float, float]]
     edges: List[Tuple[Vec, bool]]
     paths: List[Path]
@@ -101,13 +103,8 @@ class CircleForm(StaticForm):
                              angle_b, CollDirection.ALLOW_FROM_OUTSIDE, "max_cap")
             self.paths.append(cap)
 
-        step_size = (self.max_angle - self.min_angle)/resolution
-        for i in range(resolution):
-            a_r = i*step_size + self.min_angle
-            x = math.cos(a_r)*self.radius + self.pos.x
-            y = math.sin(a_r)*self.radius + self.pos.y
-
-            self.points.append((x, y))
+        self.point_array = VecArray.from_arc(self.pos, self.radius, self.min_angle, self.max_angle, resolution)
+        self.points = self.point_array.as_tuples()
         # giving the paths to the Form class so that it can handle collisions
         super().__init__(self.paths, on_collision=on_collision, do_reflect=do_reflect)
 
@@ -118,7 +115,7 @@ class CircleForm(StaticForm):
             kante.draw(screen, color)
 
     def get_points(self, t):
-        return map(lambda p: Vec(p[0], p[1]), self.points)
+        return self.point_array
         # for kante in self.paths:
         # pygame.draw.circle(screen, color, kante, 50)
         #    kante.draw(screen, color)
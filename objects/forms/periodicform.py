@@ -3,13 +3,15 @@ This module contains the class PeriodicForm, which is a form that swaps between
 For example it can be used to make perpetual rotation, even when using a taylor series, by using a different form with a different taylor series for each part (for example each quarter) of the rotation.
 """
 from __future__ import annotations
-from typing import List, Tuple
+import math
+from typing import List, Optional, Tuple
+from math_utils.bounding_box import BoundingBox, union_bounds
 from collision.coll_direction import CollDirection
 from collision.collision import TimedCollision
 from objects.form import Form
 from objects.forms.polygonform import PolygonForm
 from objects.material import Material
-from math_utils.vec import Vec
+from math_utils.vec import Vec, VecArray
 from objects.path import Path
 from objects.ball import Ball
 
@@ -28,7 +30,7 @@ class PeriodicForm(Form):
         - __init__(forms: List[Tuple[Form, float]]): Initializes a PeriodicForm object.
         - get_form_nr(time: float) -> int: Returns the form number for a given time.
         - get_move_info(time: float) -> Tuple[Form, float, float]: Returns the form, start time, and end time for a given time.
-        - find_collision(ball: Ball, ignore: List[Path] = []) -> TimedCollision: Finds the collision between the periodic form and a ball.
+        - find_collision(ball: Ball, max_t: float = math.inf, ignore: List[Path] = []) -> TimedCollision: Finds the collision between the periodic form and a ball.
         - draw(screen, color, time: float): Draws the periodic form on the screen based on the current time.
         - get_name() -> str: Returns the name of the periodic form.
         - get_material() -> Material: Returns the material of the periodic form.
@@ -64,16 +66,19 @@ class PeriodicForm(Form):
             t = self.total_duration*i/1000
             form_nr = self.get_form_nr(t)
             form, duration = self.forms[form_nr]
-            points = form.get_points(t)
-            for point in points:
-                if min_x is None or point.x < min_x:
-                    min_x = point.x
-                if max_x is None or point.x > max_x:
-                    max_x = point.x
-                if min_y is None or point.y < min_y:
-                    min_y = point.y
-                if max_y is None or point.y > max_y:
-                    max_y = point.y
+            points = VecArray.from_vecs(form.get_points(t))
+            if len(points) == 0:
+                continue
+            points_min_x, points_max_x = float(points.xs.min()), float(points.xs.max())
+            points_min_y, points_max_y = float(points.ys.min()), float(points.ys.max())
+            if min_x is None or points_min_x < min_x:
+                min_x = points_min_x
+            if max_x is None or points_max_x > max_x:
+                max_x = points_max_x
+            if min_y is None or points_min_y < min_y:
+                min_y = points_min_y
+            if max_y is None or points_max_y > max_y:
+                max_y = points_max_y
         assert min_x is not None and min_y is not None and max_x is not None and max_y is not None
         # make the outline a bit bigger, to account for errors
         max_x *= 1.2
@@ -128,12 +133,13 @@ class PeriodicForm(Form):
             mov_start += duration
         raise ValueError("time is too big")
 
-    def find_collision(self, ball: Ball, ignore: List[Path] = []):
+    def find_collision(self, ball: Ball, max_t: float = math.inf, ignore: List[Path] = []):
         """
         Finds the collision between the periodic form and a ball.
 
         Args:
             - ball (Ball): The ball to check for collision.
+            - max_t (float, optional): The time horizon relative to ball.start_t.
             - ignore (List[Path], optional): A list of paths to ignore for collision detection.
 
         Returns:
@@ -149,20 +155,23 @@ class PeriodicForm(Form):
                 if mov_start > tmax:
                     #print("mov_start > tmax, breaking")
                     break
+                if mov_start - ball.start_t > max_t:
+                    # the movement starts after the horizon
+                    break
 
                 # find ot where the ball is at move_start
                 if mov_start > t0:
                     ball_at_move_start = ball.get_pos(mov_start)
-                    vel_at_move_start = ball.bahn.deriv().apply(mov_start - ball.start_t)
+                    vel_at_move_start = ball.get_vel_bahn().apply(mov_start - ball.start_t)
                     new_ball = ball.with_start_t(0.0).with_start_pos(
                         ball_at_move_start).with_vel(vel_at_move_start)
                 else:
                     ball_at_t0 = ball.get_pos(t0)
-                    vel_at_t0 = ball.bahn.deriv().apply(t0 - ball.start_t)
+                    vel_at_t0 = ball.get_vel_bahn().apply(t0 - ball.start_t)
                     new_ball = ball.with_start_t(t0-mov_start).with_start_pos(
                         ball_at_t0).with_vel(vel_at_t0)
                 # find the collision
-                coll = move_form.find_collision(new_ball)
+                coll = move_form.find_collision(new_ball, max_t - (new_ball.start_t + mov_start - ball.start_t))
 
                 if coll is None:
                     # TODO: find a better way to do this
@@ -177,6 +186,19 @@ class PeriodicForm(Form):
                 rel_coll_t = abs_coll_t - ball.start_t
                 return TimedCollision(coll, rel_coll_t)
 
+    def get_bound(self, min_t: float, max_t: float) -> Optional[BoundingBox]:
+        """
+        Get a box containing the form at any time, the union of the boxes of all subforms over their whole active time.
+
+        Args:
+            - min_t (float): start of the time window, not used
+            - max_t (float): end of the time window, not used
+
+        Returns:
+            - Optional[BoundingBox]: the box or None if a subform has no box
+        """
+        return union_bounds(form.get_bound(0.0, duration) for form, duration in self.forms)
+
     def draw(self, screen, color, time: float):
         """
         Draws the periodic form on the screen based on the current time.
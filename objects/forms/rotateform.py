@@ -3,15 +3,31 @@ This file contains the RotateForm class which can be used as a wrapper for a For
 """
 from __future__ import annotations
 import math
-from typing import List, Optional
+from typing import Optional
 import pygame
-from collision.collision import RotatedCollision
+from collision.collision import Collision, RotatedCollision, TimedCollision
 from math_utils.angle import rad_to_deg
-from math_utils.polynom import Polynom
+from math_utils.bounding_box import BoundingBox
+from math_utils.taylor import taylor_order
 from objects.ball import Ball
 from objects.form import Form
+from objects.forms.windowed import find_collision_windowed
 from objects.material import Material
-from math_utils.vec import Vec
+from math_utils.vec import Vec, VecArray
+
+# bounds for the number of terms, it is chosen from the length of the time window
+min_taylor_order = 2
+max_taylor_order = 8
+# the biggest error of sin and cos allowed when choosing the number of terms, it also sets the length of the time windows
+angle_tolerance = 1e-6
+
+
+def get_window_angle() -> float:
+    """
+    Get the biggest angle a form may turn in one time window, so max_taylor_order terms keep the error below angle_tolerance
+    """
+    return (angle_tolerance*math.factorial(max_taylor_order))**(1/max_taylor_order)
+
 
 class RotateForm(Form):
     """
@@ -66,37 +82,98 @@ class RotateForm(Form):
             return
         angle = self.start_angle + self.angle_speed*(time-self.start_time)
         #print(f"angle: {angle}")
-        pts = self.form.get_points(time)
-        pts_rotated = list(map(lambda p: p.rotate(
-            angle, self.center).as_tuple(), pts))
+        pts = VecArray.from_vecs(self.form.get_points(time))
+        pts_rotated = pts.rotate(angle, self.center).as_tuples()
         pygame.draw.lines(screen, color, False, pts_rotated, width=3)
         return
 
-    def find_collision(self, ball: Ball):
+    def find_collision(self, ball: Ball, max_t: float = math.inf):
         """
-        Find the first collision of the ball with the form by rotating the ball trajectory
+        Find the first collision of the ball with the form by rotating the ball trajectory.
+        The rotation is approximated by a Taylor series, which is only accurate for a short time. So the horizon is split into
+        windows the form turns at most get_window_angle() in, and they are solved in order (see find_collision_windowed).
+        The windows end once the ball can't reach the form anymore, if the ball stays in reach forever (it is at rest) the
+        search stops after max_windows windows.
 
         Args:
             - ball (Ball): The ball to check for collision
+            - max_t (float): The time horizon relative to ball.start_t
 
         Returns:
             - RotatedCollision: The first collision of the ball with the form. Using a RotatedCollision to store the angle of the form at the time of collision to rotate the reflection vector back
         """
-        # rotate the ball trajectory
-        t = Polynom([0, 1])
-        # rotate the ball trajectory
-        angle = (t-self.start_time+ball.start_t) * \
-            (-self.angle_speed)-self.start_angle # angle is a function of time
-        bahn = ball.bahn.rotate_poly(angle, self.center, 6)
+        if self.angle_speed == 0:
+            return self.find_collision_in_window(ball, 0.0, max_t)
+        window_length = get_window_angle()/abs(self.angle_speed)
+        return find_collision_windowed(self, ball, max_t, window_length, self.find_collision_in_window)
+
+    def find_collision_in_window(self, ball: Ball, shift: float, length: float) -> Optional[Collision]:
+        """
+        Find the first collision in a time window, the rotation is expanded around the start of the window
+
+        Args:
+            - ball (Ball): The ball, moved to the start of the window
+            - shift (float): The time the ball was moved by
+            - length (float): The length of the window
+
+        Returns:
+            - Optional[Collision]: The first collision, relative to the start of the ball before it was moved
+        """
+        # the ball trajectory is rotated by angle + speed*t, t relative to ball.start_t
+        angle = (ball.start_t-self.start_time)*(-self.angle_speed)-self.start_angle
+        bahn = ball.bahn.rotate_linear(angle, -self.angle_speed, self.center, self.get_taylor_order(length))
         # calculate the collision
-        coll = self.form.find_collision(ball.with_bahn(bahn))
+        coll = self.form.find_collision(ball.with_bahn(bahn), length)
         if coll is None:
             return None
         # calculate the objects angle at the time of collision
-        angle = self.start_angle + self.angle_speed*coll.get_coll_t()
+        angle = self.start_angle + self.angle_speed*(coll.get_coll_t()+ball.start_t-self.start_time)
+        if shift != 0:
+            coll = TimedCollision(coll, coll.get_coll_t()+shift)
         # return the collision. It is still in the rotated reference system, so the reflection vector has to be rotated back
         return RotatedCollision(coll, -angle)
 
+    def get_taylor_order(self, length: float) -> int:
+        """
+        Get the number of Taylor terms used for the rotation, the smallest number that keeps the error of sin and cos below
+        angle_tolerance. A form that doesn't turn is exact with any number of terms.
+
+        Args:
+            - length (float): The length of the time window, it has to be bounded if the form turns
+
+        Returns:
+            - int: the number of terms
+        """
+        if self.angle_speed == 0:
+            return min_taylor_order
+        if length == math.inf:
+            raise Exception("the rotation can't be expanded over an unbounded time window")
+        return taylor_order(self.angle_speed, length, angle_tolerance, min_taylor_order, max_taylor_order)
+
+    def get_bound(self, min_t: float, max_t: float) -> Optional[BoundingBox]:
+        """
+        Get a box containing the form at every time between min_t and max_t.
+        The box of the inner form is rotated over all angles the form passes in that time, a full turn if the window is unbounded.
+
+        Args:
+            - min_t (float): start of the time window
+            - max_t (float): end of the time window
+
+        Returns:
+            - Optional[BoundingBox]: the box or None if the inner form has no box
+        """
+        bound = self.form.get_bound(min_t, max_t)
+        if bound is None:
+            return None
+        if self.angle_speed == 0:
+            angle = self.start_angle
+            return bound.rotate(angle, angle, self.center)
+        if max_t == math.inf:
+            return bound.rotate(0.0, 2*math.pi, self.center)
+        angle_1 = self.start_angle + self.angle_speed*(min_t-self.start_time)
+        angle_2 = self.start_angle + self.angle_speed*(max_t-self.start_time)
+        return bound.rotate(min(angle_1, angle_2), max(angle_1, angle_2), self.center)
+
     def get_name(self):
         """
         Get the name of the form
@@ -115,7 +192,7 @@ class RotateForm(Form):
         """
         return self.form.get_material()
 
-    def get_points(self, t: float) -> List[Vec[float]]:
+    def get_points(self, t: float) -> VecArray:
         """
         Get the points of the form at a given time
 
@@ -123,10 +200,10 @@ class RotateForm(Form):
             - t (float): The time
 
         Returns:
-            - List[Vec[float]]: The points of the form
+            - VecArray: The points of the form
         """
         angle = self.start_angle + self.angle_speed*(t-self.start_time)
-        return list(map(lambda p: p.rotate(angle, self.center), self.form.get_points(t)))
+        return VecArray.from_vecs(self.form.get_points(t)).rotate(angle, self.center)
 
     def rotate(self, angle: float, center: Vec[float]) -> RotateForm:
         """
@@ -6,7 +6,9 @@ Classes:
 """
 
 from __future__ import annotations
-from typing import List
+import math
+from typing import List, Optional
+from math_utils.bounding_box import BoundingBox, union_bounds
 from objects.form import Form
 from objects.ball import Ball
 from objects.material import Material
@@ -28,7 +30,7 @@ class TempForm(Form):
     Methods:
         - __init__(start_form: Form, form_duration: float, end_form: Form, name="tempform"): Initializes a TempForm object.
         - draw(screen, color, time: float): Draws the temporary form on the screen based on the current time.
-        - find_collision(ball: Ball, ignore: List[Path] = []): Finds the collision between the temporary form and a ball.
+        - find_collision(ball: Ball, max_t: float = math.inf, ignore: List[Path] = []): Finds the collision between the temporary form and a ball.
         - get_name(): Returns the name of the temporary form.
         - get_material() -> Material: Returns the material of the temporary form.
         - get_points(t: float) -> List[Vec[float]]: Returns the points of the temporary form at a given time.
@@ -65,12 +67,13 @@ class TempForm(Form):
         else:
             self.end_form.draw(screen, color, time)
 
-    def find_collision(self, ball: Ball, ignore: List[Path] = []):
+    def find_collision(self, ball: Ball, max_t: float = math.inf, ignore: List[Path] = []):
         """
         Finds the collision between the temporary form and a ball.
 
         Args:
             ball (Ball): The ball to check for collision.
+            max_t (float, optional): The time horizon relative to ball.start_t.
             ignore (List[Path], optional): A list of paths to ignore for collision detection.
 
         Returns:
@@ -78,13 +81,14 @@ class TempForm(Form):
         """
         self.i += 1
         if ball.start_t >= self.form_duration:
-            return self.end_form.find_collision(ball)
+            return self.end_form.find_collision(ball, max_t)
 
-        coll_start = self.start_form.find_collision(ball)
+        # collisions with the start form after form_duration don't count
+        coll_start = self.start_form.find_collision(ball, min(max_t, self.form_duration - ball.start_t))
         if coll_start is not None and coll_start.get_coll_t() + ball.start_t < self.form_duration:
             return coll_start
 
-        coll_end = self.end_form.find_collision(ball)
+        coll_end = self.end_form.find_collision(ball, max_t)
         if coll_end is None:
             pass
         elif coll_end.get_coll_t() + ball.start_t >= self.form_duration:
@@ -92,6 +96,24 @@ class TempForm(Form):
 
         return None
 
+    def get_bound(self, min_t: float, max_t: float) -> Optional[BoundingBox]:
+        """
+        Returns a box containing the form between min_t and max_t, the union of the boxes of the forms active in that time.
+
+        Args:
+            min_t (float): The start of the time window.
+            max_t (float): The end of the time window.
+
+        Returns:
+            The box, or None if one of the active forms has no box.
+        """
+        if min_t >= self.form_duration:
+            return self.end_form.get_bound(min_t, max_t)
+        if max_t < self.form_duration:
+            return self.start_form.get_bound(min_t, max_t)
+        return union_bounds([self.start_form.get_bound(min_t, self.form_duration),
+                             self.end_form.get_bound(self.form_duration, max_t)])
+
     def get_name(self):
         """
         Returns the name of the temporary form.
@@ -1,3 +1,6 @@
+import math
+from typing import Optional
+from math_utils.bounding_box import BoundingBox
 from collision.collision import TimedCollision
 from math_utils.vec import Vec
 from objects.form import Form
@@ -40,12 +43,13 @@ class TimedForm(Form):
         """
         self.form.draw(screen, color, time-self.start_time)
 
-    def find_collision(self, ball):
+    def find_collision(self, ball, max_t: float = math.inf):
         """
         Find the first collision of the ball with the form
         
         Args:
             - ball: The ball to check for collision
+            - max_t: The time horizon relative to ball.start_t
         
         Returns:
             - TimedCollision: The first collision of the ball with the form
@@ -57,7 +61,9 @@ class TimedForm(Form):
             timed_ball = ball.with_start_pos(ball_pos).with_vel(ball_vel).with_start_t(0.0)
         else:
             timed_ball = ball.with_start_t(ball.start_t - self.start_time)
-        coll = self.form.find_collision(timed_ball)
+        # times of the inner form are relative to timed_ball, shift the horizon accordingly
+        offset = self.start_time + timed_ball.start_t - ball.start_t
+        coll = self.form.find_collision(timed_ball, max_t - offset)
 
         if coll is None:
             return None
@@ -68,6 +74,9 @@ class TimedForm(Form):
         return TimedCollision(coll, coll_t - ball.start_t)
     def is_moving(self, t: float) -> bool:
         return self.form.is_moving(t - self.start_time)
+
+    def get_bound(self, min_t: float, max_t: float) -> Optional[BoundingBox]:
+        return self.form.get_bound(min_t - self.start_time, max_t - self.start_time)
     
     def get_name(self) -> str:
         return self.name
@@ -2,13 +2,24 @@
 This file contains the TransformForm class, which is a wrapper for a form that moves it around over time using a given transformation.
 """
 from __future__ import annotations
-from typing import List, Optional
+import math
+from typing import Dict, List, Optional, Tuple
 import pygame
-from math_utils.polynom import Polynom
+from collision.collision import Collision, TimedCollision
+from math_utils.bounding_box import BoundingBox
+from math_utils.polynom import Polynom, make_polynom, shift_coefs
 from objects.ball import Ball
 from objects.form import Form
+from objects.forms.windowed import find_collision_windowed
 from objects.material import Material
-from math_utils.vec import Vec
+from math_utils.vec import Trajectory, Vec, VecArray
+
+# length of the time windows used if the transformation is more than quadratic
+window_length = 0.5
+# the cache of shifted transformations is cleared once it holds this many
+max_shifted_transforms = 256
+
+
 class TransformForm(Form):
     """
     A Wrapper for a form that moves it around over time using a given transformation
@@ -16,10 +27,15 @@ class TransformForm(Form):
     Attributes:
         - form (Form): The form to transform
         - transform (Vec[Polynom]): The transformation to apply to the form
+        - transform_coefs (Tuple[List[float], List[float]]): The coefficients of the x and y transformation
+        - shifted_transforms (Dict[float, Trajectory]): The transformation as a function of the time since a start time,
+          for the start times of the balls it was used for (see get_shifted_transform)
         - name (str): The name of the form
     """
     form: Form
     transform: Vec[Polynom]
+    transform_coefs: Tuple[List[float], List[float]]
+    shifted_transforms: Dict[float, Trajectory]
     name: str
 
     def __init__(self, form: Form, transform: Vec[Polynom], name="transformform"):
@@ -33,6 +49,8 @@ class TransformForm(Form):
         """
         self.form = form
         self.transform = transform
+        self.transform_coefs = (transform.x.get_coefs(), transform.y.get_coefs())
+        self.shifted_transforms = {}
         self.name = name
 
     def draw(self, screen: pygame.Surface, color, time: Optional[float] = None):
@@ -50,38 +68,96 @@ class TransformForm(Form):
         if time is None:
             return
         diff = self.transform.apply(time)
-        pts = self.form.get_points(time)
-        pts_transformed = list(map(lambda p: (p + diff).as_tuple(), pts))
+        pts = VecArray.from_vecs(self.form.get_points(time))
+        pts_transformed = (pts + diff).as_tuples()
         pygame.draw.lines(screen, color, False, pts_transformed, width=3)
         return
 
-    def find_collision(self, ball: Ball):
+    def find_collision(self, ball: Ball, max_t: float = math.inf):
         """
         Find the first collision of the ball with the form. This is done by moving the ball trajectory using the transformation and then finding the collision with the form.
+        If the transformation is more than quadratic, the collision equation has a high degree and the horizon is split into
+        windows of window_length, which are solved in order (see find_collision_windowed).
 
         Args:
             - ball: ball to check for collision
+            - max_t: time horizon relative to ball.start_t
 
         Returns:
             - Collision: first collision of the ball with the form
         """
+        if max(len(self.transform_coefs[0]), len(self.transform_coefs[1])) <= 3:
+            return self.find_collision_in_window(ball, 0.0, max_t)
+        return find_collision_windowed(self, ball, max_t, window_length, self.find_collision_in_window, solve_rest=True)
+
+    def find_collision_in_window(self, ball: Ball, shift: float, length: float) -> Optional[Collision]:
+        """
+        Find the first collision in a time window
+
+        Args:
+            - ball: ball, moved to the start of the window
+            - shift: the time the ball was moved by
+            - length: the length of the window
+
+        Returns:
+            - Optional[Collision]: first collision, relative to the start of the ball before it was moved
+        """
         # move the ball trajectory using the transformation
-        t = Polynom([0, 1])
-        # rotate the ball trajectory
-        bahn = ball.bahn - self.transform.apply(t+ball.start_t)
+        bahn = ball.bahn - self.get_shifted_transform(ball.start_t)
         # calculate the collision
-        coll = self.form.find_collision(ball.with_bahn(bahn))
+        coll = self.form.find_collision(ball.with_bahn(bahn), length)
+        if coll is not None and shift != 0:
+            coll = TimedCollision(coll, coll.get_coll_t()+shift)
         return coll
 
+    def get_shifted_transform(self, start_t: float) -> Trajectory:
+        """
+        Get the transformation as a function of the time since start_t, transform(t + start_t).
+        The result is cached, the same ball is checked against the form many times before it collides.
+
+        Args:
+            - start_t: the start time, usually the start of a ball
+
+        Returns:
+            - Trajectory: the shifted transformation
+        """
+        shifted = self.shifted_transforms.get(start_t)
+        if shifted is None:
+            if len(self.shifted_transforms) >= max_shifted_transforms:
+                self.shifted_transforms.clear()
+            shifted = Trajectory(make_polynom(shift_coefs(self.transform_coefs[0], start_t)),
+                                 make_polynom(shift_coefs(self.transform_coefs[1], start_t)))
+            self.shifted_transforms[start_t] = shifted
+        return shifted
+
+    def get_bound(self, min_t: float, max_t: float) -> Optional[BoundingBox]:
+        """
+        Get a box containing the form at every time between min_t and max_t,
+        the box of the inner form moved by every offset the transformation takes in that time.
+
+        Args:
+            - min_t: start of the time window
+            - max_t: end of the time window
+
+        Returns:
+            - Optional[BoundingBox]: the box or None if the inner form has no box or the window is unbounded
+        """
+        if max_t == math.inf:
+            return None
+        bound = self.form.get_bound(min_t, max_t)
+        if bound is None:
+            return None
+        return bound.translate(self.transform.x.get_range(min_t, max_t), self.transform.y.get_range(min_t, max_t))
+
     def get_name(self):
         return self.name
 
     def get_material(self) -> Material:
         return self.form.get_material()
 
-    def get_points(self, t: float) -> List[Vec[float]]:
+    def get_points(self, t: float) -> VecArray:
         transform = self.transform.apply(t)
-        return list(map(lambda p: p + transform, self.form.get_points(t)))
+        return VecArray.from_vecs(self.form.get_points(t)) + transform
 
     def rotate(self, angle: float, center: Vec[float]) -> TransformForm:
         new_form = self.form.rotate(angle, center)
@@ -0,0 +1,125 @@
+"""
+Finds the collision of a ball with a moving form in consecutive time windows.
+Forms whose collision equation is only accurate for a short time (like the Taylor series of a rotation) split the horizon into
+windows. Every window is solved with the ball moved to its start, windows the ball can't reach the form in are skipped using
+bounding boxes, and the search stops at the first window with a collision.
+An unbounded horizon is cut at the time the ball leaves the box the form stays in forever, so the windows always end.
+"""
+from __future__ import annotations
+import math
+from typing import Callable, List, Optional
+
+from collision.collision import Collision
+from math_utils.bounding_box import BoundingBox, get_swept_bound
+from math_utils.interval import SimpleInterval
+from math_utils.polynom import find_roots, horner, make_polynom, shift_coefs
+from math_utils.vec import Trajectory
+from objects.ball import Ball
+from objects.form import Form
+
+# windows after the first one start this much earlier, so a root at the border of two windows isn't lost
+# (roots at the very start of a window are ignored by the root finding)
+window_overlap = 0.00001
+# if the ball never leaves the reach of the form (it is at rest), at most this many windows are searched. Forms whose
+# equation is exact for any length solve the rest as one window, the others return no collision
+max_windows = 32
+
+
+def shift_ball(ball: Ball, shift: float) -> Ball:
+    """
+    Get the same ball, but with its start moved by shift. The trajectory is shifted exactly.
+
+    Args:
+        - ball: the ball
+        - shift: the time to move the start by
+
+    Returns:
+        - Ball: the ball starting at ball.start_t + shift
+    """
+    bahn = Trajectory(make_polynom(shift_coefs(ball.bahn.x.get_coefs(), shift)),
+                      make_polynom(shift_coefs(ball.bahn.y.get_coefs(), shift)))
+    return ball.with_bahn(bahn).with_start_t(ball.start_t + shift)
+
+
+def get_leave_time(coefs: List[float], interval: SimpleInterval) -> float:
+    """
+    Get the time after which a polynom stays outside of an interval forever
+
+    Args:
+        - coefs: the coefficients of the polynom, lowest exponent first
+        - interval: the interval
+
+    Returns:
+        - float: the time (at least 0.0), math.inf if the polynom ends up inside the interval
+    """
+    last = 0.0
+    for limit in (interval.min, interval.max):
+        if math.isfinite(limit):
+            shifted = list(coefs) or [0.0]
+            shifted[0] -= limit
+            last = max([last] + find_roots(shifted, min_x=0.0))
+    # the polynom doesn't cross a limit after last, so one value after it tells where it stays
+    if interval.min <= horner(coefs, last + 1.0) <= interval.max:
+        return math.inf
+    return last
+
+
+def get_reach_time(ball: Ball, bound: Optional[BoundingBox]) -> float:
+    """
+    Get the time after which a ball can't reach a box anymore
+
+    Args:
+        - ball: the ball
+        - bound: the box, None if it is unbounded
+
+    Returns:
+        - float: the time relative to ball.start_t, math.inf if the ball may stay in the box forever
+    """
+    if bound is None:
+        return math.inf
+    return min(get_leave_time(ball.bahn.x.get_coefs(), bound.x_range), get_leave_time(ball.bahn.y.get_coefs(), bound.y_range))
+
+
+def find_collision_windowed(form: Form, ball: Ball, max_t: float, window_length: float,
+                            solve_window: Callable[[Ball, float, float], Optional[Collision]],
+                            solve_rest: bool = False) -> Optional[Collision]:
+    """
+    Find the first collision of a ball with a form by solving one time window after the other.
+    Every window solved is at most window_length long, with the exception of the rest of an unbounded horizon if solve_rest is
+    set (see max_windows).
+
+    Args:
+        - form: the form, its bounding box is used to skip windows
+        - ball: the ball
+        - max_t: the time horizon relative to ball.start_t
+        - window_length: the length of the windows
+        - solve_window: gets the ball moved to the start of a window, the time it was moved by and the length of the window,
+          returns the first collision in the window (relative to the original ball) or None
+        - solve_rest: True if solve_window is exact for windows of any length, even unbounded ones
+
+    Returns:
+        - Optional[Collision]: the first collision, relative to ball.start_t
+    """
+    if max_t == math.inf:
+        max_t = get_reach_time(ball, form.get_bound(ball.start_t, math.inf))
+    start = 0.0
+    n_windows = 0
+    while start < max_t:
+        n_windows += 1
+        if max_t == math.inf and n_windows > max_windows:
+            if not solve_rest:
+                return None
+            end = max_t
+        else:
+            end = min(start + window_length, max_t)
+        if end != math.inf:
+            form_bound = form.get_bound(ball.start_t + start, ball.start_t + end)
+            if form_bound is not None and not form_bound.overlaps(get_swept_bound(ball.bahn, start, end)):
+                start = end
+                continue
+        shift = max(0.0, start - window_overlap)
+        coll = solve_window(shift_ball(ball, shift) if shift > 0 else ball, shift, end - shift)
+        if coll is not None:
+            return coll
+        start = end
+    return None
@@ -1,20 +1,98 @@
 import math
-from typing import List, Tuple
+from typing import List, Optional, Tuple
+import numpy as np
 import pygame
 from objects.ball import Ball
 from collision.coll_direction import CollDirection
 from collision.collision import Collision, SimpleCollision
+from math_utils.bounding_box import BoundingBox
 from math_utils.interval import Interval, SimpleInterval
 from objects.material import Material
 
-from math_utils.polynom import Polynom
-from math_utils.vec import Vec
+from math_utils.polynom import Polynom, SmallPolynom, deriv_coefs, find_roots, horner
+from math_utils.vec import FloatVec, Vec, VecArray
 from abc import ABC, abstractmethod
 
 from math_utils.angle import check_angle_between
 
+# the points of a CirclePath are only used for drawing it, they are computed when it is first drawn with one point for about
+# every point_spacing pixels of arc length, but at least min_circle_points and at most max_circle_points
+point_spacing = 4.0
+min_circle_points = 8
+max_circle_points = 1000
+
+
+class BahnCoefs:
+    """
+    The coefficients of a trajectory and of its derivative as lists, so the roots of a collision equation can be checked
+    without polynom objects
+
+    Attributes:
+        x (List[float]): the coefficients of the x coordinate
+        y (List[float]): the coefficients of the y coordinate
+        vel_x (List[float]): the coefficients of the x velocity
+        vel_y (List[float]): the coefficients of the y velocity
+    """
+    x: List[float]
+    y: List[float]
+    vel_x: List[float]
+    vel_y: List[float]
+
+    def __init__(self, bahn: Vec[Polynom]):
+        self.x = bahn.x.get_coefs()
+        self.y = bahn.y.get_coefs()
+        self.vel_x = deriv_coefs(self.x)
+        self.vel_y = deriv_coefs(self.y)
+
+    def get_pos(self, t: float) -> FloatVec:
+        return FloatVec(horner(self.x, t), horner(self.y, t))
+
+    def get_vel(self, t: float) -> FloatVec:
+        return FloatVec(horner(self.vel_x, t), horner(self.vel_y, t))
+
+
+def circle_coll_eq(center_x: float, center_y: float, radius_sq: float, bahn_x: List[float], bahn_y: List[float]) -> List[float]:
+    """
+    Get the coefficients of (bahn_x - center_x)^2 + (bahn_y - center_y)^2 - radius_sq, which is 0 when the center of the ball
+    is on the circle. Built directly from the coefficients instead of with polynom arithmetic.
+    """
+    x = np.array(bahn_x, dtype=float)
+    y = np.array(bahn_y, dtype=float)
+    x[0] -= center_x
+    y[0] -= center_y
+    sq_x = np.convolve(x, x)
+    sq_y = np.convolve(y, y)
+    if len(sq_x) < len(sq_y):
+        sq_x, sq_y = sq_y, sq_x
+    coefs = sq_x.copy()
+    coefs[:len(sq_y)] += sq_y
+    coefs[0] -= radius_sq
+    return coefs.tolist()
+
+
+def line_coll_eq(eq_coefs: Tuple[float, float, float, float], bahn_x: List[float], bahn_y: List[float]) -> List[float]:
+    """
+    Get the coefficients of eq_x(bahn_y) - eq_y(bahn_x) for the linear equations of a line (see LinePath.eq_coefs),
+    which is 0 when the center of the ball is on the line. The lists of the trajectory are not changed.
+    """
+    x_0, x_1, y_0, y_1 = eq_coefs
+    length = max(len(bahn_x), len(bahn_y))
+    bahn_x = bahn_x + [0.0]*(length - len(bahn_x))
+    bahn_y = bahn_y + [0.0]*(length - len(bahn_y))
+    coefs = [x_1*coef_y - y_1*coef_x for coef_x, coef_y in zip(bahn_x, bahn_y)]
+    coefs[0] = (x_0 + x_1*bahn_y[0]) - (y_0 + y_1*bahn_x[0])
+    return coefs
+
 
 class Path(ABC):
+    """
+    Interface for the paths of a form, which the center of a ball can collide with
+
+    Attributes:
+        bound (BoundingBox): contains all points the path can be hit at
+    """
+    bound: BoundingBox
+
     @abstractmethod
     def get_normal(self, pos: Vec) -> Vec:
         """
@@ -29,9 +107,10 @@ class Path(ABC):
         pass
 
     @abstractmethod
-    def find_collision(self, ball: Ball) -> Collision | None:
+    def find_collision(self, ball: Ball, max_t: float = math.inf) -> Collision | None:
         """
-        Returns the collision with the ball or None if there is no collision
+        Returns the first collision with the ball or None if there is no collision.
+        Collisions after max_t (relative to ball.start_t) are not searched for.
         """
         pass
 
@@ -66,7 +145,8 @@ class CirclePath(Path):
     Attributes:
         pos (Vec): the center of the circle
         radius (float): the radius of the circle
-        points (List[Tuple[float, float]]): the points of the circle
+        radius_sq (float): the squared radius, the constant part of the collision equation
+        points (Optional[List[Tuple[float, float]]]): the points of the circle for drawing, None until it is first drawn
         name (str): the name of the circle
         bound (BoundingBox): the bounding box of the circle
         min_angle (float): the minimum angle of the circle
@@ -74,9 +154,10 @@ class CirclePath(Path):
         """
     pos: Vec
     radius: float
-    points: List[Tuple[float, float]]
+    radius_sq: float
+    points: Optional[List[Tuple[float, float]]]
     name: str
-    # bound: BoundingBox
+    bound: BoundingBox
     min_angle: float
     max_angle: float
 
@@ -95,12 +176,15 @@ class CirclePath(Path):
             max_angle += 2*math.pi
         self.pos = pos
         self.radius = radius
-        self.points = []
+        self.points = None
         self.name = name
         self.min_angle = min_angle
         self.max_angle = max_angle
         self.form = form
         self.collision_direction = coll_direction
+        self.radius_sq = radius**2
+        self.bound = BoundingBox(SimpleInterval(pos.x - radius, pos.x + radius),
+                                 SimpleInterval(pos.y - radius, pos.y + radius))
 
         # if x_range is None:
         #    x_range = SimpleInterval(pos.x-radius, pos.x+radius)
@@ -108,26 +192,27 @@ class CirclePath(Path):
         #    y_range = SimpleInterval(pos.y-radius, pos.y+radius)
         # self.bound = BoundingBox(x_range, y_range)
 
-        resolution = 1000
-        step_size = (self.max_angle - self.min_angle)/resolution
-
-        for i in range(resolution):
-            a_r = i*step_size + self.min_angle
-            x = math.cos(a_r)*radius + pos.x
-            y = math.sin(a_r)*radius + pos.y
-            self.points.append((x, y))
+    def get_points(self) -> List[Tuple[float, float]]:
+        """
+        Get the points of the circle for drawing, they are computed on the first call
+        """
+        if self.points is None:
+            arc_length = abs(self.radius)*(self.max_angle - self.min_angle)
+            resolution = min(max(math.ceil(arc_length/point_spacing), min_circle_points), max_circle_points)
+            self.points = VecArray.from_arc(self.pos, self.radius, self.min_angle, self.max_angle, resolution).as_tuples()
+        return self.points
 
     def get_normal(self, pos: Vec) -> Vec:
         steep = -(pos.x - self.pos.x)/(pos.y-self.pos.y)
         m = -1/steep
-        return Vec(1, m).normalize()
+        return FloatVec(1, m).normalize()
 
     def get_tangent(self, pos: Vec) -> Vec:
         steep = -(pos.x - self.pos.x)/(pos.y-self.pos.y)
-        return Vec(1, steep).normalize()
+        return FloatVec(1, steep).normalize()
 
     def draw(self, screen, color):
-        pygame.draw.lines(screen, color, False, self.points, width=1)
+        pygame.draw.lines(screen, color, False, self.get_points(), width=1)
         if False:
             self.bound.draw(screen, color)
 
@@ -152,24 +237,28 @@ class CirclePath(Path):
         elif self.collision_direction == CollDirection.ALLOW_FROM_OUTSIDE:
             return dot < 0
 
-    def check_coll(self, coll_t: float, bahn: Vec) -> bool:
+    def check_coll(self, coll_t: float, bahn: BahnCoefs) -> bool:
         """
         Check wether a collision at the given time is valid
         """
-        coll_pos = bahn.apply(coll_t)
-        ball_vel = bahn.deriv().apply(coll_t)
+        coll_pos = bahn.get_pos(coll_t)
+        ball_vel = bahn.get_vel(coll_t)
         return self.check_coll_angle(coll_pos) and self.check_coll_direction(coll_pos, ball_vel)
 
-    def find_collision(self, ball: Ball) -> Collision | None:
+    def get_coll_eq(self, bahn: Vec[Polynom]) -> List[float]:
         """
-        Returns the collision with the center of the ball or None if there is no collision
+        Get the coefficients of (bahn.x - pos.x)^2 + (bahn.y - pos.y)^2 - radius^2, which is 0 when the center of the ball is on the circle.
+        See circle_coll_eq.
         """
-        # TODO: restrict searched t by already found!
-        # t_range: Interval | None = self.bound.times_inside(ball)
-        check_eq: Polynom = ((ball.bahn.x-self.pos.x)**2 +
-                             (ball.bahn.y-self.pos.y)**2 - (self.radius)**2)
-        coll = check_eq.find_roots(
-            filter_fn=lambda t: self.check_coll(t, ball.bahn))
+        return circle_coll_eq(self.pos.x, self.pos.y, self.radius_sq, bahn.x.get_coefs(), bahn.y.get_coefs())
+
+    def find_collision(self, ball: Ball, max_t: float = math.inf) -> Collision | None:
+        """
+        Returns the first collision with the center of the ball before max_t or None if there is no collision
+        """
+        bahn = BahnCoefs(ball.bahn)
+        coll = find_roots(self.get_coll_eq(ball.bahn),
+                          filter_fn=lambda t: self.check_coll(t, bahn), max_x=max_t, first_only=True)
         if len(coll) > 0:
             return SimpleCollision(coll[0], ball.bahn, self)
         return None
@@ -178,10 +267,9 @@ class CirclePath(Path):
         """
         Returns all collisions with the center of the ball or an empty list if there is no collision
         """
-        check_eq: Polynom = ((bahn.x-self.pos.x)**2 +
-                             (bahn.y-self.pos.y)**2 - (self.radius)**2)
-        colls = check_eq.find_roots(
-            filter_fn=lambda t: self.check_coll(t, bahn))
+        coefs = BahnCoefs(bahn)
+        colls = find_roots(self.get_coll_eq(bahn),
+                           filter_fn=lambda t: self.check_coll(t, coefs))
         return colls
 
     def get_rotated(self, angle: float, center: Vec):
@@ -203,16 +291,18 @@ class LinePath(Path):
         pos1 (Vec): the first point of the line
         pos2 (Vec): the second point of the line
         tangent (Vec): the tangent of the line
-        eq_x (Polynom): the equation of the line in x
-        eq_y (Polynom): the equation of the line in y
+        eq_x (SmallPolynom): the equation of the line in x
+        eq_y (SmallPolynom): the equation of the line in y
+        eq_coefs (Tuple[float, float, float, float]): the constant and linear coefficients of eq_x and eq_y
         x_range (Interval): the range of x values in which the line is defined
         y_range (Interval): the range of y values in which the line is defined
     """
     pos1: Vec
     pos2: Vec
     normal: Vec
-    eq_x: Polynom
-    eq_y: Polynom
+    eq_x: SmallPolynom
+    eq_y: SmallPolynom
+    eq_coefs: Tuple[float, float, float, float]
     x_range: Interval
     y_range: Interval
 
@@ -230,21 +320,25 @@ class LinePath(Path):
         self.form = form
         self.collision_direction = collision_direction
         self.normal = normal
-        self.tangent = (pos2-pos1).normalize()
+        self.tangent = FloatVec.from_vec(pos2-pos1).normalize()
         self.x_range = SimpleInterval(min(pos1.x, pos2.x), max(pos1.x, pos2.x))
         self.y_range = SimpleInterval(min(pos1.y, pos2.y), max(pos1.y, pos2.y))
         if math.isclose(self.tangent.y, 0.0, rel_tol=1e-5):
             self.y_range = SimpleInterval(pos1.y - 5, pos1.y + 5)
         if math.isclose(self.tangent.x, 0.0, rel_tol=1e-5):
             self.x_range = SimpleInterval(pos1.x - 5, pos1.x + 5)
-            y = Polynom([0, 1])
+            y = SmallPolynom([0, 1])
             self.eq_x = y*0 + pos1.x
             self.eq_y = y
         else:
-            x = Polynom([0, 1])
+            x = SmallPolynom([0, 1])
             self.eq_x = x
             steep = self.tangent.y/self.tangent.x
             self.eq_y = (x-pos1.x)*steep+pos1.y
+        eq_x = self.eq_x.get_coefs() + [0.0]
+        eq_y = self.eq_y.get_coefs() + [0.0]
+        self.eq_coefs = (eq_x[0], eq_x[1], eq_y[0], eq_y[1])
+        self.bound = BoundingBox(self.x_range, self.y_range)
 
     def get_normal(self, pos: Vec) -> Vec:
         """
@@ -274,26 +368,32 @@ class LinePath(Path):
     def check_coll_pos(self, coll_pos: Vec) -> bool:
         return self.x_range.check(coll_pos.x) and self.y_range.check(coll_pos.y)
 
-    def check_coll(self, coll_t: float, bahn: Vec) -> bool:
-        coll_pos = bahn.apply(coll_t)
-        ball_vel = bahn.deriv().apply(coll_t)
+    def check_coll(self, coll_t: float, bahn: BahnCoefs) -> bool:
+        coll_pos = bahn.get_pos(coll_t)
+        ball_vel = bahn.get_vel(coll_t)
         return self.check_coll_direction(coll_pos, ball_vel) and self.check_coll_pos(coll_pos)
 
-    def find_collision(self, ball: Ball) -> Collision | None:
+    def get_coll_eq(self, bahn: Vec[Polynom]) -> List[float]:
+        """
+        Get the coefficients of eq_x(bahn.y) - eq_y(bahn.x), which is 0 when the center of the ball is on the line.
+        Both equations are linear, so this is eq_coefs applied to the coefficients of the trajectory, see line_coll_eq.
         """
-        Returns the collision with the center of the ball or None if there is no collision
+        return line_coll_eq(self.eq_coefs, bahn.x.get_coefs(), bahn.y.get_coefs())
+
+    def find_collision(self, ball: Ball, max_t: float = math.inf) -> Collision | None:
+        """
+        Returns the first collision with the center of the ball before max_t or None if there is no collision
 
         Args:
             ball (Ball): the ball to check for collision
+            max_t (float, optional): the time horizon, relative to ball.start_t. Defaults to infinity.
 
         Returns:
             Collision | None: the collision or None if there is no collision
         """
-
-        coll_eq: Polynom = self.eq_x.apply(
-            ball.bahn.y) - self.eq_y.apply(ball.bahn.x)
-        colls = coll_eq.find_roots(
-            filter_fn=lambda t: self.check_coll(t, ball.bahn))
+        bahn = BahnCoefs(ball.bahn)
+        colls = find_roots(self.get_coll_eq(ball.bahn),
+                           filter_fn=lambda t: self.check_coll(t, bahn), max_x=max_t, first_only=True)
 
         if len(colls) > 0:
             return SimpleCollision(colls[0], ball.bahn, self)
@@ -310,9 +410,9 @@ class LinePath(Path):
             List[Collision]: the collisions or an empty list if there is no collision
         """
 
-        coll_eq: Polynom = self.eq_x.apply(bahn.y) - self.eq_y.apply(bahn.x)
-        colls = coll_eq.find_roots(
-            filter_fn=lambda t: self.check_coll(t, bahn))
+        coefs = BahnCoefs(bahn)
+        colls = find_roots(self.get_coll_eq(bahn),
+                           filter_fn=lambda t: self.check_coll(t, coefs))
 
         return colls
 
@@ -0,0 +1,230 @@
+"""
+The static collision geometry of a level, compiled into flat rows.
+The LinePaths and CirclePaths of all static forms are stored as one row per path, the paths of a form are next to each
+other. The rows are kept in typed numpy arrays, which is how they are pickled, and as tuples of python values, which the
+query reads. A query loops over the rows of the given forms one by one, but the trajectory coefficients and the box swept
+by the ball are computed once per query instead of once per form and path, and no Path methods are called. The Form and
+Path objects stay as they are, they are used for drawing, by the scripts and for the collisions that are returned.
+"""
+from __future__ import annotations
+import math
+from typing import Dict, List, Optional
+
+import numpy as np
+
+from collision.coll_direction import CollDirection
+from collision.collision import SimpleCollision
+from math_utils.angle import check_angle_between, normalize_angle
+from math_utils.polynom import coefs_range, find_roots, horner
+from objects.ball import Ball
+from objects.form import Form, StaticForm
+from objects.path import BahnCoefs, CirclePath, LinePath, Path, circle_coll_eq, line_coll_eq
+
+# the kinds of paths
+LINE = 0
+ARC = 1
+
+
+class StaticGeometry:
+    """
+    The paths of a set of static forms, compiled into rows. Row i of every path array and of rows belongs to paths[i].
+
+    Attributes:
+        - forms (List[StaticForm]): the compiled forms
+        - form_index (Dict[int, int]): the index in forms of every compiled form, by id
+        - form_starts (np.ndarray): the paths of forms[i] are the rows form_starts[i] to form_starts[i + 1]
+        - paths (List[Path]): the compiled paths, used for the collisions that are returned
+        - path_kinds (np.ndarray): LINE or ARC for every path
+        - path_dirs (np.ndarray): the allowed collision direction of every path, see direction_sign
+        - path_bounds (np.ndarray): shape (n, 4), min x, max x, min y, max y of every path. For lines this is also the
+          range a collision has to be in
+        - path_params (np.ndarray): shape (n, 6), for lines the eq_coefs (x_0, x_1, y_0, y_1) and the normal, for arcs the
+          center, the squared radius and the normalized min and max angle
+        - rows (List[tuple]): kind, direction, bounds and params of every path as python values, read by the query
+        - form_paths (List[range]): the rows of every form, from form_starts
+    """
+    forms: List[StaticForm]
+    form_index: Dict[int, int]
+    form_starts: np.ndarray
+    paths: List[Path]
+    path_kinds: np.ndarray
+    path_dirs: np.ndarray
+    path_bounds: np.ndarray
+    path_params: np.ndarray
+    rows: List[tuple]
+    form_paths: List[range]
+
+    def __init__(self, forms: List[StaticForm]):
+        """
+        Compile the paths of the given forms
+
+        Args:
+            - forms: the static forms, can_compile must be True for all of them
+        """
+        self.forms = list(forms)
+        self.paths = []
+        form_starts = [0]
+        kinds: List[int] = []
+        dirs: List[int] = []
+        bounds: List[tuple] = []
+        params: List[tuple] = []
+        for form in self.forms:
+            for path in form.paths:
+                self.paths.append(path)
+                dirs.append(direction_sign(path.collision_direction))
+                bound = path.bound
+                bounds.append((bound.x_range.min, bound.x_range.max, bound.y_range.min, bound.y_range.max))
+                if isinstance(path, LinePath):
+                    kinds.append(LINE)
+                    params.append(path.eq_coefs + (path.normal.x, path.normal.y))
+                else:
+                    assert isinstance(path, CirclePath)
+                    kinds.append(ARC)
+                    params.append((path.pos.x, path.pos.y, path.radius_sq, normalize_angle(path.min_angle),
+                                   normalize_angle(path.max_angle), 0.0))
+            form_starts.append(len(self.paths))
+        self.form_starts = np.array(form_starts, dtype=np.int32)
+        self.path_kinds = np.array(kinds, dtype=np.int8)
+        self.path_dirs = np.array(dirs, dtype=np.int8)
+        self.path_bounds = np.array(bounds, dtype=float).reshape(-1, 4)
+        self.path_params = np.array(params, dtype=float).reshape(-1, 6)
+        self.make_index()
+
+    def make_index(self):
+        """
+        Build form_index, rows and form_paths from the arrays
+        """
+        self.form_index = {id(form): i for i, form in enumerate(self.forms)}
+        starts = self.form_starts.tolist()
+        self.form_paths = [range(start, end) for start, end in zip(starts, starts[1:])]
+        self.rows = list(zip(self.path_kinds.tolist(), self.path_dirs.tolist(), self.path_bounds.tolist(),
+                             self.path_params.tolist()))
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        del state["form_index"]
+        del state["rows"]
+        del state["form_paths"]
+        return state
+
+    def __setstate__(self, state):
+        # the ids of the forms are different after unpickling
+        self.__dict__.update(state)
+        self.make_index()
+
+    @staticmethod
+    def can_compile(form: Form) -> bool:
+        """
+        Check if a form can be compiled: it has to be a StaticForm using the find_collision of StaticForm, with only
+        LinePaths (with inclusive ranges) and CirclePaths
+
+        Args:
+            - form: the form
+
+        Returns:
+            - bool: True if the form can be compiled
+        """
+        if not isinstance(form, StaticForm) or type(form).find_collision is not StaticForm.find_collision:
+            return False
+        for path in form.paths:
+            if isinstance(path, LinePath):
+                ranges = (path.x_range, path.y_range)
+                if not all(r.l_inclusive and r.r_inclusive for r in ranges) or path.bound.x_range is not path.x_range \
+                        or path.bound.y_range is not path.y_range:
+                    return False
+            elif not isinstance(path, CirclePath):
+                return False
+        return True
+
+    def contains(self, form: Form) -> bool:
+        return id(form) in self.form_index
+
+    def find_collision(self, ball: Ball, forms: List[Form], max_t: float = math.inf) -> Optional[SimpleCollision]:
+        """
+        Find the first collision of the ball with the paths of the given forms, the same collision the forms would find.
+        The rows of the forms are checked one by one in the order of the forms, every collision found shrinks the horizon
+        for the remaining paths.
+        If the horizon is finite, paths whose box doesn't overlap the box swept by the ball are skipped.
+
+        Args:
+            - ball: the ball
+            - forms: compiled forms to check
+            - max_t: time horizon relative to ball.start_t
+
+        Returns:
+            - Optional[SimpleCollision]: the first collision or None
+        """
+        bahn = BahnCoefs(ball.bahn)
+        best_t = math.inf
+        best_path = -1
+        ball_bound = None
+        for form in forms:
+            for path_i in self.form_paths[self.form_index[id(form)]]:
+                kind, direction, (min_x, max_x, min_y, max_y), params = self.rows[path_i]
+                if max_t != math.inf:
+                    if ball_bound is None:
+                        x_range = coefs_range(bahn.x, 0.0, max_t)
+                        y_range = coefs_range(bahn.y, 0.0, max_t)
+                        ball_bound = (x_range.min, x_range.max, y_range.min, y_range.max)
+                    if not (min_x <= ball_bound[1] and ball_bound[0] <= max_x and min_y <= ball_bound[3]
+                            and ball_bound[2] <= max_y):
+                        continue
+                if kind == LINE:
+                    coefs = line_coll_eq((params[0], params[1], params[2], params[3]), bahn.x, bahn.y)
+                    def check(t: float) -> bool:
+                        dot = params[4]*horner(bahn.vel_x, t) + params[5]*horner(bahn.vel_y, t)
+                        if not check_direction(direction, dot):
+                            return False
+                        return min_x <= horner(bahn.x, t) <= max_x and min_y <= horner(bahn.y, t) <= max_y
+                else:
+                    coefs = circle_coll_eq(params[0], params[1], params[2], bahn.x, bahn.y)
+                    def check(t: float) -> bool:
+                        offset_x = horner(bahn.x, t) - params[0]
+                        offset_y = horner(bahn.y, t) - params[1]
+                        angle = math.atan2(offset_y, offset_x)
+                        if angle < 0:
+                            angle += 2*math.pi
+                        if not check_angle_between(angle, params[3], params[4]):
+                            return False
+                        return check_direction(direction, offset_x*horner(bahn.vel_x, t) + offset_y*horner(bahn.vel_y, t))
+                roots = find_roots(coefs, filter_fn=check, max_x=max_t, first_only=True)
+                if len(roots) > 0 and roots[0] < best_t:
+                    best_t = roots[0]
+                    best_path = path_i
+                    max_t = min(max_t, best_t)
+                    # the horizon shrank, so the swept box has to be recomputed
+                    ball_bound = None
+        if best_path < 0:
+            return None
+        return SimpleCollision(best_t, ball.bahn, self.paths[best_path])
+
+
+def direction_sign(direction: CollDirection) -> int:
+    """
+    Encode a collision direction as the sign the dot product with the ball velocity must have
+
+    Args:
+        - direction: the direction
+
+    Returns:
+        - int: 1 for ALLOW_FROM_INSIDE, -1 for ALLOW_FROM_OUTSIDE, 0 for ALLOW_ALL
+    """
+    if direction == CollDirection.ALLOW_FROM_INSIDE:
+        return 1
+    if direction == CollDirection.ALLOW_FROM_OUTSIDE:
+        return -1
+    return 0
+
+
+def check_direction(direction: int, dot: float) -> bool:
+    """
+    Check the collision direction of a path
+
+    Args:
+        - direction: the direction of the path, see direction_sign
+        - dot: the dot product of the ball velocity with the normal of a line or the vector from the center of a circle
+
+    Returns:
+        - bool: True if the direction is allowed
+    """
+    return direction == 0 or direction*dot > 0
@@ -283,6 +283,7 @@ def {name}(t,ball_id){{
             hidden_forms[name] = self.parse_form(form)
         
         form_handler = FormHandler(forms = forms, named_forms = named_forms, hidden_forms = hidden_forms)
+        form_handler.compile()
         return form_handler, self.ballang_funcs
     def parse_ball(self, ball_dict):
         pos = self.parse_vec(ball_dict["pos"])